@@ -1,5 +1,7 @@
 import os
 
+import pytest
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 root_dir_content = os.listdir(BASE_DIR)
 PROJECT_DIR_NAME = 'yatube'
@@ -37,3 +39,15 @@ pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(scope='session', autouse=True)
+def scratch_dirs(tmp_path_factory):
+    # кэш и метрики тестов — во временном каталоге, как у manage.py test
+    from django.test.utils import override_settings
+
+    from core.runner import NPlusOneTestRunner
+
+    directory = str(tmp_path_factory.mktemp('scratch'))
+    with override_settings(**NPlusOneTestRunner.scratch_settings(directory)):
+        yield
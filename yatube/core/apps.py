@@ -1,5 +1,12 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from . import backup, metrics, slow_queries
+        connection_created.connect(backup.use_wal)
+        connection_created.connect(slow_queries.install)
+        connection_created.connect(metrics.install)
@@ -0,0 +1,30 @@
+"""Те же адреса, что в django.contrib.auth.urls, но с ленивым импортом."""
+from django.urls import path
+
+from .lazy import lazy_view
+from .throttle import throttle
+
+AUTH_VIEWS = 'django.contrib.auth.views.'
+
+urlpatterns = [
+    path('login/', throttle('login')(lazy_view(AUTH_VIEWS + 'LoginView')),
+         name='login'),
+    path('logout/', lazy_view(AUTH_VIEWS + 'LogoutView'), name='logout'),
+    path('password_change/', lazy_view(AUTH_VIEWS + 'PasswordChangeView'),
+         name='password_change'),
+    path('password_change/done/',
+         lazy_view(AUTH_VIEWS + 'PasswordChangeDoneView'),
+         name='password_change_done'),
+    path('password_reset/',
+         throttle('password_reset')(
+             lazy_view(AUTH_VIEWS + 'PasswordResetView')),
+         name='password_reset'),
+    path('password_reset/done/',
+         lazy_view(AUTH_VIEWS + 'PasswordResetDoneView'),
+         name='password_reset_done'),
+    path('reset/<uidb64>/<token>/',
+         lazy_view(AUTH_VIEWS + 'PasswordResetConfirmView'),
+         name='password_reset_confirm'),
+    path('reset/done/', lazy_view(AUTH_VIEWS + 'PasswordResetCompleteView'),
+         name='password_reset_complete'),
+]
@@ -0,0 +1,139 @@
+"""Резервные копии SQLite без остановки сайта.
+
+Копия снимается online backup API по BACKUP_PAGES_PER_STEP страниц за
+шаг с паузой BACKUP_STEP_PAUSE между шагами. База работает в режиме WAL
+(use_wal), и копия держит одну читающую транзакцию: все шаги видят один и
+тот же снимок, а писатели тем временем продолжают коммитить в WAL.
+Без WAL каждая чужая запись начинает копирование заново, поэтому
+число таких перезапусков ограничено BACKUP_MAX_RESTARTS.
+"""
+import gzip
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from urllib.parse import quote
+
+from django.conf import settings
+from django.db.utils import OperationalError
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class BackupError(Exception):
+    """Копия не снята или не прошла проверку."""
+
+
+def use_wal(sender, connection, **kwargs):
+    """Обработчик connection_created: читатели не мешают писателям."""
+    if connection.vendor != 'sqlite' or not settings.SQLITE_WAL:
+        return
+    try:
+        with connection.cursor() as cursor:
+            # режим хранится в файле базы, для памяти команда ничего не меняет
+            cursor.execute('PRAGMA journal_mode=WAL')
+    except OperationalError:
+        # переключиться можно только без чужих транзакций — в другой раз
+        pass
+
+
+def backup(source, target, pages=None, pause=None, progress=None):
+    """Копирует базу source в файл target; возвращает число перезапусков."""
+    pages = pages or settings.BACKUP_PAGES_PER_STEP
+    pause = settings.BACKUP_STEP_PAUSE if pause is None else pause
+    restarts = 0
+    last = None
+
+    def step(status, remaining, total):
+        nonlocal restarts, last
+        if last is not None and remaining > last:
+            restarts += 1
+            if restarts > settings.BACKUP_MAX_RESTARTS:
+                raise BackupError(
+                    f'База менялась во время копии {restarts} раз; '
+                    f'включите WAL (SQLITE_WAL)')
+        last = remaining
+        if progress:
+            progress(total - remaining, total)
+        time.sleep(pause)
+
+    # только чтение: копия не может испортить рабочую базу
+    reader = sqlite3.connect(f'file:{quote(source)}?mode=ro', uri=True,
+                             isolation_level=None)
+    writer = sqlite3.connect(target)
+    try:
+        wal = reader.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        if wal:
+            # снимок на всё время копии; в WAL он не блокирует записи
+            reader.execute('BEGIN')
+            reader.execute('SELECT COUNT(*) FROM sqlite_master').fetchone()
+        reader.backup(writer, pages=pages, progress=step)
+        if wal:
+            reader.execute('COMMIT')
+        # копия — один самостоятельный файл, без -wal рядом
+        writer.execute('PRAGMA journal_mode=DELETE')
+    finally:
+        writer.close()
+        reader.close()
+    return restarts
+
+
+def verify(path):
+    """PRAGMA integrity_check копии; ошибки — BackupError."""
+    connection = sqlite3.connect(f'file:{quote(path)}?mode=ro', uri=True)
+    try:
+        rows = [row[0] for row in
+                connection.execute('PRAGMA integrity_check')]
+    except sqlite3.DatabaseError as error:
+        rows = [str(error)]
+    finally:
+        connection.close()
+    if rows != ['ok']:
+        raise BackupError('Копия повреждена: ' + '; '.join(rows[:10]))
+
+
+def checksum(stream):
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def compress(path, target, level=6):
+    """Сжимает копию gzip и сверяет распакованное с исходным файлом."""
+    with open(path, 'rb') as source, gzip.open(target, 'wb', level) as out:
+        shutil.copyfileobj(source, out, CHUNK_SIZE)
+    with open(path, 'rb') as source:
+        expected = checksum(source)
+    with gzip.open(target, 'rb') as packed:
+        if checksum(packed) != expected:
+            raise BackupError(f'{target} не совпадает с копией')
+    return expected
+
+
+def snapshot(source, directory, name, compressed=True, check=True,
+             **kwargs):
+    """Копия базы в directory: name.sqlite3 или name.sqlite3.gz.
+
+    Файл появляется целиком и только после проверки; возвращает путь
+    и sha256 несжатой копии.
+    """
+    os.makedirs(directory, exist_ok=True)
+    target = os.path.join(directory, name + '.sqlite3')
+    with tempfile.TemporaryDirectory(dir=directory) as work:
+        copy = os.path.join(work, 'copy.sqlite3')
+        backup(source, copy, **kwargs)
+        if check:
+            verify(copy)
+        if compressed:
+            target += '.gz'
+            packed = os.path.join(work, 'copy.sqlite3.gz')
+            digest = compress(copy, packed)
+            os.replace(packed, target)
+        else:
+            with open(copy, 'rb') as stream:
+                digest = checksum(stream)
+            os.replace(copy, target)
+    return target, digest
@@ -0,0 +1,185 @@
+"""Кэш в два слоя: LRU в памяти процесса перед общими файлами."""
+import os
+import pickle
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+
+from . import metrics
+
+# как часто кэш без случайного вытеснения ищет просроченные файлы, с
+EXPIRED_CULL_INTERVAL = 60
+
+# каталог кэша -> (LRU, блокировка). CacheHandler создаёт экземпляр
+# бэкенда в каждом потоке, а память должна быть общей для процесса
+_memories = {}
+_memories_lock = threading.Lock()
+
+
+def _memory(location):
+    with _memories_lock:
+        if location not in _memories:
+            _memories[location] = (OrderedDict(), threading.Lock())
+        return _memories[location]
+
+
+class LayeredFileCache(FileBasedCache):
+    """FileBasedCache, который помнит прочитанные файлы в памяти.
+
+    Общий слой — файлы каталога кэша, их видят все воркеры. Локальная
+    копия действительна, пока файл тот же: при попадании делается только
+    stat() и сверяются inode, время изменения и размер. Любая запись
+    в любом процессе заменяет файл, поэтому устаревшая копия не будет
+    отдана ни разу, а чтение обходится без open, zlib и разбора файла.
+
+    Память общая для всех потоков и экземпляров с одним каталогом.
+
+    OPTIONS: L1_MAX_ENTRIES — сколько значений держать в памяти,
+    L1_MAX_VALUE_SIZE — значения крупнее (в байтах) в память не попадают,
+    CULL_EXPIRED_ONLY — сверх MAX_ENTRIES удалять только просроченные
+    файлы, а не случайную часть: для блокировок, лимитов и версий, потеря
+    которых меняет поведение сайта, а не только скорость.
+    """
+
+    def __init__(self, dir, params):
+        super().__init__(dir, params)
+        options = params.get('OPTIONS', {})
+        self._l1_max_entries = int(options.get('L1_MAX_ENTRIES', 1000))
+        self._l1_max_value_size = int(
+            options.get('L1_MAX_VALUE_SIZE', 512 * 1024))
+        self._l1, self._l1_lock = _memory(self._dir)
+        self._cull_expired_only = bool(options.get('CULL_EXPIRED_ONLY'))
+        self._last_cull = 0.0
+
+    @staticmethod
+    def _signature(stat):
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _l1_discard(self, fname):
+        with self._l1_lock:
+            self._l1.pop(fname, None)
+
+    def _l1_get(self, fname):
+        try:
+            signature = self._signature(os.stat(fname))
+        except FileNotFoundError:
+            self._l1_discard(fname)
+            return None
+        with self._l1_lock:
+            entry = self._l1.get(fname)
+            if entry is None or entry[0] != signature:
+                return None
+            if entry[1] is not None and entry[1] < time.time():
+                return None
+            self._l1.move_to_end(fname)
+            return entry[2]
+
+    def _l1_put(self, fname, signature, expiry, data):
+        if not self._l1_max_entries or len(data) > self._l1_max_value_size:
+            return
+        with self._l1_lock:
+            self._l1[fname] = (signature, expiry, data)
+            self._l1.move_to_end(fname)
+            while len(self._l1) > self._l1_max_entries:
+                self._l1.popitem(last=False)
+
+    def _read(self, fname):
+        """Читает файл; возвращает pickle значения или None."""
+        try:
+            with open(fname, 'rb') as f:
+                # подпись открытого файла, а не пути: его могли уже заменить
+                signature = self._signature(os.fstat(f.fileno()))
+                try:
+                    expiry = pickle.load(f)
+                except EOFError:
+                    expiry = 0
+                if expiry is not None and expiry < time.time():
+                    f.close()
+                    self._delete(fname)
+                    return None
+                data = zlib.decompress(f.read())
+        except FileNotFoundError:
+            return None
+        self._l1_put(fname, signature, expiry, data)
+        return data
+
+    def get(self, key, default=None, version=None):
+        fname = self._key_to_file(key, version)
+        # в памяти лежит pickle, а не объект: вызывающий код может
+        # менять полученное значение, не задевая других
+        data = self._l1_get(fname)
+        if data is None:
+            data = self._read(fname)
+        metrics.record_cache(data is not None)
+        if data is None:
+            return default
+        return pickle.loads(data)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        super().set(key, value, timeout, version)
+        # подпись нового файла не берём: его мог уже заменить другой
+        # процесс, значение попадёт в память при следующем чтении
+        self._l1_discard(self._key_to_file(key, version))
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        """Атомарный add: на нём держатся блокировки в кэше.
+
+        Штатный add — это has_key и set, между которыми другой процесс
+        успевает записать своё значение. Здесь файл появляется через
+        os.link, который не заменяет существующий: победитель один.
+        """
+        self._createdir()
+        fname = self._key_to_file(key, version)
+        self._cull()
+        fd, tmp_path = tempfile.mkstemp(dir=self._dir)
+        try:
+            with open(fd, 'wb') as f:
+                self._write_content(f, timeout, value)
+            for _ in range(2):
+                try:
+                    os.link(tmp_path, fname)
+                    return True
+                except FileExistsError:
+                    # has_key сам удаляет просроченный файл, тогда
+                    # пробуем ещё раз
+                    if self.has_key(key, version):
+                        return False
+            return False
+        finally:
+            os.remove(tmp_path)
+
+    def _cull(self):
+        if not self._cull_expired_only:
+            return super()._cull()
+        # полный проход читает каждый файл, поэтому не чаще интервала
+        if time.monotonic() - self._last_cull < EXPIRED_CULL_INTERVAL:
+            return
+        self._last_cull = time.monotonic()
+        filelist = self._list_cache_files()
+        if len(filelist) < self._max_entries:
+            return
+        for fname in filelist:
+            try:
+                with open(fname, 'rb') as f:
+                    # просроченный файл _is_expired удаляет сам
+                    self._is_expired(f)
+            except FileNotFoundError:
+                pass
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self._l1_discard(self._key_to_file(key, version))
+        return super().touch(key, timeout, version)
+
+    def _delete(self, fname):
+        self._l1_discard(fname)
+        super()._delete(fname)
+
+    def clear(self):
+        with self._l1_lock:
+            self._l1.clear()
+        super().clear()
@@ -0,0 +1,51 @@
+from django.urls.resolvers import RoutePattern, URLResolver
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
+
+
+def lazy_view(dotted_path, **initkwargs):
+    """Импортирует класс представления только при первом запросе к нему."""
+    view = None
+
+    def wrapper(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(dotted_path).as_view(**initkwargs)
+        return view(request, *args, **kwargs)
+
+    wrapper.lazy_view_path = dotted_path
+    return wrapper
+
+
+class LazyAdminURLs:
+    """Адреса админки, которые регистрируют модели при первом обращении.
+
+    Используется с SimpleAdminConfig: admin.py приложений импортируются
+    не при старте воркера, а когда кто-то впервые открывает /admin/.
+    """
+
+    @cached_property
+    def urlpatterns(self):
+        from django.contrib import admin
+
+        admin.autodiscover()
+        return admin.site.get_urls()
+
+
+class LazyURLResolver(URLResolver):
+    """Не читает вложенные адреса, пока к ним не обратились.
+
+    Обычный URLResolver при первом reverse() обходит все include, и
+    ленивые адреса админки загрузились бы уже на первой странице сайта.
+    reverse('admin:...') и запросы к /admin/ загружают их как обычно.
+    """
+
+    def _populate(self):
+        if 'url_patterns' in self.__dict__:
+            super()._populate()
+
+
+def lazy_admin_urls(route='admin/'):
+    return LazyURLResolver(RoutePattern(route, is_endpoint=False),
+                           LazyAdminURLs(), app_name='admin',
+                           namespace='admin')
@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from core import backup
+
+
+class Command(BaseCommand):
+    help = ('Резервная копия базы SQLite без остановки сайта '
+            '(online backup API)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default',
+                            help='алиас базы из DATABASES')
+        parser.add_argument('--output', default=None,
+                            help='каталог копий (по умолчанию BACKUP_DIR)')
+        parser.add_argument('--pages', type=int, default=None,
+                            help='страниц за шаг (BACKUP_PAGES_PER_STEP)')
+        parser.add_argument('--pause', type=float, default=None,
+                            help='пауза между шагами, с (BACKUP_STEP_PAUSE)')
+        parser.add_argument('--no-compress', action='store_true',
+                            help='не сжимать копию gzip')
+        parser.add_argument('--no-verify', action='store_true',
+                            help='не проверять копию integrity_check')
+
+    def progress(self, done, total):
+        if self.verbosity > 1:
+            self.stdout.write(f'{done}/{total}')
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        alias = options['database']
+        if alias not in connections.databases:
+            raise CommandError(f'Нет базы {alias}')
+        connection = connections[alias]
+        source = connection.settings_dict['NAME']
+        if connection.vendor != 'sqlite' or connection.is_in_memory_db():
+            raise CommandError(f'{alias} — не файл SQLite')
+        name = f'{alias}-{timezone.now():%Y%m%d-%H%M%S}'
+        try:
+            path, digest = backup.snapshot(
+                source, options['output'] or settings.BACKUP_DIR, name,
+                compressed=not options['no_compress'],
+                check=not options['no_verify'], pages=options['pages'],
+                pause=options['pause'], progress=self.progress)
+        except backup.BackupError as error:
+            raise CommandError(str(error))
+        self.stdout.write(self.style.SUCCESS(f'{path} sha256 {digest}'))
@@ -0,0 +1,85 @@
+import multiprocessing
+import tempfile
+import time
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.management.base import BaseCommand
+
+from core.cache_backends import LayeredFileCache
+
+BACKENDS = (
+    ('файлы', FileBasedCache),
+    ('память + файлы', LayeredFileCache),
+)
+
+
+def _reader(backend, location, rounds, results):
+    cache = backend(location, {})
+    seen, stale = 0, 0
+    while seen < rounds:
+        value = cache.get('counter', 0)
+        if value < seen:
+            stale += 1
+        seen = max(seen, value)
+    # писатель закончил: сразу после этого значение обязано быть последним
+    results.put((stale, cache.get('counter') == rounds))
+
+
+class Command(BaseCommand):
+    help = ('Задержка попадания и согласованность между процессами '
+            'для файлового и двухслойного кэша')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5000,
+                            help='сколько чтений в замере задержки')
+        parser.add_argument('--readers', type=int, default=4,
+                            help='процессов-читателей в проверке')
+        parser.add_argument('--rounds', type=int, default=500,
+                            help='сколько раз писатель меняет значение')
+
+    def latency(self, backend, repeat):
+        with tempfile.TemporaryDirectory() as location:
+            cache = backend(location, {})
+            values = {'token': 'a' * 32, 'page': b'x' * 20000}
+            cache.set_many(values, None)
+            result = {}
+            for key in values:
+                cache.get(key)
+                started = time.perf_counter()
+                for _ in range(repeat):
+                    cache.get(key)
+                result[key] = (time.perf_counter() - started) / repeat
+            return result
+
+    def consistency(self, backend, readers, rounds):
+        context = multiprocessing.get_context('fork')
+        with tempfile.TemporaryDirectory() as location:
+            cache = backend(location, {})
+            cache.set('counter', 0, None)
+            results = context.Queue()
+            processes = [
+                context.Process(target=_reader,
+                                args=(backend, location, rounds, results))
+                for _ in range(readers)
+            ]
+            for process in processes:
+                process.start()
+            for value in range(1, rounds + 1):
+                cache.set('counter', value, None)
+            outcomes = [results.get() for _ in processes]
+            for process in processes:
+                process.join()
+        stale = sum(stale for stale, _ in outcomes)
+        fresh = sum(fresh for _, fresh in outcomes)
+        return stale, fresh
+
+    def handle(self, *args, **options):
+        for name, backend in BACKENDS:
+            latency = self.latency(backend, options['repeat'])
+            stale, fresh = self.consistency(
+                backend, options['readers'], options['rounds'])
+            self.stdout.write(
+                f"{name:>15}: попадание {latency['token'] * 1e6:.1f} мкс "
+                f"(токен), {latency['page'] * 1e6:.1f} мкс (страница 20 КБ); "
+                f"откатов назад {stale}, последнее значение видят "
+                f"{fresh} из {options['readers']} читателей")
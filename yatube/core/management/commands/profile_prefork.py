@@ -0,0 +1,40 @@
+import statistics
+
+from django.core.management.base import BaseCommand
+
+from core import prefork
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает память воркеров и первый запрос '
+            'с прогревом до fork и без него')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4,
+                            help='сколько воркеров форкнуть')
+        parser.add_argument('--path', default='/',
+                            help='адрес первого запроса')
+
+    def handle(self, *args, **options):
+        for preload, name in ((False, 'без прогрева'), (True, 'с прогревом')):
+            report = prefork.measure(preload, options['workers'],
+                                     options['path'])
+            workers = report['workers']
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            if report['warm_up']:
+                self.stdout.write(
+                    'Прогрето: адресов {urls}, шаблонов {templates}, '
+                    'моделей {models}'.format(**report['warm_up']))
+            self.stdout.write(f"Мастер: RSS {report['parent']['rss']} кБ")
+            for number, worker in enumerate(workers, 1):
+                before, after = worker['memory_before'], worker['memory_after']
+                self.stdout.write(
+                    f"Воркер {number}: первый запрос "
+                    f"{worker['latency'] * 1000:.1f} мс "
+                    f"(HTTP {worker['status']}), "
+                    f"RSS {after['rss']} кБ, "
+                    f"своя память {before.get('private', 0)} → "
+                    f"{after.get('private', 0)} кБ")
+            self.stdout.write(
+                'Медиана первого запроса: {:.1f} мс'.format(
+                    statistics.median(w['latency'] for w in workers) * 1000))
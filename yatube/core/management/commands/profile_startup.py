@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+
+from core import startup
+
+
+class Command(BaseCommand):
+    help = 'Показывает, на что уходит время холодного старта воркера'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lazy', action='store_true',
+                            help='замерить режим YATUBE_LAZY_BOOT=1')
+        parser.add_argument('--top', type=int, default=15,
+                            help='сколько пакетов показать')
+        parser.add_argument('--depth', type=int, default=3,
+                            help='глубина группировки модулей по пакетам')
+        parser.add_argument('--compare', type=int, metavar='REPEAT',
+                            help='сравнить оба режима по REPEAT запускам')
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            return self.compare(options['compare'])
+        report = startup.measure(options['lazy'])
+        self.stdout.write(
+            f"Старт WSGI: {report['wsgi'] * 1000:.1f} мс, "
+            f"URLconf: {report['urlconf'] * 1000:.1f} мс, "
+            f"импорты: {report['import_us'] / 1000:.1f} мс "
+            f"({len(report['loaded'])} модулей)"
+        )
+        self.stdout.write('\nИмпорт по пакетам, мс:')
+        packages = startup.group_by_package(report['modules'],
+                                            options['depth'])
+        for package, self_us in packages.most_common(options['top']):
+            self.stdout.write(f'{self_us / 1000:8.1f}  {package}')
+        self.stdout.write('\nПриложения (models / ready), мс:')
+        for label, timings in report['apps'].items():
+            self.stdout.write(
+                f"{timings.get('models', 0) * 1000:8.1f} "
+                f"{timings.get('ready', 0) * 1000:8.1f}  {label}")
+
+    def compare(self, repeat):
+        results = startup.benchmark(repeat)
+        default, lazy = results[False], results[True]
+        for name, result in (('обычный', default), ('ускоренный', lazy)):
+            self.stdout.write(
+                f"{name:>10}: {result['total'] * 1000:.1f} мс, "
+                f"{result['modules']:.0f} модулей")
+        saved = 1 - lazy['total'] / default['total']
+        self.stdout.write(self.style.SUCCESS(
+            f'Старт быстрее на {saved:.0%}'))
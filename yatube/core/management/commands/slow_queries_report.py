@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import slow_queries
+
+
+class Command(BaseCommand):
+    help = 'Самые затратные медленные запросы из журнала, по отпечаткам SQL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=None,
+                            help='журнал (по умолчанию SLOW_QUERY_LOG)')
+        parser.add_argument('--top', type=int, default=10,
+                            help='сколько запросов показать')
+
+    def handle(self, *args, **options):
+        path = options['log'] or settings.SLOW_QUERY_LOG
+        try:
+            groups = slow_queries.aggregate(slow_queries.read_log(path))
+        except FileNotFoundError:
+            raise CommandError(f'Журнал {path} не найден')
+        for sql, group in groups[:options['top']]:
+            views = ', '.join(f'{view} ({count})' for view, count
+                              in group['views'].most_common(3))
+            self.stdout.write(
+                f"\n{group['total_ms']:.1f} мс всего, {group['count']} раз, "
+                f"среднее {group['total_ms'] / group['count']:.1f} мс, "
+                f"максимум {group['max_ms']:.1f} мс; {views}\n  {sql}")
+            for step in group['plan'] or ():
+                self.stdout.write(f'    {step}')
@@ -0,0 +1,277 @@
+"""Метрики запросов в текстовом формате Prometheus.
+
+Каждый поток копит счётчики в своём словаре, поэтому запись обходится
+без блокировок. Раз в METRICS_FLUSH_INTERVAL секунд процесс складывает
+словари своих потоков и целиком записывает сумму в свой файл в
+METRICS_DIR. /metrics суммирует файлы всех воркеров, так что счётчики
+общие для всего сервера, а внешние сервисы не нужны. Файлы завершённых
+воркеров при этом удаляются. Страница открыта адресам из INTERNAL_IPS
+и запросам с METRICS_TOKEN.
+"""
+import hmac
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+FAMILIES = {
+    'yatube_requests_total': (
+        'counter', 'Запросы по маршруту, методу и статусу'),
+    'yatube_request_duration_seconds': (
+        'histogram', 'Время ответа по маршруту'),
+    'yatube_db_queries_total': (
+        'counter', 'Запросы к базе по маршруту'),
+    'yatube_db_duration_seconds_total': (
+        'counter', 'Время в базе по маршруту'),
+    'yatube_cache_requests_total': (
+        'counter', 'Чтения из кэша по маршруту: hit или miss'),
+}
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# метод — метка, поэтому произвольные методы от клиентов сводятся в один
+METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+_local = threading.local()
+_buffers = []
+_buffers_lock = threading.Lock()
+_last_flush = 0.0
+
+
+def _new_process_id():
+    # pid может достаться новому воркеру, а счётчики старого должны остаться
+    return f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+
+
+_process_id = _new_process_id()
+
+
+def _after_fork():
+    """Воркер после fork начинает свои счётчики и свой файл."""
+    global _process_id, _last_flush
+    _process_id = _new_process_id()
+    _last_flush = 0.0
+    _buffers.clear()
+    _local.__dict__.clear()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+def _buffer():
+    buffer = getattr(_local, 'buffer', None)
+    if buffer is None:
+        buffer = _local.buffer = {}
+        with _buffers_lock:
+            _buffers.append(buffer)
+    return buffer
+
+
+def _add(buffer, name, labels, value):
+    key = (name, labels)
+    buffer[key] = buffer.get(key, 0) + value
+
+
+def record_query(execute, sql, params, many, context):
+    """execute_wrapper: время в базе для текущего запроса."""
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        _local.db_time = (getattr(_local, 'db_time', 0.0)
+                          + time.perf_counter() - started)
+        _local.db_queries = getattr(_local, 'db_queries', 0) + 1
+
+
+def install(sender, connection, **kwargs):
+    """Обработчик connection_created, как у core.slow_queries."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+def record_cache(hit):
+    """Вызывается кэшем на каждое чтение."""
+    if hit:
+        _local.cache_hits = getattr(_local, 'cache_hits', 0) + 1
+    else:
+        _local.cache_misses = getattr(_local, 'cache_misses', 0) + 1
+
+
+def _reset():
+    _local.db_time = 0.0
+    _local.db_queries = 0
+    _local.cache_hits = 0
+    _local.cache_misses = 0
+
+
+def record_request(view, method, status, duration):
+    buffer = _buffer()
+    route = (('view', view),)
+    method = method if method in METHODS else 'other'
+    _add(buffer, 'yatube_requests_total',
+         route + (('method', method), ('status', str(status))), 1)
+    for bound in BUCKETS:
+        if duration <= bound:
+            _add(buffer, 'yatube_request_duration_seconds_bucket',
+                 route + (('le', str(bound)),), 1)
+    _add(buffer, 'yatube_request_duration_seconds_bucket',
+         route + (('le', '+Inf'),), 1)
+    _add(buffer, 'yatube_request_duration_seconds_sum', route, duration)
+    _add(buffer, 'yatube_request_duration_seconds_count', route, 1)
+    _add(buffer, 'yatube_db_queries_total', route, _local.db_queries)
+    _add(buffer, 'yatube_db_duration_seconds_total', route, _local.db_time)
+    _add(buffer, 'yatube_cache_requests_total',
+         route + (('result', 'hit'),), _local.cache_hits)
+    _add(buffer, 'yatube_cache_requests_total',
+         route + (('result', 'miss'),), _local.cache_misses)
+
+
+def snapshot():
+    """Сумма счётчиков всех потоков процесса."""
+    totals = defaultdict(float)
+    with _buffers_lock:
+        buffers = list(_buffers)
+    for buffer in buffers:
+        # dict() копирует словарь целиком под GIL, даже если поток
+        # в это время дописывает в него
+        for key, value in dict(buffer).items():
+            totals[key] += value
+    return totals
+
+
+def flush():
+    """Записывает счётчики процесса в его файл (заменой файла целиком)."""
+    global _last_flush
+    _last_flush = time.monotonic()
+    directory = settings.METRICS_DIR
+    os.makedirs(directory, exist_ok=True)
+    rows = [[name, labels, value]
+            for (name, labels), value in snapshot().items()]
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with open(fd, 'w') as tmp:
+        json.dump(rows, tmp)
+    os.replace(tmp_path, os.path.join(directory, f'{_process_id}.json'))
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # процесс есть, но принадлежит другому пользователю
+        return True
+    return True
+
+
+def collect():
+    """Счётчики живых процессов, сложенные вместе."""
+    totals = defaultdict(float)
+    directory = settings.METRICS_DIR
+    for name in os.listdir(directory):
+        if not name.endswith('.json'):
+            continue
+        pid = name.split('-', 1)[0]
+        if pid.isdigit() and not _alive(int(pid)):
+            # воркер завершился; без этого файлы копились бы с каждым
+            # перезапуском
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+            continue
+        try:
+            with open(os.path.join(directory, name)) as source:
+                rows = json.load(source)
+        except (OSError, ValueError):
+            continue
+        for metric, labels, value in rows:
+            totals[metric, tuple(tuple(pair) for pair in labels)] += value
+    return totals
+
+
+def _escape(value):
+    return (value.replace('\\', r'\\').replace('"', r'\"')
+            .replace('\n', r'\n'))
+
+
+def _family(name):
+    for suffix in ('_bucket', '_sum', '_count'):
+        base = name[:-len(suffix)]
+        if name.endswith(suffix) and base in FAMILIES:
+            return base
+    return name
+
+
+def _number(value):
+    # счётчики хранятся во float, но целые лучше отдавать без экспоненты
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+def _sort_key(item):
+    (name, labels), _ = item
+    # корзины гистограммы — по возрастанию границы, а не как строки
+    return name, [(key, float(value) if key == 'le' else value)
+                  for key, value in labels]
+
+
+def exposition(totals):
+    """Текстовый формат Prometheus 0.0.4."""
+    families = defaultdict(list)
+    for (name, labels), value in sorted(totals.items(), key=_sort_key):
+        families[_family(name)].append((name, labels, value))
+    lines = []
+    for family, samples in sorted(families.items()):
+        kind, description = FAMILIES.get(family, ('untyped', family))
+        lines.append(f'# HELP {family} {description}')
+        lines.append(f'# TYPE {family} {kind}')
+        for name, labels, value in samples:
+            label_text = ','.join(f'{key}="{_escape(label)}"'
+                                  for key, label in labels)
+            lines.append(f'{name}{{{label_text}}} {_number(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsMiddleware:
+    """Замеряет каждый запрос и раз в интервал сбрасывает счётчики."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _reset()
+        started = time.perf_counter()
+        response = self.get_response(request)
+        match = request.resolver_match
+        record_request(match.view_name if match else 'unmatched',
+                       request.method, response.status_code,
+                       time.perf_counter() - started)
+        if time.monotonic() - _last_flush >= settings.METRICS_FLUSH_INTERVAL:
+            flush()
+        return response
+
+
+def allowed(request):
+    if request.META.get('REMOTE_ADDR') in settings.INTERNAL_IPS:
+        return True
+    token = settings.METRICS_TOKEN
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return bool(token) and hmac.compare_digest(header.encode(),
+                                               f'Bearer {token}'.encode())
+
+
+def metrics(request):
+    if not allowed(request):
+        # страница не должна выдавать себя посторонним
+        raise Http404
+    flush()
+    return HttpResponse(exposition(collect()), content_type=CONTENT_TYPE)
@@ -0,0 +1,174 @@
+"""Поиск N+1: повторяющихся запросов одной формы из одного места.
+
+Детектор подключается к соединениям через execute_wrapper и для каждого
+SELECT запоминает отпечаток SQL (параметры отброшены, списки IN свёрнуты)
+и место, откуда пришёл запрос: строку шаблона, если запрос случился при
+рендеринге, и ближайшую строку кода проекта. NPLUSONE_THRESHOLD
+одинаковых пар «отпечаток, место» за запрос или тест — это N+1.
+
+NPLUSONE_MODE: 'off', 'warn' — писать в лог, 'raise' — падать.
+Проверяются запросы (NPlusOneMiddleware) и тесты manage.py test
+(core.runner.NPlusOneTestRunner); под pytest — запросы через middleware:
+
+    YATUBE_NPLUSONE=raise python -m pytest
+"""
+import logging
+import os
+import re
+import sys
+import threading
+from collections import Counter, namedtuple
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+IN_LIST_RE = re.compile(r'\((?:%s, )+%s\)')
+LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+Finding = namedtuple('Finding', 'sql template code count')
+
+_local = threading.local()
+
+
+class NPlusOneError(Exception):
+    """Найдены повторяющиеся запросы одной формы."""
+
+
+def fingerprint(sql):
+    """SQL без значений: запросы к разным объектам дают один отпечаток."""
+    return LITERAL_RE.sub('?', IN_LIST_RE.sub('(...)', sql))
+
+
+def _template_line(frame):
+    node = frame.f_locals.get('self')
+    token = getattr(node, 'token', None)
+    origin = getattr(node, 'origin', None)
+    if token is None or origin is None:
+        return None
+    return f'{origin.template_name or origin.name}:{token.lineno}'
+
+
+def origin(frame):
+    """Строка шаблона и строка кода проекта, откуда пришёл запрос."""
+    template = code = None
+    root = settings.BASE_DIR + os.sep
+    while frame is not None and (template is None or code is None):
+        filename = frame.f_code.co_filename
+        if template is None and frame.f_code.co_name == 'render_annotated':
+            template = _template_line(frame)
+        if (code is None and filename.startswith(root)
+                and filename != __file__):
+            code = (f'{os.path.relpath(filename, settings.BASE_DIR)}'
+                    f':{frame.f_lineno}')
+        frame = frame.f_back
+    return template, code
+
+
+class Detector:
+    """Считает SELECT по отпечатку и месту внутри блока with.
+
+    requests_only — считать только запросы внутри HTTP-запросов и
+    рендеринга шаблонов: сам код тестов часто намеренно повторяет
+    одно и то же (создаёт посты в цикле, проверяет счётчики).
+    """
+
+    def __init__(self, threshold=None, requests_only=False):
+        self.threshold = threshold or settings.NPLUSONE_THRESHOLD
+        self.requests_only = requests_only
+        self.counts = Counter()
+        # запросы из разных HTTP-запросов одного теста не сравниваются
+        self.segment = 0
+        self.in_request = False
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        # вложенный детектор забирает запросы себе
+        if (sql.lstrip()[:6].upper() == 'SELECT'
+                and not getattr(_local, 'expected', 0)
+                and current() is self):
+            template, code = origin(sys._getframe(1))
+            if (template is not None or self.in_request
+                    or not self.requests_only):
+                self.counts[
+                    self.segment, fingerprint(sql), template, code] += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        _local.__dict__.setdefault('detectors', []).append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._stack is not None:
+            self._stack.close()
+            self._stack = None
+            _local.detectors.remove(self)
+
+    def findings(self):
+        return [Finding(sql, template, code, count)
+                for (_, sql, template, code), count in self.counts.items()
+                if count >= self.threshold]
+
+    def report(self, title):
+        lines = [title]
+        for finding in self.findings():
+            place = finding.template or finding.code or 'неизвестно'
+            if finding.template and finding.code:
+                place += f' ({finding.code})'
+            lines.append(f'  {finding.count} раз из {place}: {finding.sql}')
+        return '\n'.join(lines)
+
+    def check(self, title, mode=None):
+        """Сообщает о найденном так, как велит NPLUSONE_MODE."""
+        mode = mode or settings.NPLUSONE_MODE
+        if mode == 'off' or not self.findings():
+            return
+        report = self.report(title)
+        if mode == 'raise':
+            raise NPlusOneError(report)
+        logger.warning(report)
+
+
+@contextmanager
+def expected_repeats():
+    """Запросы внутри блока повторяются намеренно (например, пачками)."""
+    _local.expected = getattr(_local, 'expected', 0) + 1
+    try:
+        yield
+    finally:
+        _local.expected -= 1
+
+
+def current():
+    """Детектор, который уже считает запросы (например, всего теста)."""
+    detectors = getattr(_local, 'detectors', None)
+    return detectors[-1] if detectors else None
+
+
+class NPlusOneMiddleware:
+    """Проверяет запросы к базе каждого HTTP-запроса."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if settings.NPLUSONE_MODE == 'off':
+            return self.get_response(request)
+        outer = current()
+        if outer is not None:
+            outer.segment += 1
+            outer.in_request = True
+            try:
+                return self.get_response(request)
+            finally:
+                outer.in_request = False
+                outer.segment += 1
+        with Detector() as detector:
+            response = self.get_response(request)
+        detector.check(f'N+1 в {request.method} {request.path}')
+        return response
@@ -0,0 +1,187 @@
+"""Панели django-debug-toolbar: стоимость count() пагинатора, кэш по
+семействам ключей и N+1 на текущей странице.
+
+Обёртки ставятся один раз и пишут в панель, активную в этом потоке,
+а без панели просто вызывают исходный код: runserver многопоточный,
+и снимать обёртки посреди чужого запроса нельзя.
+"""
+import re
+import threading
+import time
+from collections import defaultdict
+
+from debug_toolbar.panels import Panel
+from django.core.cache import caches
+from django.core.paginator import Paginator
+from django.db import connection
+
+from .nplusone import Detector
+
+# части ключа, которые различают объекты, а не семейства
+KEY_ID_RE = re.compile(r'^(\d+|[0-9a-f]{16,})$')
+
+_local = threading.local()
+_install_lock = threading.Lock()
+
+
+def active(panel_class):
+    """Панель panel_class текущего запроса в этом потоке или None."""
+    return getattr(_local, panel_class.__name__, None)
+
+
+class YatubePanel(Panel):
+    """Панель, которая получает данные от обёрток из active()."""
+
+    def install(self):
+        """Ставит обёртки; должна быть идемпотентной."""
+
+    def enable_instrumentation(self):
+        with _install_lock:
+            self.install()
+        setattr(_local, self.panel_id, self)
+
+    def disable_instrumentation(self):
+        setattr(_local, self.panel_id, None)
+
+
+def _subclasses(cls):
+    yield cls
+    for subclass in cls.__subclasses__():
+        yield from _subclasses(subclass)
+
+
+def _timed_count(func):
+    def count(paginator):
+        panel = active(PaginatorPanel)
+        if panel is None:
+            return func(paginator)
+        queries = []
+
+        def remember(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(remember):
+            value = func(paginator)
+        panel.record(paginator, value, time.perf_counter() - started,
+                     queries)
+        return value
+
+    count.original = func
+    return count
+
+
+class PaginatorPanel(YatubePanel):
+    """Сколько стоил count() каждого пагинатора на странице."""
+    title = 'Пагинаторы'
+    template = 'core/panels/paginator.html'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.counts = []
+
+    def install(self):
+        # подклассы могут появиться позже (ленивая админка), поэтому
+        # обходим их при каждом включении
+        for cls in _subclasses(Paginator):
+            prop = cls.__dict__.get('count')
+            func = getattr(prop, 'func', None)
+            if func is not None and not hasattr(func, 'original'):
+                prop.func = _timed_count(func)
+
+    def record(self, paginator, value, duration, queries):
+        source = paginator.object_list
+        model = getattr(source, 'model', None)
+        self.counts.append({
+            'paginator': type(paginator).__name__,
+            'source': model._meta.label if model else type(source).__name__,
+            'count': value,
+            'time': duration * 1000,
+            'queries': queries,
+        })
+
+    @property
+    def nav_subtitle(self):
+        total = sum(count['time'] for count in self.counts)
+        return f'count(): {len(self.counts)}, {total:.1f} мс'
+
+    def generate_stats(self, request, response):
+        self.record_stats({'counts': self.counts})
+
+
+def family(key):
+    """'post:card:12:<md5>' -> 'post:card'."""
+    parts = []
+    for part in str(key).split(':'):
+        if KEY_ID_RE.match(part):
+            break
+        parts.append(part)
+    return ':'.join(parts) or str(key)
+
+
+def _counted_get(get):
+    missing = object()
+
+    def counted(cache, key, default=None, version=None):
+        panel = active(CacheFamilyPanel)
+        if panel is None:
+            return get(cache, key, default, version)
+        started = time.perf_counter()
+        value = get(cache, key, missing, version)
+        panel.record(key, value is not missing, time.perf_counter() - started)
+        return default if value is missing else value
+
+    counted.original = get
+    return counted
+
+
+class CacheFamilyPanel(YatubePanel):
+    """Попадания и промахи кэша по семействам ключей."""
+    title = 'Кэш по семействам'
+    template = 'core/panels/cache_families.html'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.families = defaultdict(
+            lambda: {'hits': 0, 'misses': 0, 'time': 0.0})
+
+    def install(self):
+        backend = type(caches['default'])
+        if not hasattr(backend.get, 'original'):
+            backend.get = _counted_get(backend.get)
+
+    def record(self, key, hit, duration):
+        stats = self.families[family(key)]
+        stats['hits' if hit else 'misses'] += 1
+        stats['time'] += duration * 1000
+
+    @property
+    def nav_subtitle(self):
+        hits = sum(stats['hits'] for stats in self.families.values())
+        misses = sum(stats['misses'] for stats in self.families.values())
+        return f'попаданий {hits}, промахов {misses}'
+
+    def generate_stats(self, request, response):
+        self.record_stats({'families': sorted(
+            (name, stats) for name, stats in self.families.items())})
+
+
+class NPlusOnePanel(Panel):
+    """Группы повторяющихся запросов этой страницы (core.nplusone)."""
+    title = 'N+1'
+    template = 'core/panels/nplusone.html'
+
+    def process_request(self, request):
+        with Detector() as self.detector:
+            return super().process_request(request)
+
+    @property
+    def nav_subtitle(self):
+        return f"групп: {len(self.get_stats().get('findings', ()))}"
+
+    def generate_stats(self, request, response):
+        self.record_stats({
+            'findings': self.detector.findings(),
+            'threshold': self.detector.threshold,
+        })
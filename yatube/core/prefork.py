@@ -0,0 +1,191 @@
+"""Прогрев процесса до fork, чтобы воркеры делили его память copy-on-write."""
+import gc
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.template import engines
+from django.template.loaders.cached import Loader as CachedLoader
+from django.urls import URLPattern, get_resolver
+from django.utils import translation
+
+
+def warm_urls(resolver=None):
+    """Компилирует регулярные выражения и строит reverse для всех адресов."""
+    resolver = resolver or get_resolver()
+    count = 0
+    for pattern in resolver.url_patterns:
+        pattern.pattern.regex
+        if isinstance(pattern, URLPattern):
+            pattern.lookup_str
+            count += 1
+        else:
+            count += warm_urls(pattern)
+    resolver.reverse_dict
+    resolver.namespace_dict
+    resolver.app_dict
+    return count
+
+
+def _template_names(loader):
+    for directory in loader.get_dirs():
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if name.endswith('.html'):
+                    path = os.path.join(root, name)
+                    yield os.path.relpath(path, directory)
+
+
+def warm_templates():
+    """Компилирует все шаблоны в кэш загрузчика.
+
+    Имеет смысл только с кэширующим загрузчиком (DEBUG = False):
+    без него скомпилированные шаблоны не сохраняются.
+    """
+    count = 0
+    for engine in engines.all():
+        django_engine = getattr(engine, 'engine', None)
+        if django_engine is None:
+            continue
+        for loader in django_engine.template_loaders:
+            if not isinstance(loader, CachedLoader):
+                continue
+            for inner in loader.loaders:
+                for name in _template_names(inner):
+                    engine.get_template(name.replace(os.sep, '/'))
+                    count += 1
+    return count
+
+
+def warm_models():
+    """Заполняет кэши _meta: поля, связи, обратные связи."""
+    models = apps.get_models(include_auto_created=True)
+    for model in models:
+        opts = model._meta
+        opts.get_fields()
+        opts.concrete_fields
+        opts.related_objects
+        opts.fields_map
+    return len(models)
+
+
+def warm_up():
+    """Всё, что воркеры иначе делали бы на первых запросах."""
+    translation.activate(settings.LANGUAGE_CODE)
+    report = {
+        'urls': warm_urls(),
+        'templates': warm_templates(),
+        'models': warm_models(),
+    }
+    translation.deactivate()
+    # соединения с базой не должны переживать fork
+    connections.close_all()
+    # объекты прогрева больше не меняются: убираем их из-под сборщика,
+    # чтобы он не трогал страницы памяти и не ломал copy-on-write
+    gc.collect()
+    if hasattr(gc, 'freeze'):
+        gc.freeze()
+    return report
+
+
+def memory():
+    """Память процесса в кБ: RSS, PSS и приватная часть."""
+    values = {}
+    try:
+        with open('/proc/self/smaps_rollup') as smaps:
+            for line in smaps:
+                key, _, value = line.partition(':')
+                if value.strip().endswith('kB'):
+                    values[key] = int(value.split()[0])
+    except OSError:
+        import resource
+        return {'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+    return {
+        'rss': values.get('Rss', 0),
+        'pss': values.get('Pss', 0),
+        'private': values.get('Private_Clean', 0)
+        + values.get('Private_Dirty', 0),
+    }
+
+
+def first_request(application, path='/'):
+    """Время ответа на GET path, пройденный через WSGI целиком."""
+    host = (settings.ALLOWED_HOSTS or ['localhost'])[0].lstrip('.')
+    if host == '*':
+        host = 'localhost'
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'SCRIPT_NAME': '',
+        'QUERY_STRING': '',
+        'SERVER_NAME': host,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http',
+    }
+    status = []
+    started = time.perf_counter()
+    b''.join(application(
+        environ, lambda code, headers, exc_info=None: status.append(code)))
+    return time.perf_counter() - started, status[0]
+
+
+def fork_workers(application, workers, path='/'):
+    """Форкает воркеров и замеряет у каждого первый запрос и память."""
+    pipes = []
+    for _ in range(workers):
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            before = memory()
+            latency, status = first_request(application, path)
+            result = {'latency': latency, 'status': status,
+                      'memory_before': before, 'memory_after': memory()}
+            with os.fdopen(write_fd, 'w') as out:
+                json.dump(result, out)
+            os._exit(0)
+        os.close(write_fd)
+        pipes.append((pid, read_fd))
+    results = []
+    for pid, read_fd in pipes:
+        with os.fdopen(read_fd) as source:
+            results.append(json.load(source))
+        os.waitpid(pid, 0)
+    return results
+
+
+# мастер запускается отдельным процессом, чтобы сравнивать с чистого листа
+CHILD_CODE = '''
+import json, sys
+if sys.argv[1] == '1':
+    from yatube.preload import application, report
+else:
+    from yatube.wsgi import application
+    report = None
+from core import prefork
+parent = prefork.memory()
+workers = prefork.fork_workers(application, int(sys.argv[2]), sys.argv[3])
+print(json.dumps({'warm_up': report, 'parent': parent, 'workers': workers}))
+'''
+
+
+def measure(preload, workers, path='/'):
+    """Запускает мастер-процесс с прогревом или без и собирает замеры."""
+    env = dict(os.environ)
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    result = subprocess.run(
+        [sys.executable, '-c', CHILD_CODE, '1' if preload else '0',
+         str(workers), path],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
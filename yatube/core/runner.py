@@ -0,0 +1,96 @@
+"""Тестовый раннер: проверка каждого теста на N+1 и временные каталоги."""
+import os
+import tempfile
+import unittest
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from .nplusone import Detector
+
+
+@contextmanager
+def run_on_commit_callbacks(using=DEFAULT_DB_ALIAS):
+    """Выполняет on_commit, отложенные в блоке, как после коммита.
+
+    В TestCase транзакция теста не коммитится, и Django 2.2 такие
+    обработчики просто отбрасывает (captureOnCommitCallbacks появился
+    только в 3.2). Обработчики, добавленные обработчиками, тоже
+    выполняются.
+    """
+    connection = connections[using]
+    start = len(connection.run_on_commit)
+    yield
+    while len(connection.run_on_commit) > start:
+        callbacks = connection.run_on_commit[start:]
+        del connection.run_on_commit[start:]
+        for _, callback in callbacks:
+            callback()
+
+
+class NPlusOneResultMixin:
+    """Оборачивает каждый тест в детектор; проверка идёт после tearDown.
+
+    Запросы к базе считаются внутри HTTP-запросов теста и рендеринга
+    шаблонов, каждый HTTP-запрос отдельно.
+    """
+
+    def startTest(self, test):
+        super().startTest(test)
+        if settings.NPLUSONE_MODE == 'off':
+            return
+        detector = Detector(requests_only=True).__enter__()
+        test._nplusone_detector = detector
+
+        def check():
+            detector.__exit__()
+            detector.check(f'N+1 в {test.id()}')
+
+        test.addCleanup(check)
+
+    def stopTest(self, test):
+        detector = getattr(test, '_nplusone_detector', None)
+        if detector is not None:
+            detector.__exit__()
+            del test._nplusone_detector
+        super().stopTest(test)
+
+
+class NPlusOneTestRunner(DiscoverRunner):
+    """DiscoverRunner, у которого N+1 в тесте — ошибка этого теста.
+
+    Файловый кэш и метрики тесты держат во временном каталоге:
+    cache.clear() в тестах не должен стирать кэш проекта, а счётчики
+    тестов — попадать в метрики сервера.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._scratch = tempfile.TemporaryDirectory()
+        self._scratch_settings = override_settings(**self.scratch_settings(
+            self._scratch.name))
+        self._scratch_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._scratch_settings.disable()
+        self._scratch.cleanup()
+        super().teardown_test_environment(**kwargs)
+
+    @staticmethod
+    def scratch_settings(directory):
+        """Настройки, которые в тестах указывают во временный каталог."""
+        return {
+            'CACHES': {
+                alias: dict(config, LOCATION=os.path.join(
+                    directory, 'cache', alias))
+                for alias, config in settings.CACHES.items()
+            },
+            'METRICS_DIR': os.path.join(directory, 'metrics'),
+        }
+
+    def get_resultclass(self):
+        base = super().get_resultclass() or unittest.TextTestResult
+        return type('NPlusOneTestResult', (NPlusOneResultMixin, base), {})
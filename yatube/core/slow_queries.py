@@ -0,0 +1,130 @@
+"""Журнал медленных запросов с планом, который выбрала база.
+
+Обёртка ставится на каждое соединение при его открытии и замеряет все
+запросы. Запрос дольше SLOW_QUERY_THRESHOLD секунд с вероятностью
+SLOW_QUERY_SAMPLE_RATE попадает в SLOW_QUERY_LOG: строка JSON с
+представлением, параметрами и EXPLAIN QUERY PLAN того же запроса.
+Сводку по журналу строит команда slow_queries_report.
+"""
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.utils import timezone
+
+from .nplusone import fingerprint
+
+MAX_PARAM_LENGTH = 200
+
+_local = threading.local()
+
+
+def _short(value):
+    if isinstance(value, (bytes, str)) and len(value) > MAX_PARAM_LENGTH:
+        return value[:MAX_PARAM_LENGTH] + '…'
+    return value
+
+
+def _params(params):
+    if isinstance(params, dict):
+        return {key: _short(value) for key, value in params.items()}
+    return [_short(value) for value in params or ()]
+
+
+def explain(connection, sql, params):
+    """План запроса; курсор без обёрток, чтобы не замерять сам EXPLAIN."""
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else (
+        'EXPLAIN ')
+    cursor = connection.create_cursor()
+    try:
+        cursor.execute(prefix + sql, params)
+        return [str(row[-1]) for row in cursor.fetchall()]
+    except Exception as error:
+        return [f'EXPLAIN не удался: {error}']
+    finally:
+        cursor.close()
+
+
+def write(entry):
+    path = settings.SLOW_QUERY_LOG
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    line = json.dumps(entry, ensure_ascii=False, default=str) + '\n'
+    # одна короткая запись в режиме append не перемешивается
+    # со строками других процессов
+    with open(path, 'a', encoding='utf-8') as log:
+        log.write(line)
+
+
+def record(execute, sql, params, many, context):
+    """execute_wrapper: пишет в журнал запросы дольше порога."""
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration = time.perf_counter() - started
+    threshold = settings.SLOW_QUERY_THRESHOLD
+    if (threshold and duration >= threshold
+            and random.random() < settings.SLOW_QUERY_SAMPLE_RATE):
+        write({
+            'time': timezone.now().isoformat(),
+            'duration_ms': round(duration * 1000, 3),
+            'view': getattr(_local, 'view', None),
+            'sql': sql,
+            'fingerprint': fingerprint(sql),
+            'params': None if many else _params(params),
+            'plan': None if many else explain(
+                context['connection'], sql, params),
+        })
+    return result
+
+
+def install(sender, connection, **kwargs):
+    """Обработчик connection_created: ставит record на соединение."""
+    # в начало списка: execute_wrapper() снимает свою обёртку с конца,
+    # а соединение может открыться прямо внутри такого блока
+    if record not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record)
+
+
+class SlowQueryMiddleware:
+    """Запоминает имя представления для записей журнала."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            _local.view = None
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        _local.view = match.view_name if match else view_func.__name__
+
+
+def read_log(path):
+    with open(path, encoding='utf-8') as log:
+        for line in log:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def aggregate(entries):
+    """Сводка по отпечаткам SQL, самые затратные по суммарному времени."""
+    groups = defaultdict(lambda: {
+        'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'views': Counter(),
+        'plan': None,
+    })
+    for entry in entries:
+        group = groups[entry['fingerprint']]
+        group['count'] += 1
+        group['total_ms'] += entry['duration_ms']
+        group['views'][entry['view'] or '-'] += 1
+        if entry['duration_ms'] >= group['max_ms']:
+            group['max_ms'] = entry['duration_ms']
+            group['plan'] = entry['plan']
+    return sorted(groups.items(), key=lambda item: -item[1]['total_ms'])
@@ -0,0 +1,118 @@
+"""Защита от набега на кэш, когда популярное значение устаревает.
+
+В кэше вместе со значением лежат срок его свежести и время, которое
+ушло на вычисление. Запись живёт дольше срока свежести ещё на
+STAMPEDE_STALE_TIMEOUT: пока один процесс пересчитывает значение под
+блокировкой из кэша, остальные отдают устаревшую копию и не идут в базу.
+Чтобы пересчёт не начинался у всех одновременно, его запускают чуть
+раньше срока с вероятностью, растущей к концу срока (XFetch).
+"""
+import math
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache, caches
+
+POLL_INTERVAL = 0.05
+
+# исходы обращений в этом процессе: hit, computed, stale, waited
+stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _count(outcome):
+    with _stats_lock:
+        stats[outcome] += 1
+
+
+def expires_early(expiry, delta, now=None, beta=None):
+    """Пора ли пересчитывать значение, вычисленное за delta секунд.
+
+    Чем дороже вычисление и ближе срок, тем вероятнее пересчёт:
+    -log(u) при равномерном u в (0, 1] растёт редко, но неограниченно.
+    """
+    now = time.time() if now is None else now
+    beta = settings.STAMPEDE_BETA if beta is None else beta
+    return now - delta * beta * math.log(1.0 - random.random()) >= expiry
+
+
+def _load(key):
+    entry = cache.get(key)
+    # записи другого формата (например, оставшиеся от прошлых версий)
+    # считаются отсутствующими
+    if isinstance(entry, tuple) and len(entry) == 4:
+        return entry
+    return None
+
+
+def _compute(key, compute, timeout, tag):
+    started = time.perf_counter()
+    value = compute()
+    delta = time.perf_counter() - started
+    _count('computed')
+    if value is not None:
+        stale = (settings.STAMPEDE_STALE_TIMEOUT
+                 if settings.STAMPEDE_PROTECTION else 0)
+        cache.set(key, (tag, value, time.time() + timeout, delta),
+                  timeout + stale)
+    return value
+
+
+def _wait(key, lock_key, tag):
+    """Ждёт, пока владелец блокировки положит свежее значение."""
+    deadline = time.monotonic() + settings.STAMPEDE_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = _load(key)
+        if entry is not None and entry[0] == tag:
+            return entry
+        if caches['state'].get(lock_key) is None:
+            break
+    return None
+
+
+def get_or_compute(key, compute, timeout, tag=None, lock=True, force=False):
+    """Значение key из кэша или из compute(), но не во всех процессах сразу.
+
+    tag — признак актуальности записи (например, версии разделов):
+    запись с другим tag устарела. Если compute() вернул None, значение
+    не кэшируется. lock=False оставляет только ранний пересчёт — для
+    дешёвых значений, где блокировка дороже самого вычисления.
+    force пересчитывает значение, не глядя в кэш.
+    """
+    entry = None if force else _load(key)
+    if entry is not None and entry[0] == tag:
+        _, value, expiry, delta = entry
+        if settings.STAMPEDE_PROTECTION:
+            fresh = not expires_early(expiry, delta)
+        else:
+            fresh = time.time() < expiry
+        if fresh:
+            _count('hit')
+            return value
+    if not (settings.STAMPEDE_PROTECTION and lock):
+        return _compute(key, compute, timeout, tag)
+    lock_key = f'{key}:lock'
+    token = uuid.uuid4().hex
+    # блокировки — в кэше state: вытеснение не должно их снимать
+    locks = caches['state']
+    if locks.add(lock_key, token, settings.STAMPEDE_LOCK_TIMEOUT):
+        try:
+            return _compute(key, compute, timeout, tag)
+        finally:
+            # блокировка могла истечь и достаться другому процессу
+            if locks.get(lock_key) == token:
+                locks.delete(lock_key)
+    if entry is not None:
+        _count('stale')
+        return entry[1]
+    entry = _wait(key, lock_key, tag)
+    if entry is not None:
+        _count('waited')
+        return entry[1]
+    # владелец не справился за отведённое время: считаем сами
+    return _compute(key, compute, timeout, tag)
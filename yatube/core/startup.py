@@ -0,0 +1,102 @@
+"""Замер времени старта воркера: импорты, ready() приложений, URLconf."""
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|\s*(\S+)')
+
+# выполняется в отдельном процессе с -X importtime, чтобы замерять
+# холодный старт, а не уже прогретый процесс manage.py
+CHILD_CODE = '''
+import json, sys, time
+started = time.perf_counter()
+import django
+from django.apps import AppConfig
+
+timings = {}
+import_models = AppConfig.import_models
+
+
+def timed_import_models(self):
+    begin = time.perf_counter()
+    import_models(self)
+    timings.setdefault(self.label, {})['models'] = time.perf_counter() - begin
+    ready = self.ready
+
+    def timed_ready():
+        begin = time.perf_counter()
+        ready()
+        timings[self.label]['ready'] = time.perf_counter() - begin
+    self.ready = timed_ready
+
+
+AppConfig.import_models = timed_import_models
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+wsgi = time.perf_counter()
+from django.urls import get_resolver, reverse
+get_resolver().url_patterns
+reverse('posts:index')
+urlconf = time.perf_counter()
+print(json.dumps({
+    'wsgi': wsgi - started,
+    'urlconf': urlconf - wsgi,
+    'apps': timings,
+    'loaded': sorted(sys.modules),
+}))
+'''
+
+
+def parse_importtime(stderr):
+    """Строки -X importtime: [(модуль, собственное время, с вложенными)]."""
+    modules = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, name = match.groups()
+            modules.append((name, int(self_us), int(cumulative_us)))
+    return modules
+
+
+def group_by_package(modules, depth):
+    """Собственное время импорта, просуммированное по пакетам."""
+    totals = Counter()
+    for name, self_us, _ in modules:
+        totals['.'.join(name.split('.')[:depth])] += self_us
+    return totals
+
+
+def measure(lazy):
+    """Запускает холодный старт в отдельном процессе и возвращает замеры."""
+    env = dict(os.environ)
+    env['DJANGO_SETTINGS_MODULE'] = os.environ.get(
+        'DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    env['YATUBE_LAZY_BOOT'] = '1' if lazy else '0'
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', CHILD_CODE],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        check=True,
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report['modules'] = parse_importtime(result.stderr)
+    report['import_us'] = sum(self_us for _, self_us, _ in report['modules'])
+    return report
+
+
+def benchmark(repeat):
+    """Медианы полного старта в обычном и ускоренном режимах."""
+    results = {}
+    for lazy in (False, True):
+        runs = [measure(lazy) for _ in range(repeat)]
+        results[lazy] = {
+            'total': statistics.median(
+                run['wsgi'] + run['urlconf'] for run in runs),
+            'modules': statistics.median(len(run['loaded']) for run in runs),
+        }
+    return results
@@ -0,0 +1,125 @@
+import gzip
+import os
+import sqlite3
+import tempfile
+import threading
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connections
+from django.test import SimpleTestCase, override_settings
+
+from core import backup
+
+
+@override_settings(BACKUP_PAGES_PER_STEP=10, BACKUP_STEP_PAUSE=0.001,
+                   BACKUP_MAX_RESTARTS=3)
+class BackupTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.source = os.path.join(self.directory, 'source.sqlite3')
+        connection = sqlite3.connect(self.source)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('CREATE TABLE post (text TEXT)')
+        connection.executemany('INSERT INTO post VALUES (?)',
+                               [('x' * 500,)] * 2000)
+        connection.commit()
+        connection.close()
+
+    def rows(self, path):
+        connection = sqlite3.connect(path)
+        try:
+            return connection.execute('SELECT COUNT(*) FROM post').fetchone()
+        finally:
+            connection.close()
+
+    def test_writes_continue_during_backup(self):
+        """Снимок держится всю копию, а запись в базу не ждёт её."""
+        done = threading.Event()
+        writes, errors = [], []
+
+        def write():
+            connection = sqlite3.connect(self.source, timeout=1)
+            while not done.is_set():
+                try:
+                    connection.execute("INSERT INTO post VALUES ('y')")
+                    connection.commit()
+                    writes.append(1)
+                except sqlite3.Error as error:
+                    errors.append(error)
+            connection.close()
+
+        def progress(done_pages, total):
+            # писатель успевает закоммитить между шагами
+            writes_before = len(writes)
+            while len(writes) == writes_before and thread.is_alive():
+                pass
+
+        thread = threading.Thread(target=write)
+        thread.start()
+        target = os.path.join(self.directory, 'copy.sqlite3')
+        try:
+            restarts = backup.backup(self.source, target, progress=progress)
+        finally:
+            done.set()
+            thread.join()
+        self.assertEqual(restarts, 0)
+        self.assertEqual(errors, [])
+        self.assertGreater(len(writes), 10)
+        self.assertEqual(self.rows(target), (2000,))
+        backup.verify(target)
+
+    def test_restarts_limited_without_wal(self):
+        connection = sqlite3.connect(self.source)
+        connection.execute('PRAGMA journal_mode=DELETE')
+
+        def write(done_pages, total):
+            connection.execute("INSERT INTO post VALUES ('y')")
+            connection.commit()
+
+        target = os.path.join(self.directory, 'copy.sqlite3')
+        try:
+            with self.assertRaises(backup.BackupError):
+                backup.backup(self.source, target, progress=write)
+        finally:
+            connection.close()
+
+    def test_snapshot_compressed_and_verified(self):
+        path, digest = backup.snapshot(self.source, self.directory, 'db')
+        self.assertTrue(path.endswith('db.sqlite3.gz'))
+        with gzip.open(path, 'rb') as packed:
+            self.assertEqual(backup.checksum(packed), digest)
+        plain = os.path.join(self.directory, 'plain.sqlite3')
+        with gzip.open(path, 'rb') as packed, open(plain, 'wb') as out:
+            out.write(packed.read())
+        self.assertEqual(self.rows(plain), (2000,))
+
+    def test_corrupted_copy_rejected(self):
+        broken = os.path.join(self.directory, 'broken.sqlite3')
+        with open(self.source, 'rb') as source:
+            data = bytearray(source.read())
+        data[4096 * 2:4096 * 3] = b'\xff' * 4096
+        with open(broken, 'wb') as out:
+            out.write(data)
+        with self.assertRaises(backup.BackupError):
+            backup.verify(broken)
+
+    def test_command(self):
+        output = os.path.join(self.directory, 'backups')
+        database = {'ENGINE': 'django.db.backends.sqlite3',
+                    'NAME': self.source}
+        out = StringIO()
+        with mock.patch.dict(connections.databases,
+                             {'backup_source': database}):
+            call_command('backup_db', database='backup_source',
+                         output=output, no_compress=True, stdout=out)
+            connections['backup_source'].close()
+            del connections['backup_source']
+        [name] = os.listdir(output)
+        self.assertTrue(name.startswith('backup_source-'))
+        self.assertIn(name, out.getvalue())
+        self.assertEqual(self.rows(os.path.join(output, name)), (2000,))
@@ -0,0 +1,116 @@
+import tempfile
+import threading
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.test import SimpleTestCase
+
+from core import cache_backends
+from core.cache_backends import LayeredFileCache
+
+
+class LayeredFileCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = directory.name
+        self.cache = self.make_cache()
+        self.other = self.make_cache()
+
+    def make_cache(self, **options):
+        return LayeredFileCache(self.location, {'OPTIONS': options})
+
+    def test_hit_served_from_memory(self):
+        self.cache.set('key', {'value': 1})
+        self.cache.get('key')
+        with mock.patch('builtins.open') as opened:
+            value = self.cache.get('key')
+        opened.assert_not_called()
+        value['value'] = 2
+        self.assertEqual(self.cache.get('key'), {'value': 1})
+
+    def test_writes_from_other_process_visible(self):
+        # другой процесс меняет только файлы, память этого он не трогает
+        other = FileBasedCache(self.location, {})
+        self.cache.set('key', 'old')
+        self.assertEqual(self.cache.get('key'), 'old')
+        other.set('key', 'new')
+        self.assertEqual(self.cache.get('key'), 'new')
+        other.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+        other.set('key', 'again')
+        self.assertEqual(self.cache.get('key'), 'again')
+        other.clear()
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_expiry_and_bound(self):
+        cache = self.make_cache(L1_MAX_ENTRIES=2)
+        for number in range(3):
+            cache.set(f'key{number}', number)
+            cache.get(f'key{number}')
+        self.assertEqual(len(cache._l1), 2)
+        cache.set('short', 'value', 1)
+        cache.get('short')
+        with mock.patch('time.time', return_value=cache._l1[
+                cache._key_to_file('short')][1] + 1):
+            self.assertIsNone(cache.get('short'))
+
+    def test_add_is_exclusive(self):
+        self.assertTrue(self.cache.add('lock', 'first', 10))
+        self.assertFalse(self.other.add('lock', 'second', 10))
+        self.assertEqual(self.other.get('lock'), 'first')
+        self.cache.set('stale', 'old', 1)
+        # просроченное значение не мешает захватить ключ
+        with mock.patch('time.time', return_value=10 ** 10):
+            self.assertTrue(self.other.add('stale', 'new', None))
+        self.assertEqual(self.cache.get('stale'), 'new')
+
+    def test_state_cache_culls_only_expired(self):
+        cache = self.make_cache(MAX_ENTRIES=3, CULL_EXPIRED_ONLY=True)
+        for number in range(3):
+            cache.set(f'keep{number}', number, None)
+        cache.set('short', 'value', 1)
+        with mock.patch('time.time', return_value=10 ** 10), \
+                mock.patch.object(cache_backends, 'EXPIRED_CULL_INTERVAL', 0):
+            cache.set('new', 'value', None)
+        for number in range(3):
+            self.assertEqual(cache.get(f'keep{number}'), number)
+        self.assertFalse(cache.has_key('short'))
+        self.assertEqual(len(cache._list_cache_files()), 4)
+
+    def test_project_state_not_randomly_culled(self):
+        self.assertTrue(
+            settings.CACHES['state']['OPTIONS']['CULL_EXPIRED_ONLY'])
+        self.assertGreater(
+            settings.CACHES['default']['OPTIONS']['MAX_ENTRIES'],
+            settings.CACHES['default']['OPTIONS']['L1_MAX_ENTRIES'])
+
+
+class ProjectCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_tests_do_not_touch_project_cache(self):
+        self.assertFalse(cache._dir.startswith(settings.BASE_DIR))
+
+    def test_memory_shared_between_threads(self):
+        cache.set('key', 'value')
+        cache.get('key')
+        found = []
+
+        def read():
+            # у каждого потока свой экземпляр бэкенда
+            found.append((caches['default'], caches['default'].get('key')))
+
+        with mock.patch('builtins.open') as opened:
+            thread = threading.Thread(target=read)
+            thread.start()
+            thread.join()
+        opened.assert_not_called()
+        [(backend, value)] = found
+        self.assertIsNot(backend, cache)
+        self.assertEqual(value, 'value')
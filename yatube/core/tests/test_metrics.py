@@ -0,0 +1,97 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core import metrics
+from posts.models import Post
+
+User = get_user_model()
+
+
+@override_settings(INTERNAL_IPS=['127.0.0.1'], METRICS_TOKEN='')
+class MetricsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='test_author')
+        Post.objects.create(text='Тестовый пост', author=author)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        override = override_settings(METRICS_DIR=self.directory)
+        override.enable()
+        self.addCleanup(override.disable)
+        # счётчики с нуля, как у только что запущенного воркера
+        metrics._after_fork()
+
+    def test_requests_recorded(self):
+        for _ in range(2):
+            self.client.get(reverse('posts:index'))
+        self.client.get(reverse('about:author'))
+        self.client.get('/no-such-page/')
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        text = response.content.decode()
+        self.assertIn('# TYPE yatube_request_duration_seconds histogram',
+                      text)
+        self.assertIn('yatube_requests_total{view="posts:index",'
+                      'method="GET",status="200"} 2', text)
+        self.assertIn('yatube_requests_total{view="about:author",'
+                      'method="GET",status="200"} 1', text)
+        self.assertIn('yatube_requests_total{view="unmatched",'
+                      'method="GET",status="404"} 1', text)
+        self.assertIn('yatube_request_duration_seconds_bucket{'
+                      'view="posts:index",le="+Inf"} 2', text)
+        self.assertIn('yatube_request_duration_seconds_count{'
+                      'view="posts:index"} 2', text)
+        self.assertRegex(text, r'yatube_db_queries_total\{'
+                               r'view="posts:index"\} [1-9]')
+        buckets = [line for line in text.splitlines() if line.startswith(
+            'yatube_request_duration_seconds_bucket{view="posts:index"')]
+        self.assertTrue(buckets[-1].startswith(
+            'yatube_request_duration_seconds_bucket{view="posts:index",'
+            'le="+Inf"}'))
+
+    def test_other_workers_summed(self):
+        with open(os.path.join(self.directory, '1-other.json'), 'w') as f:
+            json.dump([['yatube_requests_total',
+                        [['view', 'posts:index'], ['method', 'GET'],
+                         ['status', '200']], 5]], f)
+        self.client.get(reverse('posts:index'))
+        text = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('yatube_requests_total{view="posts:index",'
+                      'method="GET",status="200"} 6', text)
+
+    def test_dead_workers_dropped(self):
+        worker = subprocess.Popen([sys.executable, '-c', ''])
+        worker.wait()
+        stale = os.path.join(self.directory, f'{worker.pid}-gone.json')
+        with open(stale, 'w') as f:
+            json.dump([['yatube_requests_total',
+                        [['view', 'posts:index'], ['method', 'GET'],
+                         ['status', '200']], 5]], f)
+        self.client.get(reverse('posts:index'))
+        text = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('yatube_requests_total{view="posts:index",'
+                      'method="GET",status="200"} 1', text)
+        self.assertFalse(os.path.exists(stale))
+
+    def test_access_limited(self):
+        outside = {'REMOTE_ADDR': '203.0.113.1'}
+        response = self.client.get(reverse('metrics'), **outside)
+        self.assertEqual(response.status_code, 404)
+        with self.settings(METRICS_TOKEN='secret'):
+            response = self.client.get(reverse('metrics'), **outside,
+                                       HTTP_AUTHORIZATION='Bearer wrong')
+            self.assertEqual(response.status_code, 404)
+            response = self.client.get(reverse('metrics'), **outside,
+                                       HTTP_AUTHORIZATION='Bearer secret')
+            self.assertEqual(response.status_code, 200)
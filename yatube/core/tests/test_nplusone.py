@@ -0,0 +1,62 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory, TestCase, override_settings
+
+from core import nplusone
+from posts.models import Post
+
+User = get_user_model()
+
+TEMPLATE = Template(
+    '{% for post in posts %}\n{{ post.author.username }}\n{% endfor %}')
+
+
+class NPlusOneTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for number in range(4):
+            author = User.objects.create_user(username=f'author{number}')
+            Post.objects.create(text=f'Пост {number}', author=author)
+
+    def render(self, posts):
+        return TEMPLATE.render(Context({'posts': posts}))
+
+    def test_fingerprint(self):
+        self.assertEqual(
+            nplusone.fingerprint(
+                "SELECT * FROM t WHERE id IN (%s, %s, %s) AND a = 'x' "
+                "LIMIT 21"),
+            'SELECT * FROM t WHERE id IN (...) AND a = ? LIMIT ?')
+
+    def test_template_line_reported(self):
+        with nplusone.Detector() as detector:
+            self.render(Post.objects.all())
+        [finding] = detector.findings()
+        self.assertEqual(finding.count, 4)
+        self.assertEqual(finding.template, '<unknown source>:2')
+        self.assertIn('"auth_user"', finding.sql)
+        with nplusone.Detector() as detector:
+            self.render(Post.objects.select_related('author'))
+        self.assertEqual(detector.findings(), [])
+
+    def test_expected_repeats(self):
+        with nplusone.Detector() as detector:
+            with nplusone.expected_repeats():
+                self.render(Post.objects.all())
+        self.assertEqual(detector.findings(), [])
+
+    @override_settings(NPLUSONE_MODE='raise')
+    def test_middleware(self):
+        def view(request):
+            return HttpResponse(self.render(Post.objects.all()))
+
+        middleware = nplusone.NPlusOneMiddleware(view)
+        # без детектора всего теста, который ставит NPlusOneTestRunner
+        with mock.patch.object(nplusone._local, 'detectors', [],
+                               create=True):
+            with self.assertRaisesMessage(nplusone.NPlusOneError, ':2'):
+                middleware(RequestFactory().get('/'))
@@ -0,0 +1,61 @@
+from importlib.util import find_spec
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+
+
+@skipUnless(find_spec('debug_toolbar'), 'django-debug-toolbar не установлен')
+@skipUnless(settings.USE_DEBUG_TOOLBAR, 'панель отладки выключена')
+@override_settings(DEBUG=True, POST_CARD_CACHE_TIMEOUT=60)
+class DebugToolbarPanelsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='test_author')
+        for number in range(3):
+            Post.objects.create(text=f'Пост {number}', author=author)
+
+    def setUp(self):
+        cache.clear()
+
+    def toolbar_stats(self, url):
+        from debug_toolbar.toolbar import DebugToolbar
+
+        # однопроцессный сервер: панели сохраняются, а не рендерятся сразу
+        response = self.client.get(url, **{'wsgi.multiprocess': False})
+        self.assertContains(response, 'djDebug')
+        toolbar = list(DebugToolbar._store.values())[-1]
+        stats = {}
+        for panel_id in ('PaginatorPanel', 'CacheFamilyPanel',
+                         'FragmentPanel', 'NPlusOnePanel'):
+            panel = toolbar.get_panel_by_id(panel_id)
+            self.assertTrue(panel.content)
+            stats[panel_id] = panel.get_stats()
+        return stats
+
+    def test_index_panels(self):
+        self.toolbar_stats(reverse('posts:index'))
+        stats = self.toolbar_stats(reverse('posts:index'))
+        [count] = stats['PaginatorPanel']['counts']
+        self.assertEqual(count['count'], 3)
+        self.assertTrue(count['queries'])
+        families = dict(stats['CacheFamilyPanel']['families'])
+        self.assertEqual(families['post:card']['hits'], 3)
+        [(template, row)] = stats['FragmentPanel']['totals']
+        self.assertEqual(template, 'posts/includes/index_card.html')
+        self.assertEqual((row['count'], row['cached']), (3, 3))
+        self.assertEqual(stats['NPlusOnePanel']['findings'], [])
+
+    def test_family(self):
+        from core.panels import family
+
+        self.assertEqual(family('post:card:12:' + 'a' * 32), 'post:card')
+        self.assertEqual(family('feed:version:' + 'b' * 32), 'feed:version')
@@ -0,0 +1,25 @@
+from django.template import engines
+from django.test import SimpleTestCase
+from django.urls import get_resolver
+
+from core import prefork
+
+
+class PreforkWarmUpTests(SimpleTestCase):
+
+    def test_warm_urls_populates_reverse(self):
+        resolver = get_resolver()
+        self.assertGreater(prefork.warm_urls(resolver), 0)
+        self.assertIn('posts', resolver.namespace_dict)
+        self.assertIn('admin', resolver.app_dict)
+
+    def test_warm_templates_fills_cached_loader(self):
+        """Тесты идут с DEBUG = False, значит загрузчик кэширующий."""
+        self.assertGreater(prefork.warm_templates(), 0)
+        loader = engines['django'].engine.template_loaders[0]
+        cached = {key.split('-')[0] for key in loader.get_template_cache}
+        self.assertIn('posts/index.html', cached)
+
+    def test_warm_models_and_memory(self):
+        self.assertGreater(prefork.warm_models(), 0)
+        self.assertGreater(prefork.memory()['rss'], 0)
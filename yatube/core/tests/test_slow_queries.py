@@ -0,0 +1,60 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+
+
+class SlowQueryLogTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='test_author')
+        cls.post = Post.objects.create(text='Тестовый пост', author=author)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.log = os.path.join(directory.name, 'slow.jsonl')
+
+    def entries(self):
+        if not os.path.exists(self.log):
+            return []
+        with open(self.log, encoding='utf-8') as log:
+            return [json.loads(line) for line in log]
+
+    def test_slow_queries_logged_with_view_and_plan(self):
+        with self.settings(SLOW_QUERY_LOG=self.log,
+                           SLOW_QUERY_THRESHOLD=1e-9):
+            self.client.get(reverse('posts:post_detail', args=[self.post.pk]))
+        entries = self.entries()
+        self.assertTrue(entries)
+        post_query = next(entry for entry in entries
+                          if '"posts_post"' in entry['sql'])
+        self.assertEqual(post_query['view'], 'posts:post_detail')
+        self.assertIn(self.post.pk, post_query['params'])
+        self.assertIn('SEARCH', ' '.join(post_query['plan']))
+
+    @override_settings(SLOW_QUERY_THRESHOLD=1e-9, SLOW_QUERY_SAMPLE_RATE=0)
+    def test_sampling(self):
+        with self.settings(SLOW_QUERY_LOG=self.log):
+            list(Post.objects.all())
+        self.assertEqual(self.entries(), [])
+
+    def test_report(self):
+        with self.settings(SLOW_QUERY_LOG=self.log,
+                           SLOW_QUERY_THRESHOLD=1e-9):
+            for _ in range(3):
+                list(Post.objects.filter(text='Тестовый пост'))
+        out = StringIO()
+        call_command('slow_queries_report', log=self.log, top=1, stdout=out)
+        self.assertIn('3 раз', out.getvalue())
+        self.assertIn('"posts_post"."text" = %s', out.getvalue())
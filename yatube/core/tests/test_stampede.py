@@ -0,0 +1,77 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache, caches
+from django.test import SimpleTestCase, override_settings
+
+from core import stampede
+
+
+@override_settings(STAMPEDE_PROTECTION=True, STAMPEDE_LOCK_TIMEOUT=5,
+                   STAMPEDE_STALE_TIMEOUT=60, STAMPEDE_BETA=1.0)
+class StampedeTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.locks = caches['state']
+        self.locks.clear()
+        self.calls = 0
+
+    def compute(self, value='new', pause=0):
+        def compute():
+            self.calls += 1
+            time.sleep(pause)
+            return value
+        return compute
+
+    def test_fresh_value_cached(self):
+        for _ in range(3):
+            self.assertEqual(
+                stampede.get_or_compute('key', self.compute(), 60), 'new')
+        self.assertEqual(self.calls, 1)
+
+    def test_stale_served_while_locked(self):
+        """Пока другой процесс пересчитывает, отдаётся прежняя копия."""
+        stampede.get_or_compute('key', self.compute('old'), 60, tag='v1')
+        self.locks.add('key:lock', 'other', 5)
+        value = stampede.get_or_compute('key', self.compute(), 60, tag='v2')
+        self.assertEqual(value, 'old')
+        self.assertEqual(self.calls, 1)
+        self.locks.delete('key:lock')
+        value = stampede.get_or_compute('key', self.compute(), 60, tag='v2')
+        self.assertEqual(value, 'new')
+        self.assertIsNone(self.locks.get('key:lock'))
+
+    @override_settings(STAMPEDE_LOCK_TIMEOUT=0.2)
+    def test_abandoned_lock(self):
+        """Без копии ждём владельца блокировки, но не дольше её срока."""
+        self.locks.add('key:lock', 'other', 5)
+        self.assertEqual(
+            stampede.get_or_compute('key', self.compute(), 60), 'new')
+
+    def test_concurrent_misses_compute_once(self):
+        barrier = threading.Barrier(8)
+        results = []
+
+        def request():
+            barrier.wait()
+            results.append(stampede.get_or_compute(
+                'key', self.compute(pause=0.2), 60))
+
+        threads = [threading.Thread(target=request) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['new'] * 8)
+        self.assertEqual(self.calls, 1)
+
+    def test_expires_early(self):
+        now = 1000
+        self.assertFalse(stampede.expires_early(now + 10, 0, now))
+        self.assertTrue(stampede.expires_early(now, 0, now))
+        with mock.patch('random.random', return_value=0.5):
+            # -ln(0.5) * 20 ≈ 13.9 секунд до срока — уже пора
+            self.assertTrue(stampede.expires_early(now + 10, 20, now))
+            self.assertFalse(stampede.expires_early(now + 10, 1, now))
@@ -0,0 +1,38 @@
+from django.test import SimpleTestCase
+from django.urls import resolve
+
+from core import startup
+
+
+class StartupProfilerTests(SimpleTestCase):
+
+    def test_parse_importtime(self):
+        stderr = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |     django.utils.text\n'
+            'import time:       300 |        420 |   django.contrib.admin\n'
+            'что-то постороннее\n'
+        )
+        modules = startup.parse_importtime(stderr)
+        self.assertEqual(modules, [
+            ('django.utils.text', 120, 120),
+            ('django.contrib.admin', 300, 420),
+        ])
+        self.assertEqual(
+            startup.group_by_package(modules, 2),
+            {'django.utils': 120, 'django.contrib': 300}
+        )
+
+    def test_lazy_boot_defers_admin_and_auth_views(self):
+        """В ускоренном режиме admin.py и формы auth не грузятся при старте."""
+        deferred = {'posts.admin', 'users.admin', 'django.contrib.auth.forms'}
+        lazy = set(startup.measure(True)['loaded'])
+        default = set(startup.measure(False)['loaded'])
+        self.assertFalse(deferred & lazy)
+        self.assertLessEqual(deferred, default)
+
+    def test_lazy_auth_views_resolve(self):
+        match = resolve('/auth/password_reset/')
+        self.assertEqual(match.view_name, 'users:password_reset_form')
+        self.assertEqual(match.func.lazy_view_path,
+                         'django.contrib.auth.views.PasswordResetView')
@@ -0,0 +1,58 @@
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import RequestFactory, TestCase, override_settings
+
+from core import throttle
+from core.cache_backends import LayeredFileCache
+
+
+class TokenBucketTests(TestCase):
+
+    def setUp(self):
+        caches['state'].clear()
+
+    def test_bucket_refills_over_period(self):
+        take = throttle.take_token
+        self.assertEqual(take('bucket', 2, 60, now=0), 0)
+        self.assertEqual(take('bucket', 2, 60, now=0), 0)
+        self.assertEqual(take('bucket', 2, 60, now=0), 30)
+        self.assertEqual(take('bucket', 2, 60, now=20), 10)
+        self.assertEqual(take('bucket', 2, 60, now=30), 0)
+
+    def test_local_fallback_when_cache_fails(self):
+        with mock.patch.object(LayeredFileCache, 'get',
+                               side_effect=OSError), \
+                self.assertLogs('core.throttle', 'WARNING'):
+            self.assertEqual(throttle.take_token('local', 1, 60, now=0), 0)
+            self.assertEqual(throttle.take_token('local', 1, 60, now=0), 60)
+
+    @override_settings(THROTTLE_RATES={'login': '2/m'})
+    def test_login_returns_429_with_retry_after(self):
+        data = {'username': 'nobody', 'password': 'wrong'}
+        for _ in range(2):
+            self.assertEqual(
+                self.client.post('/auth/login/', data).status_code, 200)
+        response = self.client.post('/auth/login/', data)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '30')
+
+    @override_settings(THROTTLE_RATES={'password_reset': '1/h'})
+    def test_opening_form_does_not_spend_tokens(self):
+        for _ in range(3):
+            response = self.client.get('/auth/password_reset/')
+            self.assertEqual(response.status_code, 200)
+        response = self.client.post('/auth/password_reset/',
+                                    {'email': 'nobody@example.com'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_client_behind_trusted_proxy(self):
+        request = RequestFactory().get(
+            '/', REMOTE_ADDR='127.0.0.1',
+            HTTP_X_FORWARDED_FOR='10.0.0.1, 203.0.113.5')
+        self.assertEqual(throttle.client_ip(request), '127.0.0.1')
+        with self.settings(THROTTLE_TRUSTED_PROXIES=1):
+            # первую запись мог подставить сам клиент
+            self.assertEqual(throttle.client_ip(request), '203.0.113.5')
+        with self.settings(THROTTLE_TRUSTED_PROXIES=3):
+            self.assertEqual(throttle.client_ip(request), '10.0.0.1')
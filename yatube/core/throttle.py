@@ -0,0 +1,125 @@
+"""Ограничение частоты запросов по алгоритму token bucket.
+
+У каждого клиента в каждом разделе есть «ведро» на capacity жетонов,
+которое наполняется равномерно за period секунд. Запрос, который что-то
+меняет (не GET, HEAD или OPTIONS), забирает жетон; если ведро пусто,
+клиент получает 429 с Retry-After. Открыть форму можно сколько угодно.
+"""
+import logging
+import math
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# запасное хранилище, если общий кэш недоступен: лимит тогда
+# считается в каждом процессе отдельно, но всё равно действует
+_local_buckets = {}
+_local_lock = threading.Lock()
+
+
+def parse_rate(rate):
+    """'20/m' -> (20, 60): объём ведра и время его полного наполнения."""
+    capacity, period = rate.split('/')
+    return int(capacity), PERIODS[period[0]]
+
+
+def client_ip(request):
+    """Адрес клиента с учётом THROTTLE_TRUSTED_PROXIES.
+
+    Каждый прокси дописывает в X-Forwarded-For адрес, с которого пришёл
+    к нему запрос, поэтому верить можно только последним записям, по
+    одной на доверенный прокси; начало заголовка подделывает клиент.
+    """
+    proxies = settings.THROTTLE_TRUSTED_PROXIES
+    forwarded = [address.strip() for address in request.META.get(
+        'HTTP_X_FORWARDED_FOR', '').split(',') if address.strip()]
+    if proxies and forwarded:
+        return forwarded[-min(proxies, len(forwarded))]
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def client_ident(request):
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f'ip:{client_ip(request)}'
+
+
+def take_token(key, capacity, period, now=None):
+    """Забирает жетон из ведра key; возвращает 0 или сколько ждать, с.
+
+    Чтение и запись ведра не атомарны: воркеры, пришедшие одновременно,
+    могут потратить один и тот же жетон. Лимит поэтому мягкий — в худшем
+    случае он превышается на число одновременных запросов клиента, чего
+    для защиты форм от перебора достаточно.
+    """
+    now = time.time() if now is None else now
+    refill = capacity / period
+    cache = caches['state']
+    try:
+        bucket = cache.get(key)
+    except Exception:
+        logger.warning('Кэш недоступен, лимит %s считается локально', key)
+        return _take_local(key, capacity, refill, now)
+    tokens, wait = _take(bucket, capacity, refill, now)
+    try:
+        cache.set(key, (tokens, now), math.ceil(period))
+    except Exception:
+        logger.warning('Кэш недоступен, лимит %s считается локально', key)
+        return _take_local(key, capacity, refill, now)
+    return wait
+
+
+def _take(bucket, capacity, refill, now):
+    if bucket is None:
+        tokens = capacity
+    else:
+        tokens, updated = bucket
+        tokens = min(capacity, tokens + (now - updated) * refill)
+    if tokens >= 1:
+        return tokens - 1, 0
+    # округление гасит погрешность float: 10.000000001 с — это 10 с
+    return tokens, math.ceil(round((1 - tokens) / refill, 6))
+
+
+def _take_local(key, capacity, refill, now):
+    with _local_lock:
+        tokens, wait = _take(_local_buckets.get(key), capacity, refill, now)
+        _local_buckets[key] = (tokens, now)
+    return wait
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse('Слишком много запросов, попробуйте позже',
+                            status=429, content_type='text/plain')
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def throttle(scope):
+    """Декоратор представления: лимит из settings.THROTTLE_RATES[scope].
+
+    Жетоны тратят только запросы с небезопасными методами. Если для
+    раздела лимит не задан, представление вызывается как есть.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            rate = settings.THROTTLE_RATES.get(scope)
+            if rate and request.method not in SAFE_METHODS:
+                capacity, period = parse_rate(rate)
+                key = f'throttle:{scope}:{client_ident(request)}'
+                wait = take_token(key, capacity, period)
+                if wait:
+                    return too_many_requests(wait)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -1,20 +1,281 @@
-from django.contrib import admin
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.actions import delete_selected
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.admin.options import (IS_POPUP_VAR,
+                                          IncorrectLookupParameters)
+from django.contrib.admin.templatetags.admin_urls import add_preserved_filters
+from django.contrib.auth import get_user_model
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
+from django.http import Http404, HttpResponseRedirect
+from django.urls import reverse
+from django.utils.functional import cached_property
 
-from .models import Group, Post
+from . import background, bulk, deletion, search, shards
+from .models import Group, MonthlyPostCount, Post
+from .stats import SITE_SCOPE, total_posts_count
+from .utils import date_range
 
+User = get_user_model()
 
-class PostAdmin(admin.ModelAdmin):
+
+class EstimatedCountPaginator(Paginator):
+    """Берёт число постов без фильтров из счётчиков архива.
+
+    Счётчики учитывают и ArchivedPost, поэтому после archive_posts
+    считаем по таблице Post: она тогда небольшая.
+    """
+
+    @cached_property
+    def count(self):
+        if (not self.object_list.query.where
+                and not shards.any_archived()):
+            return total_posts_count()
+        return super().count
+
+
+class MonthListFilter(admin.SimpleListFilter):
+    """Фильтр по месяцам из счётчиков архива, без сканирования таблицы."""
+    title = 'месяц публикации'
+    parameter_name = 'month'
+
+    def lookups(self, request, model_admin):
+        return [
+            (f'{row.year}-{row.month}',
+             f'{row.month:02}.{row.year} ({row.posts_count})')
+            for row in MonthlyPostCount.objects.filter(scope=SITE_SCOPE)
+        ]
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        try:
+            year, month = map(int, self.value().split('-'))
+            start, end = date_range(year, month)
+        except (ValueError, Http404):
+            raise IncorrectLookupParameters
+        return queryset.filter(pub_date__gte=start, pub_date__lt=end)
+
+
+class BulkActionForm(ActionForm):
+    target_group = forms.SlugField(required=False, label='Группа (slug)')
+    target_author = forms.CharField(required=False,
+                                    label='Автор (username)')
+
+
+class BulkActionsMixin:
+    """Массовые действия над постами пачками через bulk в фоне.
+
+    Действие только запускает поток (posts.background) и сразу
+    возвращает список: ход работы пишется в лог, как у команд
+    move_posts, reassign_posts и delete_posts.
+    """
+    action_form = BulkActionForm
+
+    def get_target(self, request, model, field, lookup):
+        value = request.POST.get(field, '').strip()
+        target = model.objects.filter(**{lookup: value}).first()
+        if target is None:
+            self.message_user(request, f'Не найдено: «{value}»',
+                              messages.ERROR)
+        return target
+
+    def run_bulk(self, request, message, function, posts, *args):
+        background.run(function, posts, *args,
+                       progress=background.log_progress(function.__name__))
+        self.message_user(request, f'{message} идёт в фоне')
+
+    def bulk_move(self, request, posts):
+        group = self.get_target(request, Group, 'target_group', 'slug')
+        if group is not None:
+            self.run_bulk(request, f'Перенос постов в группу «{group}»',
+                          bulk.move_posts, posts, group)
+
+    def bulk_reassign(self, request, posts):
+        author = self.get_target(request, User, 'target_author', 'username')
+        if author is not None:
+            self.run_bulk(request, f'Передача постов автору {author}',
+                          bulk.reassign_posts, posts, author)
+
+    def bulk_delete(self, request, posts):
+        self.run_bulk(request, 'Удаление постов', bulk.delete_posts, posts)
+
+
+def delete_selected_in_background(modeladmin, request, queryset):
+    """delete_selected без сообщения «успешно удалены» до удаления."""
+    if not request.POST.get('post'):
+        return delete_selected(modeladmin, request, queryset)
+    if not modeladmin.has_delete_permission(request):
+        raise PermissionDenied
+    objs = list(queryset)
+    for obj in objs:
+        modeladmin.log_deletion(request, obj, str(obj))
+    modeladmin.delete_queryset(request, queryset)
+    modeladmin.message_user(request, f'Удаляются в фоне: {len(objs)}')
+    return None
+
+
+class BackgroundDeletionMixin:
+    """Удаление через deletion в фоне, без обхода связей коллектором.
+
+    Страница подтверждения показывает только число постов: коллектор
+    Django загрузил бы их все, чтобы вывести списком.
+    """
+    delete_in_background = None
+    posts_lookup = None
+    posts_note = 'удаляются пачками в фоне'
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        opts = self.model._meta
+        lookup = {f'{self.posts_lookup}__in': [obj.pk for obj in objs]}
+        posts_count = sum(queryset.count()
+                          for queryset in shards.post_querysets(**lookup))
+        deleted_objects = [f'{opts.verbose_name.capitalize()}: {obj}'
+                           for obj in objs]
+        deleted_objects.append(
+            f'Постов: {posts_count} ({self.posts_note})')
+        model_count = {opts.verbose_name_plural: len(objs),
+                       Post._meta.verbose_name_plural: posts_count}
+        perms_needed = set()
+        if not self.has_delete_permission(request):
+            perms_needed.add(opts.verbose_name)
+        return deleted_objects, model_count, perms_needed, []
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        if 'delete_selected' in actions:
+            description = actions['delete_selected'][2]
+            actions['delete_selected'] = (
+                delete_selected_in_background, 'delete_selected',
+                description)
+        return actions
+
+    def delete_model(self, request, obj):
+        self.delete_in_background(obj)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            self.delete_in_background(obj)
+
+    def response_delete(self, request, obj_display, obj_id):
+        if IS_POPUP_VAR in request.POST:
+            return super().response_delete(request, obj_display, obj_id)
+        opts = self.model._meta
+        self.message_user(
+            request, f'{opts.verbose_name.capitalize()} «{obj_display}» '
+                     f'удаляется в фоне')
+        if self.has_change_permission(request, None):
+            url = reverse(
+                f'admin:{opts.app_label}_{opts.model_name}_changelist',
+                current_app=self.admin_site.name)
+            url = add_preserved_filters(
+                {'preserved_filters': self.get_preserved_filters(request),
+                 'opts': opts}, url)
+        else:
+            url = reverse('admin:index', current_app=self.admin_site.name)
+        return HttpResponseRedirect(url)
+
+
+class PostAdmin(BulkActionsMixin, admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group',)
     list_editable = ('group',)
+    list_select_related = ('author', 'group',)
     search_fields = ('text',)
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ('move_to_group', 'remove_from_group', 'reassign_author',
+               'delete_in_bulk',)
+
+    def move_to_group(self, request, queryset):
+        self.bulk_move(request, queryset)
+    move_to_group.short_description = 'Перенести в группу'
+
+    def remove_from_group(self, request, queryset):
+        self.run_bulk(request, 'Удаление постов из групп', bulk.move_posts,
+                      queryset, None)
+    remove_from_group.short_description = 'Убрать из группы'
+
+    def reassign_author(self, request, queryset):
+        self.bulk_reassign(request, queryset)
+    reassign_author.short_description = 'Передать другому автору'
 
+    def delete_in_bulk(self, request, queryset):
+        self.bulk_delete(request, queryset)
+    delete_in_bulk.short_description = 'Удалить пачками'
 
-class GroupAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'title', 'slug', 'description',)
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # штатное удаление обходит посты коллектором Django по одному
+        actions.pop('delete_selected', None)
+        return actions
+
+    def is_large_table(self, request):
+        if not hasattr(request, '_posts_large_table'):
+            request._posts_large_table = (
+                total_posts_count() >= settings.ADMIN_LARGE_TABLE_THRESHOLD)
+        return request._posts_large_table
+
+    def get_list_filter(self, request):
+        if self.is_large_table(request):
+            return (MonthListFilter,)
+        return super().get_list_filter(request)
+
+    def get_sortable_by(self, request):
+        # на большой таблице сортируем только по индексированным полям
+        if self.is_large_table(request):
+            return ('pk', 'pub_date',)
+        return super().get_sortable_by(request)
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        if search.fts_available():
+            return search.filter_matching(queryset, search_term), False
+        return super().get_search_results(request, queryset, search_term)
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(
+            db_field, request, **kwargs)
+        if db_field.name == 'group' and request is not None:
+            # список групп читается один раз на весь список постов,
+            # а не отдельно для каждой строки list_editable
+            if not hasattr(request, '_group_choices'):
+                request._group_choices = list(formfield.choices)
+            formfield.choices = request._group_choices
+        return formfield
+
+
+class GroupAdmin(BackgroundDeletionMixin, BulkActionsMixin,
+                 admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug', 'description', 'posts_count',)
+    list_select_related = ('stats',)
     search_fields = ('title', 'slug', 'description',)
     empty_value_display = '-пусто-'
+    show_full_result_count = False
+    actions = ('move_group_posts', 'delete_group_posts',)
+    delete_in_background = staticmethod(deletion.delete_group_in_background)
+    posts_lookup = 'group_id'
+    posts_note = 'останутся без группы'
+
+    def move_group_posts(self, request, queryset):
+        self.bulk_move(request, Post.objects.filter(group__in=queryset))
+    move_group_posts.short_description = 'Перенести посты в группу'
+
+    def delete_group_posts(self, request, queryset):
+        self.bulk_delete(request, Post.objects.filter(group__in=queryset))
+    delete_group_posts.short_description = 'Удалить посты групп'
+
+    def posts_count(self, obj):
+        stats = getattr(obj, 'stats', None)
+        return stats.posts_count if stats else None
+    posts_count.short_description = 'Всего постов'
+    posts_count.admin_order_field = 'stats__posts_count'
 
 
 admin.site.register(Post, PostAdmin)
@@ -0,0 +1,212 @@
+"""Автодополнение групп и имён пользователей из памяти процесса.
+
+Индекс — отсортированный список ключей в нижнем регистре: поиск по
+префиксу — bisect и короткий проход по соседним ключам, без запросов
+к базе. Индекс строится заранее в мастер-процессе (yatube.preload) или
+при первом обращении. Правки групп и пользователей (posts.signals)
+после коммита пишутся в журнал в кэше state под номерами по порядку;
+каждый процесс не реже чем раз в IDENTITY_CACHE_CHECK_INTERVAL секунд
+дочитывает журнал со своего номера и вносит только эти правки. Заново
+из базы индекс строится, лишь если нужные правки уже выпали из журнала
+(AUTOCOMPLETE_LOG_TIMEOUT).
+"""
+import bisect
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Group, User
+
+
+class PrefixIndex:
+    """Объекты по нескольким ключам каждый, с поиском по префиксу."""
+
+    def __init__(self, entries=()):
+        # (ключ, id) по возрастанию и id -> (ключи, данные)
+        self._keys = []
+        self._objects = {}
+        self._lock = threading.Lock()
+        for pk, keys, payload in entries:
+            keys = self._normalize(keys)
+            self._objects[pk] = (keys, payload)
+            self._keys.extend((key, pk) for key in keys)
+        self._keys.sort()
+
+    def __len__(self):
+        return len(self._objects)
+
+    @staticmethod
+    def _normalize(keys):
+        return tuple({key.casefold() for key in keys if key})
+
+    def add(self, pk, keys, payload):
+        keys = self._normalize(keys)
+        with self._lock:
+            self._remove(pk)
+            self._objects[pk] = (keys, payload)
+            for key in keys:
+                bisect.insort(self._keys, (key, pk))
+
+    def remove(self, pk):
+        with self._lock:
+            self._remove(pk)
+
+    def _remove(self, pk):
+        keys, _ = self._objects.pop(pk, ((), None))
+        for key in keys:
+            position = bisect.bisect_left(self._keys, (key, pk))
+            del self._keys[position]
+
+    def search(self, prefix, limit):
+        """Данные объектов, у которых какой-то ключ начинается с prefix."""
+        prefix = prefix.casefold()
+        found = {}
+        with self._lock:
+            position = bisect.bisect_left(self._keys, (prefix,))
+            while position < len(self._keys) and len(found) < limit:
+                key, pk = self._keys[position]
+                if not key.startswith(prefix):
+                    break
+                found.setdefault(pk, self._objects[pk][1])
+                position += 1
+        return list(found.values())
+
+
+def _group_entry(group):
+    return (group.pk, (group.title, group.slug),
+            {'id': group.pk, 'slug': group.slug, 'title': group.title})
+
+
+def _user_entry(user):
+    return (user.pk, (user.username,),
+            {'username': user.username, 'full_name': user.get_full_name()})
+
+
+# имя индекса -> (модель, выборка для построения, запись индекса)
+SOURCES = {
+    'groups': (Group, lambda: Group.objects.only('title', 'slug'),
+               _group_entry),
+    'users': (User, lambda: User.objects.filter(is_active=True).only(
+        'username', 'first_name', 'last_name'), _user_entry),
+}
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+def _head_key(name):
+    return f'autocomplete:{name}:head'
+
+
+def _change_key(name, number):
+    return f'autocomplete:{name}:change:{number}'
+
+
+def _head(name):
+    """Номер, с которого начнётся следующая правка (подсказка, не точно)."""
+    return caches['state'].get(_head_key(name), 0)
+
+
+def _follow(name, index, number):
+    """Вносит в index правки журнала, начиная с number.
+
+    Возвращает номер первой ещё не сделанной правки. Правки
+    идемпотентны, поэтому повторное применение старой безопасно.
+    """
+    state = caches['state']
+    while True:
+        change = state.get(_change_key(name, number))
+        if change is None:
+            return number
+        action, args = change
+        getattr(index, action)(*args)
+        number += 1
+
+
+def build(name):
+    """Индекс name по базе; в мастер-процессе — до fork воркеров."""
+    _, queryset, entry = SOURCES[name]
+    # номер берётся до чтения базы: правки, закоммиченные позже,
+    # будут в журнале после него
+    number = _head(name)
+    index = PrefixIndex(entry(obj) for obj in queryset().iterator())
+    with _lock:
+        number = _follow(name, index, number)
+        _indexes[name] = [index, number, time.monotonic()]
+    return index
+
+
+def build_all():
+    return {name: len(build(name)) for name in SOURCES}
+
+
+def get_index(name, force=False):
+    """Индекс name с правками других процессов из журнала."""
+    with _lock:
+        state = _indexes.get(name)
+    if state is None:
+        return build(name)
+    now = time.monotonic()
+    if not force and now - state[2] < settings.IDENTITY_CACHE_CHECK_INTERVAL:
+        return state[0]
+    head = _head(name)
+    with _lock:
+        number = _follow(name, state[0], state[1])
+        lost = head > number
+        if not lost:
+            state[1], state[2] = number, now
+    if lost:
+        # правки старше AUTOCOMPLETE_LOG_TIMEOUT уже выпали из журнала
+        return build(name)
+    return state[0]
+
+
+def search(name, prefix, limit=None):
+    return get_index(name).search(prefix, limit or settings.AUTOCOMPLETE_LIMIT)
+
+
+def _publish(name, action, *args):
+    """Дописывает правку в журнал и вносит её в индекс этого процесса.
+
+    Номер правки занимается атомарным add, поэтому правки разных
+    воркеров не затирают друг друга и у всех идут в одном порядке.
+    """
+    state = caches['state']
+    number = _head(name)
+    while not state.add(_change_key(name, number), (action, args),
+                        settings.AUTOCOMPLETE_LOG_TIMEOUT):
+        number += 1
+    state.set(_head_key(name), number + 1, None)
+    with _lock:
+        built = name in _indexes
+    if built:
+        get_index(name, force=True)
+
+
+def _on_commit(name, action, *args):
+    # до коммита перестроенный индекс прочитал бы старые строки
+    transaction.on_commit(lambda: _publish(name, action, *args))
+
+
+def update(obj):
+    """Добавляет или обновляет группу или пользователя в индексе."""
+    for name, (model, _, entry) in SOURCES.items():
+        if isinstance(obj, model):
+            if getattr(obj, 'is_active', True):
+                _on_commit(name, 'add', *entry(obj))
+            else:
+                remove(obj)
+
+
+def remove(obj):
+    for name, (model, _, _) in SOURCES.items():
+        if isinstance(obj, model):
+            _on_commit(name, 'remove', obj.pk)
+
+
+def clear():
+    with _lock:
+        _indexes.clear()
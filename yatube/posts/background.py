@@ -0,0 +1,37 @@
+"""Долгие правки постов в отдельном потоке процесса."""
+import logging
+import threading
+
+from django.db import close_old_connections, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+
+def _run(function, *args, **kwargs):
+    close_old_connections()
+    try:
+        function(*args, **kwargs)
+    except Exception:
+        logger.exception('Фоновая задача %s не удалась', function.__name__)
+    finally:
+        connections.close_all()
+
+
+def run(function, *args, **kwargs):
+    """Запускает function в отдельном потоке после коммита транзакции.
+
+    Нужен там, где вызывающий код сам обёрнут в atomic (например, админка),
+    и пачки внутри него иначе не фиксировались бы по отдельности.
+    """
+    def start():
+        threading.Thread(target=_run, args=(function, *args), kwargs=kwargs,
+                         daemon=True).start()
+
+    transaction.on_commit(start)
+
+
+def log_progress(name):
+    """progress для posts.bulk, который пишет ход задачи в лог."""
+    def progress(done, total):
+        logger.info('%s: %s/%s', name, done, total)
+    return progress
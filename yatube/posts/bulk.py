@@ -0,0 +1,176 @@
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from core.nplusone import expected_repeats
+
+from . import shards, stats
+from .markup import render_text
+from .models import ArchivedPost, Post
+from .signals import posts_changed
+
+
+def _run(queryset, apply, batch_size=None, progress=None,
+         extra_group_ids=(), extra_author_ids=()):
+    """Применяет apply к постам пачками по первичному ключу.
+
+    Каждая пачка — отдельная короткая транзакция в базе queryset,
+    поэтому запись блокируется только на время одной пачки, а между
+    пачками другие запросы успевают пройти.
+    """
+    batch_size = batch_size or settings.BULK_BATCH_SIZE
+    db = queryset.db
+    queryset = queryset.order_by('pk').values_list(
+        'pk', 'group_id', 'author_id', 'pub_date')
+    total = queryset.count() if progress else None
+    done = 0
+    last_pk = 0
+    # каждая пачка повторяет одни и те же запросы — это не N+1
+    with expected_repeats():
+        while True:
+            with transaction.atomic(using=db):
+                rows = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+                if not rows:
+                    break
+                apply(rows)
+            done += len(rows)
+            last_pk = rows[-1][0]
+            posts_changed.send(
+                sender=Post,
+                group_ids=({row[1] for row in rows} | set(extra_group_ids))
+                - {None},
+                author_ids={row[2] for row in rows} | set(extra_author_ids),
+                post_ids={row[0] for row in rows},
+            )
+            if progress:
+                progress(done, total)
+            time.sleep(settings.BULK_BATCH_PAUSE)
+    return done
+
+
+def move_posts(queryset, group, **kwargs):
+    """Переносит посты в группу (или убирает из групп, если group=None).
+
+    Здесь и ниже queryset может быть как по Post, так и по ArchivedPost
+    в любой базе (см. posts.shards).
+    """
+    group_id = group.pk if group else None
+    model = queryset.model
+
+    def apply(rows):
+        model.objects.using(queryset.db).filter(
+            pk__in=[row[0] for row in rows]).update(group_id=group_id)
+        moved = [row for row in rows if row[1] != group_id]
+        stats.update_counters(
+            removed=[row[1:] for row in moved],
+            added=[(group_id, author_id, pub_date)
+                   for _, _, author_id, pub_date in moved],
+        )
+
+    return _run(queryset, apply, extra_group_ids=[group_id], **kwargs)
+
+
+def reassign_posts(queryset, author, **kwargs):
+    """Передаёт посты другому автору."""
+    model = queryset.model
+
+    def apply(rows):
+        model.objects.using(queryset.db).filter(
+            pk__in=[row[0] for row in rows]).update(author_id=author.pk)
+        moved = [row for row in rows if row[2] != author.pk]
+        stats.update_counters(
+            removed=[row[1:] for row in moved],
+            added=[(group_id, author.pk, pub_date)
+                   for _, group_id, _, pub_date in moved],
+        )
+
+    return _run(queryset, apply, extra_author_ids=[author.pk], **kwargs)
+
+
+def delete_posts(queryset, **kwargs):
+    """Удаляет посты одним DELETE на пачку, без Python-коллектора Django."""
+    def apply(rows):
+        _delete(queryset.model, queryset.db, [row[0] for row in rows])
+        stats.update_counters(removed=[row[1:] for row in rows])
+
+    return _run(queryset, apply, **kwargs)
+
+
+def archive_posts(queryset, **kwargs):
+    """Переносит посты из Post в ArchivedPost с теми же id.
+
+    Агрегаты не меняются: посты остаются на сайте, меняется только
+    таблица, в которой они лежат. Посты периодов из ARCHIVE_SHARDS
+    сначала копируются в свой шард, потом удаляются из Post: если
+    перенос прервётся между ними, повторный запуск его закончит.
+    """
+    columns = ', '.join(shards.ARCHIVE_COLUMNS)
+
+    def apply(rows):
+        ids = [row[0] for row in rows]
+        by_alias = _by_alias(rows)
+        local_ids = by_alias.pop(shards.DEFAULT, [])
+        for alias, shard_ids in by_alias.items():
+            shards.copy_posts(Post.objects.filter(pk__in=shard_ids), alias)
+        if local_ids:
+            with connections[shards.DEFAULT].cursor() as cursor:
+                cursor.execute(
+                    f'INSERT INTO {ArchivedPost._meta.db_table} ({columns}) '
+                    f'SELECT {columns} FROM {Post._meta.db_table} '
+                    f'WHERE id IN ({_placeholders(local_ids)})', local_ids)
+        _delete(Post, shards.DEFAULT, ids)
+
+    return _run(queryset, apply, **kwargs)
+
+
+def rebalance_archive(queryset, **kwargs):
+    """Переносит архивные посты queryset в базы их периодов.
+
+    Агрегаты не меняются. Копия в новой базе появляется раньше, чем
+    исчезает старая, поэтому прерванный перенос можно повторить.
+    """
+    def apply(rows):
+        for alias, ids in _by_alias(rows).items():
+            shards.copy_posts(
+                ArchivedPost.objects.using(queryset.db).filter(pk__in=ids),
+                alias)
+        _delete(ArchivedPost, queryset.db, [row[0] for row in rows])
+
+    return _run(queryset, apply, **kwargs)
+
+
+def render_posts(queryset, **kwargs):
+    """Заново готовит text_html, например после правки render_text."""
+    model = queryset.model
+
+    def apply(rows):
+        posts = list(model.objects.using(queryset.db)
+                     .filter(pk__in=[row[0] for row in rows])
+                     .only('pk', 'text'))
+        for post in posts:
+            post.text_html = render_text(post.text)
+        model.objects.using(queryset.db).bulk_update(posts, ['text_html'])
+
+    return _run(queryset, apply, **kwargs)
+
+
+def _by_alias(rows):
+    """id постов по базам архива, в которые они должны попасть."""
+    by_alias = defaultdict(list)
+    for pk, _, _, pub_date in rows:
+        by_alias[shards.alias_for(pub_date)].append(pk)
+    return by_alias
+
+
+def _delete(model, db, ids):
+    """DELETE без Python-коллектора и сигналов post_delete."""
+    with connections[db].cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {model._meta.db_table} '
+            f'WHERE id IN ({_placeholders(ids)})', ids)
+
+
+def _placeholders(ids):
+    return ', '.join(['%s'] * len(ids))
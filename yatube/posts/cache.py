@@ -0,0 +1,221 @@
+import hashlib
+import threading
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache, caches
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.http import HttpResponse
+from django.urls import resolve, reverse
+
+from core.stampede import get_or_compute
+
+from .models import GroupAuthorStats, GroupStats
+
+ACCESS_KEY = 'feed:access'
+SITE = 'site'
+
+_hits = Counter()
+_hits_lock = threading.Lock()
+
+
+def group_version_scope(slug):
+    return f'group:{slug}'
+
+
+def author_version_scope(username):
+    return f'author:{username}'
+
+
+def _digest(value):
+    # слаги и query string могут содержать что угодно, а ключ кэша — нет
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+def _version_key(scope):
+    return f'feed:version:{_digest(scope)}'
+
+
+def get_versions(scopes):
+    """Текущие версии разделов; отсутствующие версии создаются заново.
+
+    Версия — случайный токен, а не счётчик: если ключ версии вытеснят
+    из кэша, новая версия не совпадёт ни с одной из старых страниц.
+    """
+    keys = [_version_key(scope) for scope in scopes]
+    versions = caches['state'].get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+    if missing:
+        caches['state'].set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def invalidate(scopes):
+    """Новые версии разделов; возвращает их в порядке scopes.
+
+    Версии записываются после коммита текущей транзакции: иначе другой
+    воркер успел бы перечитать ещё старые строки и сохранить их под
+    новой версией, и они остались бы в кэше до следующей правки.
+    """
+    versions = [uuid.uuid4().hex for _ in scopes]
+    tokens = {_version_key(scope): version
+              for scope, version in zip(scopes, versions)}
+    transaction.on_commit(lambda: caches['state'].set_many(tokens, None))
+    return versions
+
+
+def page_key(path, scopes):
+    versions = ':'.join(get_versions(scopes))
+    return f'feed:page:{_digest(versions + path)}'
+
+
+def entry_key(path):
+    """Ключ страницы без версий: под ним лежит и устаревшая копия."""
+    return f'feed:entry:{_digest(path)}'
+
+
+def record_access(path):
+    """Считает обращения к страницам для warm_caches.
+
+    Счётчики копятся в памяти процесса и сливаются в общий кэш пачкой.
+    """
+    with _hits_lock:
+        _hits[path] += 1
+        if sum(_hits.values()) < settings.FEED_ACCESS_FLUSH_EVERY:
+            return
+        hits = dict(_hits)
+        _hits.clear()
+    flush_access(hits)
+
+
+def flush_access(hits):
+    stats = Counter(cache.get(ACCESS_KEY, {}))
+    stats.update(hits)
+    cache.set(ACCESS_KEY,
+              dict(stats.most_common(settings.FEED_ACCESS_KEEP)), None)
+
+
+def popular_paths(limit):
+    return [path for path, _ in
+            Counter(cache.get(ACCESS_KEY, {})).most_common(limit)]
+
+
+def page_path(request):
+    """Путь страницы ленты для ключа кэша или None, если её не кэшируем.
+
+    Из query string берётся только номер страницы: прочие параметры
+    лента не читает, и каждый из них плодил бы копии в кэше и пути
+    в статистике warm_caches. Номера дальше FEED_CACHE_MAX_PAGE и
+    кривые номера отдаются без кэша.
+    """
+    page = request.GET.get('page', '1')
+    if not page.isdigit() or page != str(int(page)):
+        return None
+    number = int(page)
+    if not 1 <= number <= settings.FEED_CACHE_MAX_PAGE:
+        return None
+    if number == 1:
+        return request.path
+    return f'{request.path}?page={number}'
+
+
+def cache_feed(scopes):
+    """Кэширует страницу ленты для анонимных посетителей.
+
+    scopes(**kwargs) возвращает разделы, от версий которых зависит
+    страница: при изменении постов раздела версия меняется, и копия
+    страницы считается устаревшей. Если объекта страницы нет, scopes
+    бросает Http404. Пересчитывает её один процесс,
+    остальные тем временем отдают устаревшую копию (core.stampede).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            timeout = settings.FEED_CACHE_TIMEOUT
+            path = page_path(request)
+            if (request.method != 'GET' or not timeout or path is None
+                    or request.user.is_authenticated):
+                return view(request, *args, **kwargs)
+            # scopes ищет объект и отвечает 404 раньше, чем адрес попадёт
+            # в статистику, а версия раздела — в кэш
+            tag = ':'.join(get_versions(scopes(**kwargs)))
+            record_access(path)
+            rendered = []
+
+            def render():
+                response = view(request, *args, **kwargs)
+                rendered.append(response)
+                if response.status_code != 200:
+                    return None
+                return response.content, response['Content-Type']
+
+            cached = get_or_compute(
+                entry_key(path), render, timeout,
+                tag=tag,
+                force=getattr(request, 'refresh_feed_cache', False))
+            if rendered:
+                return rendered[0]
+            content, content_type = cached
+            return HttpResponse(content, content_type=content_type)
+        return wrapper
+    return decorator
+
+
+def heuristic_paths(limit):
+    """Главная, группы со свежими постами и самые активные авторы."""
+    paths = [reverse('posts:index')]
+    groups = (GroupStats.objects.filter(last_pub_date__isnull=False)
+              .order_by('-last_pub_date')
+              .values_list('group__slug', flat=True)[:limit])
+    paths += [reverse('posts:group_list', args=[slug]) for slug in groups]
+    authors = (GroupAuthorStats.objects.values('author__username')
+               .annotate(total=Sum('posts_count')).order_by('-total')
+               .values_list('author__username', flat=True)[:limit])
+    paths += [reverse('posts:profile', args=[username])
+              for username in authors]
+    return paths
+
+
+def pages_to_warm(limit):
+    """Страницы из статистики обращений, дополненные эвристикой."""
+    paths = popular_paths(limit)
+    for path in heuristic_paths(limit):
+        if len(paths) >= limit:
+            break
+        if path not in paths:
+            paths.append(path)
+    return paths[:limit]
+
+
+def warm_page(path):
+    """Рендерит страницу как анонимный посетитель и кладёт её в кэш."""
+    # django.test тяжёлый, а нужен только командам прогрева
+    from django.test import RequestFactory
+
+    request = RequestFactory().get(path)
+    request.user = AnonymousUser()
+    request.refresh_feed_cache = True
+    request.resolver_match = resolve(urlsplit(path).path)
+    match = request.resolver_match
+    response = match.func(request, *match.args, **match.kwargs)
+    return path, response.status_code
+
+
+def _warm_in_thread(path):
+    try:
+        return warm_page(path)
+    finally:
+        connection.close()
+
+
+def warm_pages(paths, workers):
+    """Рендерит страницы в пуле из workers потоков."""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_warm_in_thread, paths)
@@ -0,0 +1,116 @@
+"""Лёгкие объекты постов для страниц лент.
+
+Ленте нужны текст, дата, имя автора и слаг группы, а полноценные
+экземпляры Post, User и Group несут все поля, _state и кэши связей.
+Карточки строятся из одного запроса values_list и повторяют ровно те
+атрибуты, которые читают шаблоны лент и карточек.
+
+Карточка равна экземпляру своей модели с тем же pk, поэтому код,
+сравнивающий посты ленты с объектами Post, работает без изменений.
+"""
+from django.conf import settings
+
+CARD_FIELDS = (
+    'id', 'text', 'text_html', 'pub_date',
+    'author_id', 'author__username', 'author__first_name',
+    'author__last_name',
+    'group_id', 'group__slug', 'group__title',
+)
+
+
+class Card:
+    __slots__ = ()
+    # модели, с экземплярами которых карточка сравнивается по pk
+    models = ()
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __eq__(self, other):
+        if isinstance(other, type(self)):
+            return self.pk == other.pk
+        meta = getattr(other, '_meta', None)
+        if meta is not None and meta.label_lower in self.models:
+            return self.pk == other.pk
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __repr__(self):
+        return f'<{type(self).__name__}: {self}>'
+
+
+class AuthorCard(Card):
+    __slots__ = ('id', 'username', 'first_name', 'last_name')
+    models = (settings.AUTH_USER_MODEL.lower(),)
+
+    def __init__(self, id, username, first_name, last_name):
+        self.id = id
+        self.username = username
+        self.first_name = first_name
+        self.last_name = last_name
+
+    def get_full_name(self):
+        return f'{self.first_name} {self.last_name}'.strip()
+
+    def __str__(self):
+        return self.username
+
+
+class GroupCard(Card):
+    __slots__ = ('id', 'slug', 'title')
+    models = ('posts.group',)
+
+    def __init__(self, id, slug, title):
+        self.id = id
+        self.slug = slug
+        self.title = title
+
+    def __str__(self):
+        return self.title
+
+
+class PostCard(Card):
+    __slots__ = ('id', 'text', 'text_html', 'pub_date', 'author', 'group')
+    models = ('posts.post', 'posts.archivedpost')
+
+    def __init__(self, id, text, text_html, pub_date, author, group):
+        self.id = id
+        self.text = text
+        self.text_html = text_html
+        self.pub_date = pub_date
+        self.author = author
+        self.group = group
+
+    @property
+    def author_id(self):
+        return self.author.id
+
+    @property
+    def group_id(self):
+        return self.group.id if self.group else None
+
+    def __str__(self):
+        return self.text[:15]
+
+
+def build_cards(rows):
+    """Карточки из строк CARD_FIELDS; авторы и группы страницы общие."""
+    authors, groups = {}, {}
+    cards = []
+    for (post_id, text, text_html, pub_date, author_id, username,
+         first_name, last_name, group_id, slug, title) in rows:
+        author = authors.get(author_id)
+        if author is None:
+            author = authors[author_id] = AuthorCard(
+                author_id, username, first_name, last_name)
+        group = None
+        if group_id is not None:
+            group = groups.get(group_id)
+            if group is None:
+                group = groups[group_id] = GroupCard(group_id, slug, title)
+        cards.append(
+            PostCard(post_id, text, text_html, pub_date, author, group))
+    return cards
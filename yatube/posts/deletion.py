@@ -0,0 +1,93 @@
+from django.db import transaction
+
+from . import background, bulk, shards
+from .models import GroupAuthorStats, GroupStats, MonthlyPostCount, Post
+from .stats import author_scope, group_scope
+
+
+class OrphanedRowsError(Exception):
+    """После удаления остались строки, ссылающиеся на удалённый объект."""
+
+
+def _leftovers(querysets):
+    found = {name: qs.count() for name, qs in querysets.items()}
+    return {name: count for name, count in found.items() if count}
+
+
+def _archived(**lookups):
+    return {f'archived_posts@{queryset.db}': queryset
+            for queryset in shards.archived(**lookups)}
+
+
+def user_leftovers(user_id):
+    return _leftovers({
+        'posts': Post.objects.filter(author_id=user_id),
+        **_archived(author_id=user_id),
+        'group_author_stats': GroupAuthorStats.objects.filter(
+            author_id=user_id),
+        'month_counts': MonthlyPostCount.objects.filter(
+            scope=author_scope(user_id)),
+    })
+
+
+def group_leftovers(group_id):
+    return _leftovers({
+        'posts': Post.objects.filter(group_id=group_id),
+        **_archived(group_id=group_id),
+        'group_stats': GroupStats.objects.filter(group_id=group_id),
+        'group_author_stats': GroupAuthorStats.objects.filter(
+            group_id=group_id),
+        'month_counts': MonthlyPostCount.objects.filter(
+            scope=group_scope(group_id)),
+    })
+
+
+def _verify(name, leftovers):
+    if leftovers:
+        raise OrphanedRowsError(f'{name}: {leftovers}')
+
+
+def delete_user(user, **kwargs):
+    """Удаляет пользователя, снимая каскад на посты пачками.
+
+    Посты удаляются короткими транзакциями через bulk, поэтому
+    финальный user.delete() трогает только мелкие связанные строки.
+    """
+    user_id = user.pk
+    count = sum(bulk.delete_posts(posts, **kwargs)
+                for posts in shards.post_querysets(author_id=user_id))
+    with transaction.atomic():
+        user.delete()
+    _verify(f'user {user_id}', user_leftovers(user_id))
+    return count
+
+
+def delete_group(group, **kwargs):
+    """Удаляет группу, обнуляя group у её постов пачками (SET_NULL)."""
+    group_id = group.pk
+    count = sum(bulk.move_posts(posts, None, **kwargs)
+                for posts in shards.post_querysets(group_id=group_id))
+    with transaction.atomic():
+        group.delete()
+    _verify(f'group {group_id}', group_leftovers(group_id))
+    return count
+
+
+def _delete_by_pk(function, model, pk):
+    # объект могли удалить раньше, чем до него дошла очередь
+    obj = model.objects.filter(pk=pk).first()
+    if obj is not None:
+        function(obj)
+
+
+def delete_in_background(function, obj):
+    """Удаляет obj через function в фоне (см. posts.background)."""
+    background.run(_delete_by_pk, function, type(obj), obj.pk)
+
+
+def delete_user_in_background(user):
+    delete_in_background(delete_user, user)
+
+
+def delete_group_in_background(group):
+    delete_in_background(delete_group, group)
@@ -0,0 +1,171 @@
+"""RSS и Atom лент сайта, групп и авторов."""
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed
+from django.utils.http import http_date, parse_etags, quote_etag
+from django.utils.text import Truncator
+
+from . import identity
+from .cache import (SITE, author_version_scope, group_version_scope,
+                    page_key)
+from .models import Group, User
+from .partitions import PartitionedPosts
+
+# только то, что попадает в ленту: без лишних полей и целых моделей
+ITEM_FIELDS = ('id', 'text', 'text_html', 'pub_date', 'author__username',
+               'author__first_name', 'author__last_name')
+
+
+class PostsFeed(Feed):
+    feed_type = Rss201rev2Feed
+    title = 'Yatube: последние записи'
+    description = 'Новые записи всех авторов'
+
+    def link(self):
+        return reverse('posts:index')
+
+    def get_posts(self, obj):
+        return PartitionedPosts.filter(select_related=False)
+
+    def items(self, obj):
+        return (self.get_posts(obj).values(*ITEM_FIELDS)
+                [:settings.SYNDICATION_ITEMS])
+
+    def item_title(self, item):
+        return Truncator(item['text']).chars(50)
+
+    def item_description(self, item):
+        return item['text_html']
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=[item['id']])
+
+    def item_pubdate(self, item):
+        return item['pub_date']
+
+    def item_author_name(self, item):
+        full_name = (f"{item['author__first_name']} "
+                     f"{item['author__last_name']}").strip()
+        return full_name or item['author__username']
+
+
+class GroupFeed(PostsFeed):
+
+    def get_object(self, request, slug):
+        return identity.get_object_or_404(Group, slug=slug)
+
+    def title(self, obj):
+        return f'Yatube: {obj.title}'
+
+    def description(self, obj):
+        return obj.description
+
+    def link(self, obj):
+        return reverse('posts:group_list', args=[obj.slug])
+
+    def get_posts(self, obj):
+        return PartitionedPosts.filter(select_related=False, group=obj)
+
+
+class AuthorFeed(PostsFeed):
+
+    def get_object(self, request, username):
+        return identity.get_object_or_404(User, username=username)
+
+    def title(self, obj):
+        return f'Yatube: {obj.get_full_name() or obj.username}'
+
+    def description(self, obj):
+        return f'Записи пользователя {obj.username}'
+
+    def link(self, obj):
+        return reverse('posts:profile', args=[obj.username])
+
+    def get_posts(self, obj):
+        return PartitionedPosts.filter(select_related=False, author=obj)
+
+
+def _atom(feed_class):
+    return type(f'Atom{feed_class.__name__}', (feed_class,), {
+        'feed_type': Atom1Feed,
+        'subtitle': feed_class.description,
+    })
+
+
+FEEDS = {
+    'site': {'rss': PostsFeed(), 'atom': _atom(PostsFeed)()},
+    'group': {'rss': GroupFeed(), 'atom': _atom(GroupFeed)()},
+    'author': {'rss': AuthorFeed(), 'atom': _atom(AuthorFeed)()},
+}
+
+
+def _render(feed, request, kwargs):
+    response = feed(request, **kwargs)
+    return response.content, response['Content-Type'], time.time()
+
+
+def _respond(request, etag, entry):
+    content, content_type, last_modified = entry
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified))
+    if response is None:
+        response = HttpResponse(content, content_type=content_type)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
+
+
+def serve_feed(request, kind, feed_type, scopes, **kwargs):
+    """Отдаёт ленту с ETag и Last-Modified, а повторные запросы — 304.
+
+    ETag — ключ кэша, в который входят версии разделов, поэтому его
+    можно сверить с If-None-Match, не читая ни ленту, ни базу.
+    """
+    feed = FEEDS[kind].get(feed_type)
+    if feed is None:
+        raise Http404('Неизвестный формат ленты')
+    timeout = settings.SYNDICATION_CACHE_TIMEOUT
+    if not timeout:
+        entry = _render(feed, request, kwargs)
+        digest = hashlib.md5(entry[0]).hexdigest()
+        return _respond(request, quote_etag(digest), entry)
+    # в ленте абсолютные ссылки, поэтому хост — часть ключа
+    key = page_key(request.get_host() + request.path, scopes)
+    etag = quote_etag(key.rsplit(':', 1)[-1])
+    if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+    entry = cache.get(key)
+    if entry is None:
+        entry = _render(feed, request, kwargs)
+        cache.set(key, entry, timeout)
+    return _respond(request, etag, entry)
+
+
+def site_feed(request, feed_type):
+    return serve_feed(request, 'site', feed_type, [SITE])
+
+
+# объект ищется до ключа кэша: иначе get_versions завёл бы бессрочную
+# версию для любого slug или имени из адреса ещё до ответа 404
+
+def group_feed(request, slug, feed_type):
+    group = identity.get_object_or_404(Group, slug=slug)
+    return serve_feed(request, 'group', feed_type,
+                      [group_version_scope(group.slug)], slug=slug)
+
+
+def author_feed(request, username, feed_type):
+    author = identity.get_object_or_404(User, username=username)
+    return serve_feed(request, 'author', feed_type,
+                      [author_version_scope(author.username)],
+                      username=username)
@@ -1,4 +1,6 @@
 from django import forms
+from django.core.exceptions import ValidationError
+from django.urls import reverse
 
 from .models import Post
 
@@ -7,3 +9,17 @@ class PostForm(forms.ModelForm):
     class Meta:
         model = Post
         fields = ("text", "group",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # групп могут быть тысячи: в <select> только выбранная,
+        # остальные подсказывает автодополнение (js/autocomplete.js)
+        field = self.fields['group']
+        try:
+            group = field.to_python(self['group'].value())
+        except ValidationError:
+            group = None
+        field.widget.choices = [('', field.empty_label)] + (
+            [(group.pk, str(group))] if group else [])
+        field.widget.attrs['data-autocomplete'] = reverse(
+            'posts:autocomplete', args=['groups'])
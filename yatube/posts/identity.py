@@ -0,0 +1,97 @@
+"""Кэш групп и пользователей в памяти процесса.
+
+Группы и авторы меняются редко, а ищутся по слагу и username почти
+в каждом запросе к лентам. Процесс держит последние найденные строки
+в LRU, а актуальность сверяет с общей версией модели в кэше: правка
+в любом воркере меняет версию, и остальные перестают доверять своим
+копиям не позже чем через IDENTITY_CACHE_CHECK_INTERVAL секунд.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.http import Http404
+
+from . import cache as feed_cache
+
+_entries = OrderedDict()
+_versions = {}
+_lock = threading.Lock()
+
+
+def _scope(model):
+    return f'identity:{model._meta.label_lower}'
+
+
+def _version(model):
+    """Общая версия модели, перечитываемая не чаще раза в интервал."""
+    scope = _scope(model)
+    now = time.monotonic()
+    version, checked = _versions.get(scope, (None, None))
+    if checked is None or (now - checked
+                           >= settings.IDENTITY_CACHE_CHECK_INTERVAL):
+        version, = feed_cache.get_versions([scope])
+        _versions[scope] = (version, now)
+    return version
+
+
+def invalidate(model):
+    """Сбрасывает кэш модели во всех процессах после коммита правки.
+
+    До коммита любой процесс прочитал бы из базы ещё старую строку.
+    """
+    transaction.on_commit(lambda: _invalidate(model))
+
+
+def _invalidate(model):
+    scope = _scope(model)
+    feed_cache.invalidate([scope])
+    with _lock:
+        _versions.pop(scope, None)
+        for key in [key for key in _entries if key[0] == scope]:
+            del _entries[key]
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+        _versions.clear()
+
+
+def get(model, field, value):
+    """Объект model с field=value или None, по возможности из памяти.
+
+    В памяти хранятся значения полей, а не сам объект: каждый вызов
+    получает свой экземпляр, и правки в одном запросе не видны другим.
+    """
+    size = settings.IDENTITY_CACHE_SIZE
+    if not size:
+        return model.objects.filter(**{field: value}).first()
+    key = (_scope(model), field, value)
+    version = _version(model)
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry[0] == version:
+            _entries.move_to_end(key)
+            return model.from_db(DEFAULT_DB_ALIAS, *entry[1:])
+    obj = model.objects.filter(**{field: value}).first()
+    if obj is None:
+        return None
+    attnames = tuple(field.attname for field in model._meta.concrete_fields)
+    values = tuple(getattr(obj, attname) for attname in attnames)
+    with _lock:
+        _entries[key] = (version, attnames, values)
+        _entries.move_to_end(key)
+        while len(_entries) > size:
+            _entries.popitem(last=False)
+    return obj
+
+
+def get_object_or_404(model, **lookup):
+    (field, value), = lookup.items()
+    obj = get(model, field, value)
+    if obj is None:
+        raise Http404(f'{model._meta.object_name} не найден')
+    return obj
@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import shards
+from posts.models import Group
+
+User = get_user_model()
+
+
+class BulkCommand(BaseCommand):
+    """Команда, которая меняет посты пачками короткими транзакциями."""
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            help='число постов в одной транзакции')
+
+    def get_object(self, model, **lookup):
+        try:
+            return model.objects.get(**lookup)
+        except model.DoesNotExist:
+            raise CommandError(f'Не найдено: {lookup}')
+
+    def progress(self, done, total):
+        self.stdout.write(f'{done}/{total}')
+
+    def bulk_kwargs(self, options):
+        return {
+            'batch_size': options['batch_size'],
+            'progress': self.progress if options['verbosity'] else None,
+        }
+
+
+class BulkPostsCommand(BulkCommand):
+    """Общие параметры отбора постов для массовых операций."""
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--group', help='slug группы')
+        parser.add_argument('--author', help='username автора')
+
+    def get_querysets(self, options):
+        """Отобранные посты: свежие и архивные обрабатываются одинаково."""
+        if not options['group'] and not options['author']:
+            raise CommandError('Укажите --group и/или --author')
+        lookups = {}
+        if options['group']:
+            lookups['group'] = self.get_object(Group, slug=options['group'])
+        if options['author']:
+            lookups['author'] = self.get_object(User,
+                                                username=options['author'])
+        return shards.post_querysets(**lookups)
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import bulk
+from posts.models import Post
+from posts.partitions import archive_cutoff
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые посты в архивную таблицу пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', type=int, metavar='DAYS',
+            help='возраст постов в днях (по умолчанию '
+                 'POST_ARCHIVE_AFTER_DAYS)')
+        parser.add_argument('--batch-size', type=int,
+                            help='число постов в одной транзакции')
+
+    def progress(self, done, total):
+        self.stdout.write(f'{done}/{total}')
+
+    def handle(self, *args, **options):
+        days = options['older_than']
+        if days is None:
+            days = settings.POST_ARCHIVE_AFTER_DAYS
+        posts = Post.objects.filter(pub_date__lt=archive_cutoff(days))
+        count = bulk.archive_posts(
+            posts, batch_size=options['batch_size'],
+            progress=self.progress if options['verbosity'] else None)
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено в архив постов: {count}'))
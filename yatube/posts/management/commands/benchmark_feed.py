@@ -0,0 +1,66 @@
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.shortcuts import render
+from django.test import RequestFactory, override_settings
+
+from posts.partitions import PartitionedPosts
+
+SOURCES = (
+    ('модели', PartitionedPosts.filter),
+    ('карточки', PartitionedPosts.cards),
+)
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает время и память страницы ленты из моделей '
+            'и из карточек PostCard')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=100,
+                            help='сколько раз строить страницу')
+        parser.add_argument('--page', type=int, default=1,
+                            help='номер страницы ленты')
+
+    def build(self, source, number):
+        return Paginator(source(), settings.PAGE_POST).page(number)
+
+    def render(self, page):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        return render(request, 'posts/index.html', {'page_obj': page})
+
+    def measure(self, step, repeat):
+        """Среднее время шага, пик памяти и сколько памяти держит результат."""
+        step()
+        tracemalloc.start()
+        result = step()
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del result
+        started = time.perf_counter()
+        for _ in range(repeat):
+            step()
+        return (time.perf_counter() - started) / repeat, peak, retained
+
+    def handle(self, *args, **options):
+        repeat, number = options['repeat'], options['page']
+        # сравниваем сам рендеринг, а не попадания в кэш карточек
+        with override_settings(POST_CARD_CACHE_TIMEOUT=0):
+            for name, source in SOURCES:
+                page = self.build(source, number)
+                build_time, build_peak, retained = self.measure(
+                    lambda: list(self.build(source, number)), repeat)
+                render_time, render_peak, _ = self.measure(
+                    lambda: self.render(page), repeat)
+                self.stdout.write(
+                    f'{name:>9}: {len(page)} постов, '
+                    f'выборка {build_time * 1000:.2f} мс, '
+                    f'пик {build_peak / 1024:.1f} КБ, '
+                    f'объекты {retained / 1024:.1f} КБ; '
+                    f'рендеринг {render_time * 1000:.2f} мс, '
+                    f'пик {render_peak / 1024:.1f} КБ')
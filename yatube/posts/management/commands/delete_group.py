@@ -0,0 +1,23 @@
+from django.core.management.base import CommandError
+
+from posts import deletion
+from posts.models import Group
+
+from ._bulk import BulkCommand
+
+
+class Command(BulkCommand):
+    help = 'Удаляет группу, отвязывая её посты пачками'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('slug')
+
+    def handle(self, *args, **options):
+        group = self.get_object(Group, slug=options['slug'])
+        try:
+            count = deletion.delete_group(group, **self.bulk_kwargs(options))
+        except deletion.OrphanedRowsError as error:
+            raise CommandError(f'Остались связанные строки: {error}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Группа удалена, отвязано постов: {count}'))
@@ -0,0 +1,12 @@
+from posts import bulk
+
+from ._bulk import BulkPostsCommand
+
+
+class Command(BulkPostsCommand):
+    help = 'Удаляет посты пачками'
+
+    def handle(self, *args, **options):
+        count = sum(bulk.delete_posts(posts, **self.bulk_kwargs(options))
+                    for posts in self.get_querysets(options))
+        self.stdout.write(self.style.SUCCESS(f'Удалено постов: {count}'))
@@ -0,0 +1,22 @@
+from django.core.management.base import CommandError
+
+from posts import deletion
+
+from ._bulk import BulkCommand, User
+
+
+class Command(BulkCommand):
+    help = 'Удаляет пользователя, удаляя его посты пачками'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('username')
+
+    def handle(self, *args, **options):
+        user = self.get_object(User, username=options['username'])
+        try:
+            count = deletion.delete_user(user, **self.bulk_kwargs(options))
+        except deletion.OrphanedRowsError as error:
+            raise CommandError(f'Остались связанные строки: {error}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Пользователь удалён, удалено постов: {count}'))
@@ -0,0 +1,93 @@
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import Resolver404, resolve
+
+from core import stampede
+from posts import cache as feed_cache
+
+SCOPES = {
+    'posts:index': lambda: [feed_cache.SITE],
+    'posts:group_list': lambda slug: [feed_cache.group_version_scope(slug)],
+    'posts:profile': lambda username: [
+        feed_cache.author_version_scope(username)],
+}
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный тест: много анонимных клиентов одновременно '
+            'открывают ленту сразу после того, как её копия устарела')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/',
+                            help='главная, лента группы или профиль')
+        parser.add_argument('--clients', type=int, default=16,
+                            help='одновременных запросов')
+        parser.add_argument('--rounds', type=int, default=5,
+                            help='сколько раз устаревает копия')
+
+    def scopes(self, path):
+        try:
+            match = resolve(path.split('?')[0])
+        except Resolver404:
+            raise CommandError(f'Адрес {path} не найден')
+        if match.view_name not in SCOPES:
+            raise CommandError(f'{path} не кэшируемая лента')
+        return SCOPES[match.view_name](**match.kwargs)
+
+    def host(self):
+        host = (settings.ALLOWED_HOSTS or ['localhost'])[0].lstrip('.')
+        return 'localhost' if host == '*' else host
+
+    def burst(self, path, clients):
+        """Одновременные запросы; возвращает их длительности."""
+        barrier = threading.Barrier(clients)
+        latencies = []
+
+        def request():
+            client = Client(HTTP_HOST=self.host())
+            barrier.wait()
+            started = time.perf_counter()
+            try:
+                client.get(path)
+            finally:
+                latencies.append(time.perf_counter() - started)
+                connection.close()
+
+        threads = [threading.Thread(target=request) for _ in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return latencies
+
+    def run(self, path, scopes, clients, rounds):
+        Client(HTTP_HOST=self.host()).get(path)
+        before = stampede.stats.copy()
+        latencies = []
+        for _ in range(rounds):
+            feed_cache.invalidate(scopes)
+            latencies += self.burst(path, clients)
+        outcomes = stampede.stats - before
+        return outcomes, latencies
+
+    def handle(self, *args, **options):
+        path, clients = options['path'], options['clients']
+        rounds = options['rounds']
+        scopes = self.scopes(path)
+        for protection in (False, True):
+            with override_settings(FEED_CACHE_TIMEOUT=60,
+                                   STAMPEDE_PROTECTION=protection):
+                outcomes, latencies = self.run(path, scopes, clients, rounds)
+            name = 'с защитой' if protection else 'без защиты'
+            self.stdout.write(
+                f'{name:>10}: пересчётов {outcomes["computed"] / rounds:.1f} '
+                f'на {clients} запросов, устаревших копий '
+                f'{outcomes["stale"]}, дождались {outcomes["waited"]}; '
+                f'медиана {statistics.median(latencies) * 1000:.1f} мс, '
+                f'максимум {max(latencies) * 1000:.1f} мс')
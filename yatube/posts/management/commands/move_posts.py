@@ -0,0 +1,24 @@
+from posts import bulk
+from posts.models import Group
+
+from ._bulk import BulkPostsCommand
+
+
+class Command(BulkPostsCommand):
+    help = 'Переносит посты в другую группу пачками'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--to-group', help='slug новой группы')
+        target.add_argument('--no-group', action='store_true',
+                            help='убрать посты из групп')
+
+    def handle(self, *args, **options):
+        group = None
+        if options['to_group']:
+            group = self.get_object(Group, slug=options['to_group'])
+        count = sum(
+            bulk.move_posts(posts, group, **self.bulk_kwargs(options))
+            for posts in self.get_querysets(options))
+        self.stdout.write(self.style.SUCCESS(f'Перенесено постов: {count}'))
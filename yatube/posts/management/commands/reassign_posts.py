@@ -0,0 +1,19 @@
+from posts import bulk
+
+from ._bulk import BulkPostsCommand, User
+
+
+class Command(BulkPostsCommand):
+    help = 'Передаёт посты другому автору пачками'
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--to-author', required=True,
+                            help='username нового автора')
+
+    def handle(self, *args, **options):
+        author = self.get_object(User, username=options['to_author'])
+        count = sum(
+            bulk.reassign_posts(posts, author, **self.bulk_kwargs(options))
+            for posts in self.get_querysets(options))
+        self.stdout.write(self.style.SUCCESS(f'Передано постов: {count}'))
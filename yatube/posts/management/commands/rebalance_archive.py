@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts import bulk, shards
+
+
+class Command(BaseCommand):
+    help = ('Раскладывает архивные посты по базам их периодов '
+            '(ARCHIVE_SHARDS) пачками')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            help='число постов в одной транзакции')
+
+    def progress(self, done, total):
+        self.stdout.write(f'{done}/{total}')
+
+    def handle(self, *args, **options):
+        count = 0
+        for alias in shards.archive_aliases():
+            count += bulk.rebalance_archive(
+                shards.misplaced(alias), batch_size=options['batch_size'],
+                progress=self.progress if options['verbosity'] else None)
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено между базами постов: {count}'))
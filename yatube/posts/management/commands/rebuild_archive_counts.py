@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts.stats import rebuild_month_counts
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает помесячные счётчики постов для архива'
+
+    def handle(self, *args, **options):
+        count = rebuild_month_counts()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитаны счётчики за месяцы: {count}'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts.stats import rebuild_group_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает агрегаты для каталога групп'
+
+    def handle(self, *args, **options):
+        count = rebuild_group_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитаны агрегаты групп: {count}'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from posts import bulk, shards
+
+
+class Command(BaseCommand):
+    help = 'Заново готовит HTML текста всех постов пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            help='число постов в одной транзакции')
+
+    def progress(self, done, total):
+        self.stdout.write(f'{done}/{total}')
+
+    def handle(self, *args, **options):
+        count = 0
+        for posts in shards.post_querysets():
+            count += bulk.render_posts(
+                posts, batch_size=options['batch_size'],
+                progress=self.progress if options['verbosity'] else None)
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлён HTML постов: {count}'))
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.cache import pages_to_warm, warm_pages
+
+
+class Command(BaseCommand):
+    help = 'Прогревает кэш популярных страниц после выкладки'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=50,
+                            help='сколько страниц прогреть')
+        parser.add_argument('--workers', type=int,
+                            default=settings.WARM_CACHES_WORKERS,
+                            help='число параллельных потоков')
+
+    def handle(self, *args, **options):
+        if not settings.FEED_CACHE_TIMEOUT:
+            self.stderr.write('FEED_CACHE_TIMEOUT = 0, кэш лент выключен')
+            return
+        paths = pages_to_warm(options['limit'])
+        warmed = 0
+        for path, status in warm_pages(paths, options['workers']):
+            self.stdout.write(f'{status} {path}')
+            warmed += status == 200
+        self.stdout.write(self.style.SUCCESS(
+            f'Прогрето страниц: {warmed} из {len(paths)}'))
@@ -0,0 +1,11 @@
+"""HTML текста поста: абзацы, переносы строк и ссылки.
+
+Текст сначала целиком экранируется, и единственная разметка в
+результате — та, что добавили urlize и linebreaks, поэтому HTML
+безопасно выводить без повторного экранирования.
+"""
+from django.utils.html import linebreaks, urlize
+
+
+def render_text(text):
+    return linebreaks(urlize(text, nofollow=True, autoescape=True))
@@ -0,0 +1,65 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:05
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_month_counts(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    MonthlyPostCount = apps.get_model('posts', 'MonthlyPostCount')
+    counts = Counter()
+    posts = Post.objects.values_list('pub_date', 'group_id', 'author_id')
+    for pub_date, group_id, author_id in posts.iterator():
+        pub_date = timezone.localtime(pub_date)
+        month = (pub_date.year, pub_date.month)
+        counts['site', month] += 1
+        counts[f'author:{author_id}', month] += 1
+        if group_id is not None:
+            counts[f'group:{group_id}', month] += 1
+    MonthlyPostCount.objects.bulk_create(
+        MonthlyPostCount(scope=scope, year=year, month=month,
+                         posts_count=count)
+        for (scope, (year, month)), count in counts.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_groupstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyPostCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=50, verbose_name='Раздел')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='Год')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='Месяц')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Всего постов')),
+            ],
+            options={
+                'ordering': ['-year', '-month'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['pub_date'], name='posts_post_pub_dat_471922_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['group', 'pub_date'], name='posts_post_group_i_5ba9fa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['author', 'pub_date'], name='posts_post_author__b65dbb_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='monthlypostcount',
+            unique_together={('scope', 'year', 'month')},
+        ),
+        migrations.RunPython(fill_month_counts, migrations.RunPython.noop),
+    ]
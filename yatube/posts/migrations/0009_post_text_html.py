@@ -0,0 +1,49 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:47
+
+from django.db import migrations, models
+
+from posts.markup import render_text
+from posts.search import install_fts
+
+BATCH_SIZE = 1000
+
+
+def render_html(apps, schema_editor):
+    """Заполняет text_html существующих постов пачками по id."""
+    for name in ('Post', 'ArchivedPost'):
+        model = apps.get_model('posts', name)
+        last_pk = 0
+        while True:
+            posts = list(model.objects.filter(pk__gt=last_pk)
+                         .order_by('pk').only('pk', 'text')[:BATCH_SIZE])
+            if not posts:
+                break
+            for post in posts:
+                post.text_html = render_text(post.text)
+            model.objects.bulk_update(posts, ['text_html'])
+            last_pk = posts[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_archivedpost'),
+    ]
+
+    operations = [
+        # при откате SQLite пересоздаст posts_post без триггеров FTS,
+        # эта операция откатывается последней и возвращает их
+        migrations.RunPython(migrations.RunPython.noop, install_fts),
+        migrations.AddField(
+            model_name='archivedpost',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML текста'),
+        ),
+        migrations.RunPython(install_fts, migrations.RunPython.noop),
+        migrations.RunPython(render_html, migrations.RunPython.noop),
+    ]
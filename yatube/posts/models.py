@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .markup import render_text
+
 User = get_user_model()
 
 
@@ -16,6 +18,9 @@ class Group(models.Model):
 class Post(models.Model):
     text = models.TextField(blank=False, verbose_name='Текст',
                             help_text='Введите текст')
+    # готовый HTML текста, шаблоны выводят его как есть
+    text_html = models.TextField(blank=True, editable=False,
+                                 verbose_name='HTML текста')
     pub_date = models.DateTimeField(auto_now_add=True,
                                     verbose_name='Дата публикации')
     author = models.ForeignKey(
@@ -36,6 +41,141 @@ class Post(models.Model):
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['pub_date']),
+            models.Index(fields=['group', 'pub_date']),
+            models.Index(fields=['author', 'pub_date']),
+        ]
 
     def __str__(self):
         return self.text[:15]
+
+    def save(self, *args, **kwargs):
+        # HTML готовится один раз при записи, а не при каждом показе
+        self.text_html = render_text(self.text)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'text_html'}
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # запоминаем исходную группу, чтобы при переносе поста
+        # поправить агрегаты обеих групп
+        loaded = dict(zip(field_names, values))
+        instance._loaded_group_id = loaded.get('group_id')
+        return instance
+
+
+class ArchivedPost(models.Model):
+    """Старые посты, перенесённые из Post командой archive_posts.
+
+    id сохраняется, поэтому адреса постов после переноса не меняются.
+    Все архивные посты старше всех постов в Post. Периоды из
+    ARCHIVE_SHARDS лежат в отдельных базах (posts.shards).
+    """
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField(verbose_name='Текст')
+    text_html = models.TextField(blank=True, editable=False,
+                                 verbose_name='HTML текста')
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+    # без ограничений в базе: таблица может лежать в шарде
+    # (posts.shards), где нет пользователей и групп
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        db_constraint=False,
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        related_name='archived_posts',
+        blank=True,
+        null=True,
+        db_constraint=False,
+        verbose_name='Группа'
+    )
+
+    class Meta:
+        ordering = ['-pub_date']
+        indexes = [
+            models.Index(fields=['pub_date']),
+            models.Index(fields=['group', 'pub_date']),
+            models.Index(fields=['author', 'pub_date']),
+        ]
+
+    def __str__(self):
+        return self.text[:15]
+
+
+class GroupStats(models.Model):
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Группа'
+    )
+    posts_count = models.PositiveIntegerField(default=0,
+                                              verbose_name='Всего постов')
+    last_pub_date = models.DateTimeField(blank=True, null=True,
+                                         verbose_name='Последний пост')
+    top_authors = models.TextField(blank=True,
+                                   verbose_name='Самые активные авторы')
+
+    class Meta:
+        ordering = ['-posts_count']
+        indexes = [
+            models.Index(fields=['-posts_count']),
+        ]
+
+    def __str__(self):
+        return str(self.group)
+
+    @property
+    def top_authors_list(self):
+        return [name for name in self.top_authors.split(',') if name]
+
+
+class GroupAuthorStats(models.Model):
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='author_stats',
+        verbose_name='Группа'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='group_stats',
+        verbose_name='Автор'
+    )
+    posts_count = models.PositiveIntegerField(default=0,
+                                              verbose_name='Всего постов')
+
+    class Meta:
+        unique_together = ('group', 'author')
+        indexes = [
+            models.Index(fields=['group', '-posts_count']),
+        ]
+
+    def __str__(self):
+        return f'{self.group}: {self.author}'
+
+
+class MonthlyPostCount(models.Model):
+    scope = models.CharField(max_length=50, verbose_name='Раздел')
+    year = models.PositiveSmallIntegerField(verbose_name='Год')
+    month = models.PositiveSmallIntegerField(verbose_name='Месяц')
+    posts_count = models.PositiveIntegerField(default=0,
+                                              verbose_name='Всего постов')
+
+    class Meta:
+        ordering = ['-year', '-month']
+        unique_together = ('scope', 'year', 'month')
+
+    def __str__(self):
+        return f'{self.scope} {self.month:02}.{self.year}'
@@ -0,0 +1,52 @@
+"""Панель django-debug-toolbar с временем рендеринга карточек постов."""
+import threading
+from collections import defaultdict
+
+from debug_toolbar.panels import Panel
+
+from .signals import fragment_rendered
+
+
+class FragmentPanel(Panel):
+    """Карточки post_card: сколько отрендерено, сколько взято из кэша."""
+    title = 'Фрагменты'
+    template = 'posts/panels/fragments.html'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fragments = []
+        self._thread = None
+
+    def receive(self, sender, template_name, post_id, duration, cached,
+                **kwargs):
+        # получатель общий для всех потоков runserver
+        if threading.get_ident() == self._thread:
+            self.fragments.append({
+                'template': template_name, 'post_id': post_id,
+                'time': duration * 1000, 'cached': cached,
+            })
+
+    def enable_instrumentation(self):
+        self._thread = threading.get_ident()
+        fragment_rendered.connect(self.receive, weak=False)
+
+    def disable_instrumentation(self):
+        fragment_rendered.disconnect(self.receive)
+
+    def totals(self):
+        totals = defaultdict(lambda: {'count': 0, 'cached': 0, 'time': 0.0})
+        for fragment in self.fragments:
+            row = totals[fragment['template']]
+            row['count'] += 1
+            row['cached'] += fragment['cached']
+            row['time'] += fragment['time']
+        return sorted(totals.items())
+
+    @property
+    def nav_subtitle(self):
+        total = sum(fragment['time'] for fragment in self.fragments)
+        return f'карточек {len(self.fragments)}, {total:.1f} мс'
+
+    def generate_stats(self, request, response):
+        self.record_stats({'totals': self.totals(),
+                           'fragments': self.fragments})
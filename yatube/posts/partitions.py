@@ -0,0 +1,109 @@
+"""Чтение постов сразу из свежей Post и архивной ArchivedPost.
+
+Архив получает только посты старше порога, поэтому в порядке -pub_date
+все свежие посты идут раньше всех архивных. Срез ленты берётся из Post,
+пока хватает свежих постов, и только дальше уходит в архив: строки первых
+страниц читаются из небольшой таблицы. Архив участвует в них только
+подсчётом для пагинатора, по индексу. Сам архив может быть разложен по
+базам-шардам (см. posts.shards): тогда его части идут от новых периодов
+к старым.
+"""
+import datetime
+
+from django.utils import timezone
+
+from . import shards
+from .cards import CARD_FIELDS, build_cards
+from .models import Post
+
+
+class PartitionedPosts:
+    """Последовательность постов для Paginator поверх нескольких queryset.
+
+    parts — то, из чего берутся строки, count_from — те же выборки
+    без values_list для подсчёта.
+    """
+    ordered = True
+
+    def __init__(self, parts, convert=list, count_from=None):
+        self.parts = parts
+        self.convert = convert
+        # COUNT по queryset с values_list тащил бы за собой JOIN-ы
+        self.count_from = count_from or parts
+        self._counts = {}
+
+    @staticmethod
+    def querysets(**lookups):
+        return [Post.objects.filter(**lookups),
+                *shards.archive_parts(**lookups)]
+
+    @classmethod
+    def filter(cls, select_related=True, **lookups):
+        querysets = cls.querysets(**lookups)
+        if select_related:
+            return cls([shards.with_related(queryset)
+                        for queryset in querysets], count_from=querysets)
+        return cls(querysets)
+
+    @classmethod
+    def cards(cls, **lookups):
+        """Те же посты в виде PostCard, одним запросом на срез части."""
+        querysets = cls.querysets(**lookups)
+        return cls([shards.rows(queryset, CARD_FIELDS)
+                    for queryset in querysets],
+                   convert=build_cards, count_from=querysets)
+
+    def values(self, *fields):
+        return type(self)([shards.rows(queryset, fields, named=True)
+                           for queryset in self.count_from],
+                          count_from=self.count_from)
+
+    def part_count(self, number):
+        if number not in self._counts:
+            self._counts[number] = self.count_from[number].count()
+        return self._counts[number]
+
+    def count(self):
+        return sum(self.part_count(number)
+                   for number in range(len(self.parts)))
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        for part in self.parts:
+            yield from self.convert(part)
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        rows = []
+        for number, part in enumerate(self.parts):
+            if stop is not None and stop <= start:
+                break
+            known = self._counts.get(number)
+            found = [] if known is not None and start >= known else list(
+                part[start:stop])
+            rows += found
+            if stop is not None and len(found) == stop - start:
+                break
+            # часть кончилась: следующая продолжает с того же места ленты
+            size = start + len(found) if found else self.part_count(number)
+            start = max(start - size, 0)
+            stop = None if stop is None else stop - size
+        return self.convert(rows)
+
+
+def get_post(**lookups):
+    """Пост из свежей таблицы или, если его там нет, из архива."""
+    for queryset in shards.post_querysets(**lookups):
+        post = shards.with_related(queryset).first()
+        if post is not None:
+            return post
+    return None
+
+
+def archive_cutoff(days):
+    """Посты старше этой даты переносятся в архив."""
+    return timezone.now() - datetime.timedelta(days=days)
@@ -0,0 +1,80 @@
+"""Полнотекстовый поиск по постам через SQLite FTS5."""
+import functools
+
+from django.db import connection
+
+FTS_TABLE = 'posts_post_fts'
+
+CREATE_FTS_SQL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"text, content='posts_post', content_rowid='id')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON posts_post "
+    f"BEGIN INSERT INTO {FTS_TABLE}(rowid, text) "
+    f"VALUES (new.id, new.text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON posts_post "
+    f"BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    f"VALUES ('delete', old.id, old.text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au "
+    f"AFTER UPDATE OF text ON posts_post "
+    f"BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    f"VALUES ('delete', old.id, old.text); "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+DROP_FTS_SQL = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def install_fts(apps, schema_editor):
+    """Создаёт индекс и триггеры.
+
+    SQLite пересоздаёт таблицу при изменении полей, а вместе с ней
+    удаляет триггеры, поэтому миграции, меняющие Post, вызывают это заново.
+    """
+    fts_available.cache_clear()
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in CREATE_FTS_SQL:
+        schema_editor.execute(sql)
+
+
+def uninstall_fts(apps, schema_editor):
+    fts_available.cache_clear()
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_FTS_SQL:
+        schema_editor.execute(sql)
+
+
+@functools.lru_cache(maxsize=None)
+def fts_available():
+    """Есть ли индекс; проверяется раз на процесс, сбрасывают миграции."""
+    if connection.vendor != 'sqlite':
+        return False
+    return FTS_TABLE in connection.introspection.table_names()
+
+
+def fts_query(search_term):
+    """Превращает строку поиска в безопасный запрос FTS5 по префиксам."""
+    terms = search_term.split()
+    return ' '.join('"{}"*'.format(term.replace('"', '""'))
+                    for term in terms)
+
+
+def filter_matching(queryset, search_term):
+    """Оставляет в queryset посты, найденные полнотекстовым индексом.
+
+    Строка из одних пробелов — не запрос: MATCH '' в FTS5 — ошибка.
+    """
+    if not search_term.split():
+        return queryset
+    return queryset.extra(
+        where=[f'"posts_post"."id" IN (SELECT rowid FROM {FTS_TABLE} '
+               f'WHERE {FTS_TABLE} MATCH %s)'],
+        params=[fts_query(search_term)],
+    )
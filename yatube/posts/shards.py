@@ -0,0 +1,256 @@
+"""Архив постов по периодам в отдельных файлах SQLite.
+
+ARCHIVE_SHARDS — список (алиас, 'ГГГГ-ММ' начала, 'ГГГГ-ММ' конца):
+конец не входит в период, None — открытый край. Архивные посты с
+pub_date внутри периода живут в базе алиаса, остальные — в default.
+Свежие посты (Post) всегда в default: там их поиск, счётчики и правка.
+
+В шардах только таблица архива, без пользователей и групп, поэтому
+поля автора и группы дочитываются из default отдельным запросом
+(ShardRows). Лента за период читает только шарды, которые с ним
+пересекаются, от новых периодов к старым: периоды не пересекаются,
+поэтому склеенные части уже упорядочены по -pub_date.
+
+После изменения ARCHIVE_SHARDS:
+
+    python manage.py migrate --database <алиас>
+    python manage.py rebalance_archive
+"""
+import datetime
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ArchivedPost, Group, Post, User
+
+DEFAULT = 'default'
+
+# модели, поля которых ShardRows берёт из default
+RELATED = {'author': User, 'group': Group}
+ARCHIVE_COLUMNS = ('id', 'text', 'text_html', 'pub_date', 'author_id',
+                   'group_id')
+
+
+def _month_start(value):
+    if value is None:
+        return None
+    year, month = map(int, value.split('-'))
+    # границы не зависят от часового пояса посетителя
+    return timezone.make_aware(datetime.datetime(year, month, 1),
+                               timezone.get_default_timezone())
+
+
+class Piece(namedtuple('Piece', 'alias since until')):
+    """Отрезок времени [since, until) и база, где лежит его архив."""
+
+    def overlaps(self, since, until):
+        return ((since is None or self.until is None or since < self.until)
+                and (until is None or self.since is None
+                     or until > self.since))
+
+    def contains(self, moment):
+        return ((self.since is None or self.since <= moment)
+                and (self.until is None or moment < self.until))
+
+    def lookups(self):
+        lookups = {}
+        if self.since is not None:
+            lookups['pub_date__gte'] = self.since
+        if self.until is not None:
+            lookups['pub_date__lt'] = self.until
+        return lookups
+
+
+def shard_aliases():
+    return [alias for alias, _, _ in settings.ARCHIVE_SHARDS]
+
+
+def archive_aliases():
+    return [DEFAULT, *shard_aliases()]
+
+
+def pieces():
+    """Вся ось времени по базам архива, от новых периодов к старым."""
+    shards = sorted(
+        ((_month_start(since), _month_start(until), alias)
+         for alias, since, until in settings.ARCHIVE_SHARDS),
+        key=lambda shard: (shard[0] is not None, shard[0]))
+    result = []
+    # начало ещё не распределённой части оси; после первого шарда
+    # None значит, что ось уже закрыта шардом без конца
+    cursor, first = None, True
+    for since, until, alias in shards:
+        if not first and (cursor is None or since is None or since < cursor):
+            raise ImproperlyConfigured(
+                f'ARCHIVE_SHARDS: период {alias} пересекается с другим')
+        if None not in (since, until) and until <= since:
+            raise ImproperlyConfigured(
+                f'ARCHIVE_SHARDS: у {alias} конец раньше начала')
+        if since is not None and (first or since > cursor):
+            result.append(Piece(DEFAULT, cursor, since))
+        result.append(Piece(alias, since, until))
+        cursor, first = until, False
+    if first or cursor is not None:
+        result.append(Piece(DEFAULT, cursor, None))
+    return result[::-1]
+
+
+def alias_for(pub_date):
+    """База, в которой должен лежать архивный пост с этой датой."""
+    for piece in pieces():
+        if piece.contains(pub_date):
+            return piece.alias
+    return DEFAULT
+
+
+def plan(since=None, until=None):
+    """Куски архива, которые пересекаются с [since, until)."""
+    return [piece for piece in pieces() if piece.overlaps(since, until)]
+
+
+def archive_parts(**lookups):
+    """Querysets архива по кускам плана для этих условий, от новых к старым.
+
+    Из условий план берёт только pub_date__gte и pub_date__lt.
+    """
+    return [
+        ArchivedPost.objects.using(piece.alias).filter(
+            **piece.lookups()).filter(**lookups)
+        for piece in plan(lookups.get('pub_date__gte'),
+                          lookups.get('pub_date__lt'))
+    ]
+
+
+def archived(**lookups):
+    """Архив в каждой базе целиком, без разбиения по периодам."""
+    return [ArchivedPost.objects.using(alias).filter(**lookups)
+            for alias in archive_aliases()]
+
+
+def post_querysets(**lookups):
+    """Свежие посты и архив во всех базах."""
+    return [Post.objects.filter(**lookups), *archived(**lookups)]
+
+
+def any_archived():
+    return any(queryset.exists() for queryset in archived())
+
+
+def in_shard(queryset):
+    return queryset.db in shard_aliases()
+
+
+def with_related(queryset):
+    """Посты с авторами и группами: из шарда JOIN в default невозможен."""
+    if in_shard(queryset):
+        return queryset.prefetch_related('author', 'group')
+    return queryset.select_related('author', 'group')
+
+
+def rows(queryset, fields, named=False):
+    """values()/values_list() по queryset из любой базы архива."""
+    if in_shard(queryset):
+        return ShardRows(queryset, fields, named)
+    if named:
+        return queryset.values(*fields)
+    return queryset.values_list(*fields)
+
+
+class ShardRows:
+    """Строки шарда, в которых поля вида author__username — из default."""
+
+    def __init__(self, queryset, fields, named=False):
+        self.queryset = queryset
+        self.fields = fields
+        self.named = named
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        related = {}
+        for field in self.fields:
+            if '__' in field:
+                name, attr = field.split('__', 1)
+                related.setdefault(name, []).append(attr)
+        columns = list(dict.fromkeys(
+            [field for field in self.fields if '__' not in field]
+            + [f'{name}_id' for name in related]))
+        found = list(self.queryset.values(*columns)[index])
+        objects = {}
+        for name, attrs in related.items():
+            ids = {row[f'{name}_id'] for row in found} - {None}
+            objects[name] = {
+                row['pk']: row for row in RELATED[name].objects.using(
+                    DEFAULT).filter(pk__in=ids).values('pk', *attrs)}
+        result = []
+        for row in found:
+            values = []
+            for field in self.fields:
+                if '__' in field:
+                    name, attr = field.split('__', 1)
+                    obj = objects[name].get(row[f'{name}_id'])
+                    values.append(obj[attr] if obj else None)
+                else:
+                    values.append(row[field])
+            result.append(dict(zip(self.fields, values)) if self.named
+                          else tuple(values))
+        return result
+
+
+def copy_posts(queryset, alias):
+    """Копирует посты (Post или ArchivedPost) в архив базы alias.
+
+    Уже скопированные строки пропускаются, поэтому прерванный перенос
+    можно просто повторить.
+    """
+    ArchivedPost.objects.using(alias).bulk_create(
+        [ArchivedPost(**row) for row in queryset.values(*ARCHIVE_COLUMNS)],
+        ignore_conflicts=True)
+
+
+def misplaced(alias):
+    """Архивные посты базы alias, период которых относится к другой базе."""
+    owned = Q()
+    for piece in pieces():
+        if piece.alias == alias:
+            owned |= Q(**piece.lookups())
+    queryset = ArchivedPost.objects.using(alias)
+    if not owned:
+        return queryset.all()
+    return queryset.exclude(owned)
+
+
+class ArchiveRouter:
+    """Новые архивные посты — в базу их периода, прочее — в default."""
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if (model is not ArchivedPost and instance is not None
+                and instance._state.db in shard_aliases()):
+            # автор или группа поста из шарда
+            return DEFAULT
+        return None
+
+    def db_for_write(self, model, **hints):
+        instance = hints.get('instance')
+        if (model is ArchivedPost and instance is not None
+                and instance._state.db is None
+                and instance.pub_date is not None):
+            return alias_for(instance.pub_date)
+        return self.db_for_read(model, **hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if isinstance(obj1, ArchivedPost) or isinstance(obj2, ArchivedPost):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in shard_aliases():
+            return app_label == 'posts' and model_name == 'archivedpost'
+        return None
@@ -0,0 +1,115 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from . import autocomplete, cache, identity, stats
+from .sitemaps import SITEMAPS
+from .models import ArchivedPost, Group, GroupAuthorStats, GroupStats
+from .models import Post, User
+
+# отправляется после любых изменений постов, в том числе массовых,
+# которые обходят post_save и post_delete
+posts_changed = Signal(providing_args=['group_ids', 'author_ids', 'post_ids'])
+# отправляется тегом post_card после каждой карточки; без получателей
+# отправка ничего не стоит (получатель — posts.panels.FragmentPanel)
+fragment_rendered = Signal(
+    providing_args=['template_name', 'post_id', 'duration', 'cached'])
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    if created:
+        GroupStats.objects.get_or_create(group=instance)
+    cache.invalidate([cache.SITE, cache.group_version_scope(instance.slug)])
+    SITEMAPS['groups'].invalidate([instance.pk])
+    autocomplete.update(instance)
+    # отсутствующие строки в кэше не хранятся, новая группа его не старит
+    if not created:
+        identity.invalidate(Group)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # вход пользователя обновляет только last_login, ленты от него не зависят
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    scopes = [cache.SITE, cache.author_version_scope(instance.username)]
+    if not created:
+        # имя автора есть и на страницах и в лентах групп, где он писал,
+        # и в списках самых активных авторов этих групп
+        groups = GroupAuthorStats.objects.filter(author=instance).values_list(
+            'group_id', 'group__slug')
+        for group_id, slug in groups:
+            stats.update_top_authors(group_id)
+            scopes.append(cache.group_version_scope(slug))
+    cache.invalidate(scopes)
+    SITEMAPS['profiles'].invalidate([instance.pk])
+    autocomplete.update(instance)
+    if not created:
+        identity.invalidate(User)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    row = (instance.group_id, instance.author_id, instance.pub_date)
+    old_group_id = getattr(instance, '_loaded_group_id', instance.group_id)
+    if created:
+        stats.update_counters(added=[row])
+    elif old_group_id != instance.group_id:
+        stats.update_counters(
+            removed=[(old_group_id, instance.author_id, instance.pub_date)],
+            added=[row])
+    instance._loaded_group_id = instance.group_id
+    posts_changed.send(
+        sender=Post,
+        group_ids={old_group_id, instance.group_id} - {None},
+        author_ids={instance.author_id},
+        post_ids={instance.pk},
+    )
+
+
+@receiver(post_delete, sender=ArchivedPost)
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    stats.update_counters(
+        removed=[(instance.group_id, instance.author_id, instance.pub_date)])
+    posts_changed.send(
+        sender=Post,
+        group_ids={instance.group_id} - {None},
+        author_ids={instance.author_id},
+        post_ids={instance.pk},
+    )
+
+
+@receiver(posts_changed)
+def invalidate_feeds(sender, group_ids, author_ids, **kwargs):
+    slugs = Group.objects.filter(pk__in=group_ids).values_list(
+        'slug', flat=True)
+    usernames = User.objects.filter(pk__in=author_ids).values_list(
+        'username', flat=True)
+    cache.invalidate(
+        [cache.SITE]
+        + [cache.group_version_scope(slug) for slug in slugs]
+        + [cache.author_version_scope(username) for username in usernames]
+    )
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    SITEMAPS['groups'].invalidate([instance.pk])
+    autocomplete.remove(instance)
+    identity.invalidate(Group)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_deleted(sender, instance, **kwargs):
+    SITEMAPS['profiles'].invalidate([instance.pk])
+    autocomplete.remove(instance)
+    identity.invalidate(User)
+
+
+@receiver(posts_changed)
+def invalidate_sitemaps(sender, author_ids, post_ids=(), **kwargs):
+    SITEMAPS['posts'].invalidate(post_ids)
+    # профиль попадает в карту сайта только с первым постом автора
+    SITEMAPS['profiles'].invalidate(author_ids)
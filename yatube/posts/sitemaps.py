@@ -0,0 +1,224 @@
+"""Карта сайта: индекс и куски по диапазонам первичных ключей.
+
+Кусок с номером n содержит объекты с pk от n * size + 1 до
+(n + 1) * size. Границы кусков не зависят от удалений и вставок,
+поэтому изменение поста сбрасывает кэш только его куска. Кусков
+за последним pk нет: на них ответ 404.
+"""
+import abc
+import hashlib
+import heapq
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, Max, OuterRef, Q
+from django.http import Http404, HttpResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+from . import cache as feed_cache
+from . import shards
+from .models import ArchivedPost, Group, Post, User
+
+
+class ChunkedSitemap(abc.ABC):
+    """Раздел карты сайта, разбитый на куски по pk."""
+    name = None
+    model = None
+    fields = ('pk',)
+
+    @property
+    def chunk_size(self):
+        return settings.SITEMAP_CHUNK_SIZE
+
+    def get_querysets(self):
+        return [self.model.objects.all()]
+
+    @abc.abstractmethod
+    def location(self, row):
+        """Путь страницы для строки fields."""
+
+    def lastmod(self, row):
+        return None
+
+    def chunk_of(self, pk):
+        return (pk - 1) // self.chunk_size
+
+    def chunk_count(self):
+        last_pk = max(filter(None, (
+            queryset.aggregate(last=Max('pk'))['last']
+            for queryset in self.get_querysets())), default=0)
+        return math.ceil(last_pk / self.chunk_size)
+
+    def rows(self, chunk):
+        """Строки куска по возрастанию pk из всех таблиц раздела."""
+        return heapq.merge(*(self._keyset_rows(queryset, chunk)
+                             for queryset in self.get_querysets()))
+
+    def _keyset_rows(self, queryset, chunk):
+        """Строки куска, выбранные по ключу пачками, без OFFSET."""
+        last_pk = chunk * self.chunk_size
+        end_pk = last_pk + self.chunk_size
+        queryset = queryset.order_by('pk').values_list(*self.fields)
+        while True:
+            batch = list(queryset.filter(
+                pk__gt=last_pk, pk__lte=end_pk)[:settings.BULK_BATCH_SIZE])
+            if not batch:
+                return
+            yield from batch
+            last_pk = batch[-1][0]
+
+    def version_scope(self, chunk):
+        return f'sitemap:{self.name}:{chunk}'
+
+    def section_scope(self):
+        """Версия раздела целиком: от неё зависит индекс."""
+        return f'sitemap:{self.name}'
+
+    def invalidate(self, pks):
+        scopes = {self.version_scope(self.chunk_of(pk)) for pk in pks if pk}
+        if scopes:
+            feed_cache.invalidate([self.section_scope(), *scopes])
+
+
+class PostSitemap(ChunkedSitemap):
+    name = 'posts'
+    model = Post
+    fields = ('pk', 'pub_date')
+
+    def get_querysets(self):
+        return shards.post_querysets()
+
+    def location(self, row):
+        return reverse('posts:post_detail', args=[row[0]])
+
+    def lastmod(self, row):
+        return row[1]
+
+
+class GroupSitemap(ChunkedSitemap):
+    name = 'groups'
+    model = Group
+    fields = ('pk', 'slug')
+
+    def location(self, row):
+        return reverse('posts:group_list', args=[row[1]])
+
+
+class ProfileSitemap(ChunkedSitemap):
+    name = 'profiles'
+    model = User
+    fields = ('pk', 'username')
+
+    def get_querysets(self):
+        # профили без постов поисковикам не нужны
+        return [User.objects.annotate(
+            has_posts=Exists(Post.objects.filter(author=OuterRef('pk'))),
+            has_archived=Exists(
+                ArchivedPost.objects.filter(author=OuterRef('pk'))),
+        ).filter(Q(has_posts=True) | Q(has_archived=True))]
+
+    def chunk_count(self):
+        # по всем пользователям: без подзапросов на каждого, а куски
+        # без авторов просто пустые
+        last_pk = User.objects.aggregate(last=Max('pk'))['last'] or 0
+        return math.ceil(last_pk / self.chunk_size)
+
+    def rows(self, chunk):
+        """Авторы куска из default и авторы, чьи посты лежат в шардах.
+
+        Подзапрос в шард невозможен, поэтому авторов из шардов куска
+        дочитываем по их id пачками, а одинаковые строки склеиваем.
+        """
+        low = chunk * self.chunk_size
+        in_shards = sorted({
+            author_id for queryset in shards.archived(
+                author_id__gt=low, author_id__lte=low + self.chunk_size)
+            if shards.in_shard(queryset)
+            for author_id in queryset.order_by().values_list(
+                'author_id', flat=True).distinct()})
+        batches = (
+            User.objects.filter(
+                pk__in=in_shards[start:start + settings.BULK_BATCH_SIZE])
+            .order_by('pk').values_list(*self.fields)
+            for start in range(0, len(in_shards), settings.BULK_BATCH_SIZE))
+        merged = heapq.merge(super().rows(chunk),
+                             (row for batch in batches for row in batch))
+        previous = None
+        for row in merged:
+            if row != previous:
+                yield row
+            previous = row
+
+    def location(self, row):
+        return reverse('posts:profile', args=[row[1]])
+
+
+SITEMAPS = {
+    sitemap.name: sitemap
+    for sitemap in (PostSitemap(), GroupSitemap(), ProfileSitemap())
+}
+
+
+def _xml(content):
+    return HttpResponse(content, content_type='application/xml')
+
+
+def _render_index(request):
+    sitemaps = [
+        request.build_absolute_uri(
+            reverse('posts:sitemap_section', args=[name, chunk]))
+        for name, sitemap in SITEMAPS.items()
+        for chunk in range(sitemap.chunk_count())
+    ]
+    return render_to_string('sitemaps/index.xml', {'sitemaps': sitemaps})
+
+
+def sitemap_index(request):
+    """Индекс кэшируется, пока не изменится какой-нибудь раздел."""
+    timeout = settings.SITEMAP_CACHE_TIMEOUT
+    if not timeout:
+        return _xml(_render_index(request))
+    versions = feed_cache.get_versions(
+        [sitemap.section_scope() for sitemap in SITEMAPS.values()])
+    digest = hashlib.md5(
+        f'{request.get_host()}:{":".join(versions)}'.encode())
+    key = f'sitemap:index:{digest.hexdigest()}'
+    content = cache.get(key)
+    if content is None:
+        content = _render_index(request)
+        cache.set(key, content, timeout)
+    return _xml(content)
+
+
+def _render_chunk(request, sitemap, chunk):
+    urls = [
+        {
+            'location': request.build_absolute_uri(sitemap.location(row)),
+            'lastmod': sitemap.lastmod(row),
+        }
+        for row in sitemap.rows(chunk)
+    ]
+    # пустым бывает и кусок, из которого удалили все объекты
+    if not urls and chunk >= sitemap.chunk_count():
+        raise Http404('Такого куска карты сайта нет')
+    return render_to_string('sitemaps/chunk.xml', {'urls': urls})
+
+
+def sitemap_section(request, section, chunk):
+    sitemap = SITEMAPS.get(section)
+    if sitemap is None:
+        raise Http404('Неизвестный раздел карты сайта')
+    timeout = settings.SITEMAP_CACHE_TIMEOUT
+    if not timeout:
+        return _xml(_render_chunk(request, sitemap, chunk))
+    version, = feed_cache.get_versions([sitemap.version_scope(chunk)])
+    digest = hashlib.md5(
+        f'{request.get_host()}:{section}:{chunk}:{version}'.encode())
+    key = f'sitemap:chunk:{digest.hexdigest()}'
+    content = cache.get(key)
+    if content is None:
+        content = _render_chunk(request, sitemap, chunk)
+        cache.set(key, content, timeout)
+    return _xml(content)
@@ -0,0 +1,177 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from . import shards
+from .models import Group, GroupAuthorStats, GroupStats, MonthlyPostCount
+
+SITE_SCOPE = 'site'
+
+
+def group_scope(group_id):
+    return f'group:{group_id}'
+
+
+def author_scope(author_id):
+    return f'author:{author_id}'
+
+
+def update_top_authors(group_id):
+    """Пересчитывает имена самых активных авторов группы."""
+    top = (GroupAuthorStats.objects
+           .filter(group_id=group_id, posts_count__gt=0)
+           .order_by('-posts_count', 'author__username')
+           .values_list('author__username', flat=True)
+           [:settings.GROUP_TOP_AUTHORS])
+    GroupStats.objects.filter(group_id=group_id).update(
+        top_authors=','.join(top))
+
+
+def _shift(queryset, delta, **create_kwargs):
+    """Сдвигает счётчик posts_count, создавая строку при необходимости."""
+    if delta > 0:
+        if not queryset.update(posts_count=F('posts_count') + delta):
+            queryset.model.objects.create(posts_count=delta, **create_kwargs)
+    else:
+        queryset.filter(posts_count__gte=-delta).update(
+            posts_count=F('posts_count') + delta)
+
+
+def _post_scopes(group_id, author_id):
+    scopes = [SITE_SCOPE, author_scope(author_id)]
+    if group_id is not None:
+        scopes.append(group_scope(group_id))
+    return scopes
+
+
+def _deltas(removed, added):
+    groups, authors, months = Counter(), Counter(), Counter()
+    last_dates = {}
+    for rows, sign in ((removed, -1), (added, 1)):
+        for group_id, author_id, pub_date in rows:
+            local = timezone.localtime(pub_date)
+            for scope in _post_scopes(group_id, author_id):
+                months[scope, local.year, local.month] += sign
+            if group_id is None:
+                continue
+            groups[group_id] += sign
+            authors[group_id, author_id] += sign
+            if sign > 0:
+                last_dates[group_id] = max(
+                    last_dates.get(group_id, pub_date), pub_date)
+    return groups, authors, months, last_dates
+
+
+def update_counters(removed=(), added=()):
+    """Обновляет все агрегаты постов.
+
+    removed и added — строки (group_id, author_id, pub_date) убранных и
+    добавленных постов. Изменения схлопываются, поэтому перенос пачки
+    постов стоит по одному UPDATE на затронутый счётчик.
+    """
+    groups, authors, months, last_dates = _deltas(removed, added)
+    for (scope, year, month), delta in months.items():
+        if not delta:
+            continue
+        counts = MonthlyPostCount.objects.filter(
+            scope=scope, year=year, month=month)
+        _shift(counts, delta, scope=scope, year=year, month=month)
+        # обнулиться может только уменьшенный счётчик; по posts_count
+        # индекса нет, поэтому удаляем по ключу
+        if delta < 0:
+            counts.filter(posts_count=0).delete()
+    for (group_id, author_id), delta in authors.items():
+        if delta:
+            _shift(GroupAuthorStats.objects.filter(
+                group_id=group_id, author_id=author_id), delta,
+                group_id=group_id, author_id=author_id)
+    GroupAuthorStats.objects.filter(
+        group_id__in=list(groups), posts_count=0).delete()
+    for group_id, delta in groups.items():
+        GroupStats.objects.get_or_create(group_id=group_id)
+        stats = GroupStats.objects.filter(group_id=group_id)
+        if delta:
+            _shift(stats, delta, group_id=group_id)
+        if delta < 0 or group_id not in last_dates:
+            # убрали посты: последний берём по индексу (group, pub_date)
+            stats.update(last_pub_date=_last_pub_date(group_id))
+        else:
+            stats.exclude(last_pub_date__gte=last_dates[group_id]).update(
+                last_pub_date=last_dates[group_id])
+        update_top_authors(group_id)
+
+
+def _last_pub_date(group_id):
+    # агрегаты считают и архив: архивный пост остаётся на сайте
+    dates = [posts.aggregate(last=Max('pub_date'))['last']
+             for posts in shards.post_querysets(group_id=group_id)]
+    return max(filter(None, dates), default=None)
+
+
+@transaction.atomic
+def rebuild_group_stats():
+    """Пересчитывает агрегаты всех групп с нуля."""
+    counts, last_dates, author_counts = Counter(), {}, Counter()
+    for posts in shards.post_querysets(group__isnull=False):
+        posts = posts.order_by()
+        for row in posts.values('group').annotate(count=Count('pk'),
+                                                  last=Max('pub_date')):
+            counts[row['group']] += row['count']
+            last_dates[row['group']] = max(
+                last_dates.get(row['group'], row['last']), row['last'])
+        for row in posts.values('group', 'author').annotate(
+                count=Count('pk')):
+            author_counts[row['group'], row['author']] += row['count']
+    GroupAuthorStats.objects.all().delete()
+    GroupAuthorStats.objects.bulk_create(
+        GroupAuthorStats(group_id=group_id, author_id=author_id,
+                         posts_count=count)
+        for (group_id, author_id), count in author_counts.items()
+    )
+    GroupStats.objects.all().delete()
+    group_ids = list(Group.objects.values_list('pk', flat=True))
+    GroupStats.objects.bulk_create(
+        GroupStats(
+            group_id=group_id,
+            posts_count=counts[group_id],
+            last_pub_date=last_dates.get(group_id),
+        )
+        for group_id in group_ids
+    )
+    for group_id in counts:
+        update_top_authors(group_id)
+    return len(group_ids)
+
+
+def total_posts_count():
+    """Число постов по помесячным счётчикам без COUNT(*) по таблице."""
+    return MonthlyPostCount.objects.filter(scope=SITE_SCOPE).aggregate(
+        total=Sum('posts_count'))['total'] or 0
+
+
+@transaction.atomic
+def rebuild_month_counts():
+    """Пересчитывает помесячные счётчики архива с нуля."""
+    MonthlyPostCount.objects.all().delete()
+    rows = Counter()
+    for posts in shards.post_querysets():
+        posts = posts.annotate(
+            month=TruncMonth('pub_date')).order_by()
+        for row in posts.values('month').annotate(count=Count('pk')):
+            rows[SITE_SCOPE, row['month']] += row['count']
+        for row in posts.values('author', 'month').annotate(
+                count=Count('pk')):
+            rows[author_scope(row['author']), row['month']] += row['count']
+        for row in (posts.filter(group__isnull=False)
+                    .values('group', 'month').annotate(count=Count('pk'))):
+            rows[group_scope(row['group']), row['month']] += row['count']
+    MonthlyPostCount.objects.bulk_create(
+        MonthlyPostCount(scope=scope, year=month.year, month=month.month,
+                         posts_count=count)
+        for (scope, month), count in rows.items()
+    )
+    return len(rows)
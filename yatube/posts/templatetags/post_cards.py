@@ -0,0 +1,65 @@
+import hashlib
+import time
+
+from django import template
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils import timezone, translation
+from django.utils.safestring import mark_safe
+
+from core.stampede import get_or_compute
+
+from ..signals import fragment_rendered
+
+register = template.Library()
+
+
+def card_version(post):
+    """Отпечаток всего, что попадает в карточку поста.
+
+    Правка текста, перенос в другую группу, смена слага группы или
+    имени автора дают новый отпечаток, и карточка рендерится заново.
+    pub_date отличает посты с одинаковым id из разных баз.
+    """
+    group = post.group
+    author = post.author
+    parts = [
+        post.pub_date.isoformat(),
+        post.text,
+        post.text_html,
+        group.slug if group else '',
+        author.username,
+        author.get_full_name(),
+        translation.get_language() or '',
+        timezone.get_current_timezone_name(),
+    ]
+    return hashlib.md5('\0'.join(parts).encode()).hexdigest()
+
+
+def card_key(post, template_name):
+    template_digest = hashlib.md5(template_name.encode()).hexdigest()
+    return f'post:card:{post.pk}:{template_digest}:{card_version(post)}'
+
+
+@register.simple_tag
+def post_card(post, template_name):
+    """Карточка поста из шаблона template_name, закэшированная целиком."""
+    started = time.perf_counter()
+    rendered = []
+
+    def render():
+        rendered.append(template_name)
+        return render_to_string(template_name, {'post': post})
+
+    timeout = settings.POST_CARD_CACHE_TIMEOUT
+    if timeout:
+        # карточки дешёвые: блокировка обошлась бы дороже рендеринга,
+        # поэтому от одновременного истечения спасает только ранний пересчёт
+        html = mark_safe(get_or_compute(
+            card_key(post, template_name), render, timeout, lock=False))
+    else:
+        html = render()
+    fragment_rendered.send(
+        sender=type(post), template_name=template_name, post_id=post.pk,
+        duration=time.perf_counter() - started, cached=not rendered)
+    return html
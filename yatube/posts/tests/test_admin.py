@@ -0,0 +1,98 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import search
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class PostAdminTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.groups = [
+            Group.objects.create(
+                title=f'Группа {number}',
+                slug=f'group-{number}',
+                description='Тестовое описание',
+            )
+            for number in range(3)
+        ]
+        for number in range(5):
+            Post.objects.create(
+                text=f'Пост номер {number} про котиков',
+                author=cls.admin,
+                group=cls.groups[number % 3],
+            )
+        Post.objects.create(text='Пост про собак', author=cls.admin)
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.url = reverse('admin:posts_post_changelist')
+
+    def changelist_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Число запросов не зависит от числа строк и групп."""
+        before = self.changelist_queries()
+        for number in range(3, 6):
+            group = Group.objects.create(
+                title=f'Группа {number}', slug=f'group-{number}',
+                description='Тестовое описание')
+            Post.objects.create(text='Ещё пост', author=self.admin,
+                                group=group)
+        self.assertEqual(self.changelist_queries(), before)
+
+    def test_fts_search(self):
+        """Поиск идёт по полнотекстовому индексу и понимает префиксы."""
+        response = self.client.get(self.url, {'q': 'котик'})
+        self.assertEqual(response.context['cl'].result_count, 5)
+        # кавычки и операторы FTS5 не ломают запрос
+        response = self.client.get(self.url, {'q': '"собак OR'})
+        self.assertEqual(response.context['cl'].result_count, 0)
+        response = self.client.get(self.url, {'q': '"собак'})
+        self.assertEqual(response.context['cl'].result_count, 1)
+        post = Post.objects.get(text='Пост про собак')
+        post.text = 'Пост про котиков'
+        post.save()
+        response = self.client.get(self.url, {'q': 'котиков'})
+        self.assertEqual(response.context['cl'].result_count, 6)
+
+    def test_blank_search_lists_everything(self):
+        response = self.client.get(self.url, {'q': '  '})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['cl'].result_count,
+                         Post.objects.count())
+        self.assertEqual(search.filter_matching(Post.objects.all(), ' \t')
+                         .count(), Post.objects.count())
+
+    def test_fts_checked_once(self):
+        search.fts_available.cache_clear()
+        self.assertTrue(search.fts_available())
+        with self.assertNumQueries(0):
+            self.assertTrue(search.fts_available())
+
+    @override_settings(ADMIN_LARGE_TABLE_THRESHOLD=1)
+    def test_large_table_mode(self):
+        """На большой таблице фильтр и подсчёт берутся из счётчиков."""
+        response = self.client.get(self.url)
+        cl = response.context['cl']
+        self.assertEqual(cl.result_count, Post.objects.count())
+        self.assertEqual(cl.sortable_by, ('pk', 'pub_date',))
+        self.assertEqual(len(cl.filter_specs), 1)
+        month = cl.filter_specs[0].lookup_choices[0][0]
+        response = self.client.get(self.url, {'month': month})
+        self.assertEqual(response.context['cl'].result_count, 6)
+        response = self.client.get(self.url, {'month': 'bad'})
+        self.assertEqual(response.status_code, 302)
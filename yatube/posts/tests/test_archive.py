@@ -0,0 +1,108 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Group, MonthlyPostCount, Post
+from ..stats import (SITE_SCOPE, author_scope, group_scope,
+                     rebuild_month_counts)
+from ..utils import date_range
+
+User = get_user_model()
+
+
+class ArchiveTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='first',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый пост',
+            author=cls.author,
+            group=cls.group,
+        )
+        cls.old_post = Post.objects.create(
+            text='Старый пост',
+            author=cls.author,
+        )
+        # pub_date заполняется автоматически, поэтому двигаем его в прошлое
+        # вместе со счётчиками архива
+        old_date = timezone.make_aware(datetime.datetime(2020, 12, 31, 23))
+        Post.objects.filter(pk=cls.old_post.pk).update(pub_date=old_date)
+        rebuild_month_counts()
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_date_range_is_half_open(self):
+        """Интервал архива заканчивается началом следующего периода."""
+        start, end = date_range(2020, 12)
+        self.assertEqual((start.year, start.month, start.day), (2020, 12, 1))
+        self.assertEqual((end.year, end.month, end.day), (2021, 1, 1))
+        start, end = date_range(2020, 2, 29)
+        self.assertEqual((end.month, end.day), (3, 1))
+
+    def test_archive_pages(self):
+        """Архив показывает только посты своего периода."""
+        now = timezone.localtime(self.post.pub_date)
+        url_posts = {
+            reverse('posts:archive', args=[2020]): [self.old_post],
+            reverse('posts:archive', args=[2020, 12, 31]): [self.old_post],
+            reverse('posts:archive', args=[2021, 1]): [],
+            reverse('posts:archive', args=[now.year, now.month]):
+                [self.post],
+            reverse('posts:group_archive', args=[self.group.slug, 2020]): [],
+            reverse('posts:profile_archive',
+                    args=[self.author.username, 2020, 12]): [self.old_post],
+        }
+        for url, expected in url_posts.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertEqual(list(response.context['page_obj']),
+                                 expected)
+
+    def test_invalid_date_404(self):
+        response = self.guest_client.get('/archive/2020/13/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_month_counts_follow_post_writes(self):
+        """Счётчики за месяц обновляются при создании и удалении поста."""
+        now = timezone.localtime()
+
+        def count(scope):
+            row = MonthlyPostCount.objects.filter(
+                scope=scope, year=now.year, month=now.month).first()
+            return row.posts_count if row else 0
+
+        new_post = Post.objects.create(
+            text='Новый пост', author=self.author, group=self.group)
+        self.assertEqual(count(SITE_SCOPE), 2)
+        self.assertEqual(count(group_scope(self.group.pk)), 2)
+        new_post.delete()
+        self.assertEqual(count(group_scope(self.group.pk)), 1)
+        response = self.guest_client.get(
+            reverse('posts:archive', args=[now.year]))
+        self.assertEqual(
+            [row['posts_count'] for row in response.context['month_counts']],
+            [1, 1]
+        )
+
+    def test_only_emptied_months_removed(self):
+        """Удаляются только обнулённые счётчики месяцев этого поста."""
+        other = User.objects.create_user(username='test_other')
+        MonthlyPostCount.objects.create(scope='unrelated', year=2000,
+                                        month=1, posts_count=0)
+        post = Post.objects.create(text='Пост', author=other)
+        post.delete()
+        self.assertFalse(MonthlyPostCount.objects.filter(
+            scope=author_scope(other.pk)).exists())
+        self.assertTrue(MonthlyPostCount.objects.filter(
+            scope='unrelated').exists())
@@ -0,0 +1,123 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.runner import run_on_commit_callbacks
+
+from .. import autocomplete
+from ..models import Group
+
+User = get_user_model()
+
+
+@override_settings(IDENTITY_CACHE_CHECK_INTERVAL=60, AUTOCOMPLETE_LIMIT=3)
+class AutocompleteTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for number, title in enumerate(['Котики', 'Кошки', 'Кораблики',
+                                        'Собаки', 'Коты']):
+            Group.objects.create(title=title, slug=f'group-{number}',
+                                 description='Тестовое описание')
+        User.objects.create_user(username='leo', first_name='Лев',
+                                 last_name='Толстой')
+        User.objects.create_user(username='lermontov')
+
+    def setUp(self):
+        cache.clear()
+        caches['state'].clear()
+        autocomplete.clear()
+        self.addCleanup(autocomplete.clear)
+
+    def suggest(self, name, prefix):
+        response = self.client.get(
+            reverse('posts:autocomplete', args=[name]), {'q': prefix})
+        return response.json()['results']
+
+    def test_prefix_lookup_without_queries(self):
+        autocomplete.build_all()
+        with self.assertNumQueries(0):
+            groups = self.suggest('groups', 'кот')
+        self.assertEqual([group['title'] for group in groups],
+                         ['Котики', 'Коты'])
+        self.assertEqual(len(self.suggest('groups', 'ко')), 3)
+        self.assertEqual(self.suggest('groups', 'group-3')[0]['title'],
+                         'Собаки')
+        self.assertEqual(self.suggest('users', 'LE'), [
+            {'username': 'leo', 'full_name': 'Лев Толстой'},
+            {'username': 'lermontov', 'full_name': ''},
+        ])
+        self.assertEqual(self.suggest('groups', ''), [])
+        response = self.client.get(
+            reverse('posts:autocomplete', args=['posts']), {'q': 'a'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_changes_applied_incrementally(self):
+        autocomplete.build_all()
+        with run_on_commit_callbacks():
+            group = Group.objects.create(title='Котлеты', slug='cutlets',
+                                         description='Тестовое описание')
+        with self.assertNumQueries(0):
+            self.assertIn('Котлеты', [found['title'] for found in
+                                      autocomplete.search('groups', 'котл')])
+        group.title = 'Пельмени'
+        with run_on_commit_callbacks():
+            group.save()
+        self.assertEqual(autocomplete.search('groups', 'котл'), [])
+        self.assertEqual(len(autocomplete.search('groups', 'пельм')), 1)
+        with run_on_commit_callbacks():
+            group.delete()
+        self.assertEqual(autocomplete.search('groups', 'пельм'), [])
+
+    def create_in_other_process(self, title, slug):
+        # другой воркер: индекса этого процесса он не видит
+        with mock.patch.dict(autocomplete._indexes, clear=True), \
+                run_on_commit_callbacks():
+            return Group.objects.create(title=title, slug=slug,
+                                        description='Тестовое описание')
+
+    def test_other_process_change_applied_from_log(self):
+        autocomplete.build_all()
+        self.create_in_other_process('Котлеты', 'cutlets')
+        self.assertEqual(autocomplete.search('groups', 'котл'), [])
+        with override_settings(IDENTITY_CACHE_CHECK_INTERVAL=0), \
+                self.assertNumQueries(0):
+            self.assertEqual(len(autocomplete.search('groups', 'котл')), 1)
+
+    def test_rebuilt_when_log_lost(self):
+        autocomplete.build_all()
+        self.create_in_other_process('Котлеты', 'cutlets')
+        # правка выпала из журнала по времени
+        caches['state'].delete(autocomplete._change_key(
+            'groups', autocomplete._head('groups') - 1))
+        with override_settings(IDENTITY_CACHE_CHECK_INTERVAL=0), \
+                self.assertNumQueries(1):
+            self.assertEqual(len(autocomplete.search('groups', 'котл')), 1)
+
+    def test_own_change_does_not_hide_other_process_change(self):
+        autocomplete.build_all()
+        self.create_in_other_process('Котлеты', 'cutlets')
+        # своя правка раньше, чем индекс заметил чужую
+        with run_on_commit_callbacks():
+            Group.objects.create(title='Котлы', slug='cauldrons',
+                                 description='Тестовое описание')
+        self.assertEqual(
+            sorted(found['title']
+                   for found in autocomplete.search('groups', 'котл')),
+            ['Котлеты', 'Котлы'])
+
+    def test_post_form_renders_only_selected_group(self):
+        user = User.objects.get(username='leo')
+        self.client.force_login(user)
+        response = self.client.get(reverse('posts:post_create'))
+        widget = response.context['form'].fields['group'].widget
+        self.assertEqual(len(widget.choices), 1)
+        self.assertContains(response, 'data-autocomplete')
+        group = Group.objects.get(title='Собаки')
+        response = self.client.post(reverse('posts:post_create'),
+                                    {'text': 'Текст', 'group': group.pk})
+        self.assertEqual(user.posts.get().group, group)
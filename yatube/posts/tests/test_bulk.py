@@ -0,0 +1,128 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.runner import run_on_commit_callbacks
+
+from .. import background, bulk
+from ..models import Group, GroupAuthorStats, GroupStats, MonthlyPostCount
+from ..models import Post
+from ..stats import rebuild_group_stats, rebuild_month_counts
+
+User = get_user_model()
+
+
+@override_settings(BULK_BATCH_SIZE=3, BULK_BATCH_PAUSE=0)
+class BulkPostsTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.spammer = User.objects.create_user(username='spammer')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='first',
+            description='Тестовое описание')
+        cls.target = Group.objects.create(
+            title='Новая группа', slug='target',
+            description='Тестовое описание')
+        for number in range(7):
+            Post.objects.create(text=f'Пост {number}', author=cls.spammer,
+                                group=cls.group)
+        Post.objects.create(text='Обычный пост', author=cls.author,
+                            group=cls.group)
+
+    def counters(self):
+        return (
+            sorted(GroupStats.objects.values_list(
+                'group', 'posts_count', 'last_pub_date', 'top_authors')),
+            sorted(GroupAuthorStats.objects.values_list(
+                'group', 'author', 'posts_count')),
+            sorted(MonthlyPostCount.objects.values_list(
+                'scope', 'year', 'month', 'posts_count')),
+        )
+
+    def assertCountersConsistent(self):
+        incremental = self.counters()
+        rebuild_group_stats()
+        rebuild_month_counts()
+        self.assertEqual(incremental, self.counters())
+
+    def test_move_posts(self):
+        progress = []
+        count = bulk.move_posts(
+            Post.objects.filter(author=self.spammer), self.target,
+            progress=lambda done, total: progress.append((done, total)))
+        self.assertEqual(count, 7)
+        self.assertEqual(progress, [(3, 7), (6, 7), (7, 7)])
+        self.assertEqual(self.target.posts.count(), 7)
+        self.assertCountersConsistent()
+
+    def test_reassign_and_delete_posts(self):
+        bulk.reassign_posts(Post.objects.filter(text='Пост 0'), self.author)
+        self.assertCountersConsistent()
+        self.assertEqual(
+            bulk.delete_posts(Post.objects.filter(author=self.spammer)), 6)
+        self.assertFalse(self.spammer.posts.exists())
+        self.assertCountersConsistent()
+
+    def test_admin_action(self):
+        """Действие админки запускает перенос в фоне после коммита."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        self.client.force_login(admin)
+        posts = Post.objects.filter(author=self.spammer)
+        with mock.patch.object(background.threading, 'Thread') as thread, \
+                run_on_commit_callbacks():
+            response = self.client.post(
+                reverse('admin:posts_post_changelist'),
+                {
+                    'action': 'move_to_group',
+                    'target_group': self.target.slug,
+                    '_selected_action': [post.pk for post in posts[:4]],
+                },
+                follow=True,
+            )
+        self.assertContains(response, 'идёт в фоне')
+        self.assertEqual(self.target.posts.count(), 0)
+        _, kwargs = thread.call_args
+        # соединение теста закрывать нельзя: в нём транзакция теста
+        with mock.patch.object(background, 'close_old_connections'), \
+                mock.patch.object(background.connections, 'close_all'):
+            kwargs['target'](*kwargs['args'], **kwargs['kwargs'])
+        self.assertEqual(self.target.posts.count(), 4)
+        self.assertCountersConsistent()
+
+    def test_admin_has_no_default_delete_action(self):
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        self.client.force_login(admin)
+        response = self.client.get(reverse('admin:posts_post_changelist'))
+        actions = dict(response.context['action_form']
+                       .fields['action'].choices)
+        self.assertIn('delete_in_bulk', actions)
+        self.assertNotIn('delete_selected', actions)
+
+    def test_commands(self):
+        out = StringIO()
+        call_command('move_posts', '--group=first', '--to-group=target',
+                     stdout=out)
+        self.assertIn('Перенесено постов: 8', out.getvalue())
+        call_command('delete_posts', author='spammer', verbosity=0,
+                     stdout=out)
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertCountersConsistent()
+
+    def test_render_post_html(self):
+        Post.objects.update(text_html='')
+        out = StringIO()
+        call_command('render_post_html', stdout=out)
+        self.assertIn('Обновлён HTML постов: 8', out.getvalue())
+        self.assertFalse(Post.objects.filter(text_html='').exists())
+        self.assertEqual(
+            Post.objects.get(author=self.author).text_html,
+            '<p>Обычный пост</p>')
@@ -0,0 +1,127 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.runner import run_on_commit_callbacks
+
+from .. import cache as feed_cache
+from .. import identity
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(FEED_CACHE_TIMEOUT=60, FEED_ACCESS_FLUSH_EVERY=1,
+                   IDENTITY_CACHE_SIZE=100)
+class FeedCacheTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='first',
+            description='Тестовое описание')
+        cls.post = Post.objects.create(text='Первый пост', author=cls.author,
+                                       group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        identity.clear()
+        self.addCleanup(identity.clear)
+        self.guest_client = Client()
+
+    def test_page_cached_until_posts_change(self):
+        """Лента берётся из кэша, пока в её разделе не изменятся посты."""
+        url = reverse('posts:group_list', args=[self.group.slug])
+        self.guest_client.get(url)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url)
+        self.assertContains(response, 'Первый пост')
+        with run_on_commit_callbacks():
+            Post.objects.create(text='Чужой пост', author=self.author)
+        with self.assertNumQueries(0):
+            self.guest_client.get(url)
+        self.post.text = 'Исправленный пост'
+        with run_on_commit_callbacks():
+            self.post.save()
+        self.assertContains(self.guest_client.get(url), 'Исправленный пост')
+
+    def test_group_page_follows_author_name(self):
+        url = reverse('posts:group_list', args=[self.group.slug])
+        self.guest_client.get(url)
+        author = User.objects.get(pk=self.author.pk)
+        author.first_name = 'Лев'
+        with run_on_commit_callbacks():
+            author.save()
+        self.assertContains(self.guest_client.get(url), 'Лев')
+
+    def test_stale_page_while_recomputed(self):
+        """Пока страницу пересчитывает другой воркер, отдаётся копия."""
+        url = reverse('posts:index')
+        self.guest_client.get(url)
+        self.post.text = 'Исправленный пост'
+        with run_on_commit_callbacks():
+            self.post.save()
+        key = feed_cache.entry_key(url)
+        caches['state'].add(f'{key}:lock', 'other', 10)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url)
+        self.assertContains(response, 'Первый пост')
+        caches['state'].delete(f'{key}:lock')
+        self.assertContains(self.guest_client.get(url), 'Исправленный пост')
+
+    def test_authorized_user_not_cached(self):
+        client = Client()
+        client.force_login(self.author)
+        client.get(reverse('posts:index'))
+        response = client.get(reverse('posts:index'))
+        self.assertIsNotNone(response.context)
+
+    @override_settings(FEED_CACHE_MAX_PAGE=5)
+    def test_key_uses_only_page_number(self):
+        """Посторонние параметры не плодят копий страницы в кэше."""
+        url = reverse('posts:index')
+        self.guest_client.get(url, {'utm_source': 'mail'})
+        with self.assertNumQueries(0):
+            self.guest_client.get(url, {'page': '1', 'ref': 'x'})
+        self.assertEqual(feed_cache.popular_paths(10), [url])
+        for page in ('abc', '01', '6'):
+            with self.subTest(page=page):
+                self.assertContains(
+                    self.guest_client.get(url, {'page': page}),
+                    'Первый пост')
+        self.assertEqual(feed_cache.popular_paths(10), [url])
+
+    def test_missing_page_leaves_no_traces(self):
+        """На 404 не заводятся ни версия раздела, ни статистика."""
+        urls = [reverse('posts:group_list', args=['missing']),
+                reverse('posts:profile', args=['missing'])]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.guest_client.get(url).status_code, 404)
+        scopes = [feed_cache.group_version_scope('missing'),
+                  feed_cache.author_version_scope('missing')]
+        self.assertEqual(caches['state'].get_many(
+            [feed_cache._version_key(scope) for scope in scopes]), {})
+        self.assertEqual(feed_cache.popular_paths(10), [])
+
+    def test_pages_to_warm(self):
+        """Статистика обращений идёт первой, затем эвристика."""
+        profile = reverse('posts:profile', args=[self.author.username])
+        for _ in range(2):
+            self.guest_client.get(profile)
+        self.assertEqual(
+            feed_cache.pages_to_warm(3),
+            [profile, reverse('posts:index'),
+             reverse('posts:group_list', args=[self.group.slug])]
+        )
+
+    def test_warm_page(self):
+        url = reverse('posts:index')
+        self.assertEqual(feed_cache.warm_page(url), (url, 200))
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url)
+        self.assertContains(response, 'Первый пост')
@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..cards import PostCard
+from ..models import Group, Post
+from ..partitions import PartitionedPosts
+
+User = get_user_model()
+
+CARD = 'posts/includes/index_card.html'
+
+
+@override_settings(POST_CARD_CACHE_TIMEOUT=60)
+class PostCardCacheTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='first',
+            description='Тестовое описание')
+        cls.post = Post.objects.create(text='Первый пост', author=cls.author,
+                                       group=cls.group)
+        Post.objects.create(text='Второй пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def rendered_cards(self, response):
+        return [t.name for t in response.templates].count(CARD)
+
+    def test_only_changed_cards_rendered(self):
+        url = reverse('posts:index')
+        self.assertEqual(self.rendered_cards(self.guest_client.get(url)), 2)
+        self.assertEqual(self.rendered_cards(self.guest_client.get(url)), 0)
+        self.post.text = 'Исправленный пост'
+        self.post.save()
+        response = self.guest_client.get(url)
+        self.assertEqual(self.rendered_cards(response), 1)
+        self.assertContains(response, 'Исправленный пост')
+
+    def test_author_name_change_rerenders_card(self):
+        url = reverse('posts:index')
+        self.guest_client.get(url)
+        self.author.first_name = 'Лев'
+        self.author.save()
+        response = self.guest_client.get(url)
+        self.assertEqual(self.rendered_cards(response), 2)
+        self.assertContains(response, 'Автор: Лев')
+
+    def test_cards_keep_context_for_templates(self):
+        response = self.guest_client.get(
+            reverse('posts:group_list', args=[self.group.slug]))
+        first = response.context['page_obj'][0]
+        self.assertEqual(first.author.username, self.author.username)
+        self.assertEqual(first.group.title, self.group.title)
+
+
+class PostCardTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='test_author', first_name='Лев', last_name='Толстой')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='first',
+            description='Тестовое описание')
+        cls.post = Post.objects.create(text='Первый пост', author=cls.author,
+                                       group=cls.group)
+        Post.objects.create(text='Второй пост', author=cls.author)
+
+    def test_cards_from_one_query(self):
+        with self.assertNumQueries(1):
+            second, first = PartitionedPosts.cards()[:2]
+        self.assertIsInstance(first, PostCard)
+        self.assertEqual(first, self.post)
+        self.assertIs(first.author, second.author)
+        self.assertEqual(first.author.get_full_name(), 'Лев Толстой')
+        self.assertEqual(first.group.slug, self.group.slug)
+        self.assertIsNone(second.group)
+
+    def test_feed_pages_use_cards(self):
+        response = self.client.get(reverse('posts:profile',
+                                           args=[self.author.username]))
+        self.assertIsInstance(response.context['page_obj'][0], PostCard)
+        self.assertContains(response, 'Первый пост')
@@ -0,0 +1,124 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import background, deletion
+from ..models import Group, GroupStats, MonthlyPostCount, Post
+from ..stats import author_scope
+
+User = get_user_model()
+
+
+@override_settings(BULK_BATCH_SIZE=2, BULK_BATCH_PAUSE=0)
+class DeletionTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.prolific = User.objects.create_user(username='prolific')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='first',
+            description='Тестовое описание')
+        for number in range(5):
+            Post.objects.create(text=f'Пост {number}', author=cls.prolific,
+                                group=cls.group)
+        cls.post = Post.objects.create(text='Пост автора', author=cls.author,
+                                       group=cls.group)
+
+    def test_delete_user(self):
+        """Посты удаляются вместе с пользователем, агрегаты сходятся."""
+        user_id = self.prolific.pk
+        self.assertEqual(deletion.delete_user(self.prolific), 5)
+        self.assertFalse(User.objects.filter(pk=user_id).exists())
+        self.assertEqual(deletion.user_leftovers(user_id), {})
+        stats = GroupStats.objects.get(group=self.group)
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.top_authors, self.author.username)
+
+    def test_delete_group(self):
+        """Посты группы остаются, но без группы."""
+        group_id = self.group.pk
+        out = StringIO()
+        call_command('delete_group', self.group.slug, verbosity=0,
+                     stdout=out)
+        self.assertIn('отвязано постов: 6', out.getvalue())
+        self.assertEqual(deletion.group_leftovers(group_id), {})
+        self.assertEqual(Post.objects.filter(group=None).count(), 6)
+
+    def test_leftovers_are_reported(self):
+        """Если пачки обошли посты, осиротевшие счётчики — ошибка."""
+        with mock.patch.object(deletion.bulk, 'move_posts', return_value=0):
+            with self.assertRaises(deletion.OrphanedRowsError) as raised:
+                deletion.delete_group(self.group)
+            self.assertIn('month_counts', str(raised.exception))
+        # счётчик, который не сошёлся с постами
+        user_id = self.author.pk
+        MonthlyPostCount.objects.create(scope=author_scope(user_id),
+                                        year=2000, month=1, posts_count=1)
+        with self.assertRaisesRegex(CommandError, 'month_counts'):
+            call_command('delete_user', self.author.username, verbosity=0)
+        self.assertFalse(User.objects.filter(pk=user_id).exists())
+
+    def test_admin_deletes_in_background(self):
+        """Админка удаляет после коммита в отдельном потоке."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        self.client.force_login(admin)
+        user_id = self.prolific.pk
+        callbacks = []
+        with mock.patch.object(background.transaction, 'on_commit',
+                               callbacks.append), \
+                mock.patch.object(background.threading, 'Thread') as thread:
+            self.client.post(reverse('admin:auth_user_delete',
+                                     args=[user_id]), {'post': 'yes'})
+            self.assertTrue(User.objects.filter(pk=user_id).exists())
+            [start] = callbacks
+            start()
+        thread.return_value.start.assert_called_once_with()
+        _, kwargs = thread.call_args
+        # соединение теста закрывать нельзя: в нём транзакция теста
+        with mock.patch.object(background, 'close_old_connections'), \
+                mock.patch.object(background.connections, 'close_all'):
+            kwargs['target'](*kwargs['args'])
+        self.assertFalse(User.objects.filter(pk=user_id).exists())
+        self.assertFalse(Post.objects.filter(author_id=user_id).exists())
+        self.assertEqual(deletion.user_leftovers(user_id), {})
+
+    def test_admin_confirmation_shows_counts(self):
+        """Подтверждение показывает число постов, а не их список."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        self.client.force_login(admin)
+        with mock.patch('django.contrib.admin.options.get_deleted_objects'
+                        ) as collector:
+            response = self.client.get(
+                reverse('admin:auth_user_delete', args=[self.prolific.pk]))
+        collector.assert_not_called()
+        self.assertContains(response, 'Постов: 5')
+        self.assertNotContains(response, 'Пост 0')
+
+    def test_admin_messages_deletion_is_queued(self):
+        """Сообщение говорит, что удаление идёт в фоне, а не завершено."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        self.client.force_login(admin)
+        with mock.patch.object(background.transaction, 'on_commit'):
+            response = self.client.post(
+                reverse('admin:posts_group_delete', args=[self.group.pk]),
+                {'post': 'yes'}, follow=True)
+            self.assertContains(response, 'удаляется в фоне')
+            self.assertNotContains(response, 'успешно')
+            response = self.client.post(
+                reverse('admin:auth_user_changelist'),
+                {'action': 'delete_selected', 'post': 'yes',
+                 '_selected_action': [self.author.pk, self.prolific.pk]},
+                follow=True)
+        self.assertContains(response, 'Удаляются в фоне: 2')
+        self.assertNotContains(response, 'успешно')
+        self.assertTrue(User.objects.filter(pk=self.author.pk).exists())
@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.runner import run_on_commit_callbacks
+
+from .. import cache as feed_cache
+from .. import identity
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(SYNDICATION_CACHE_TIMEOUT=60, IDENTITY_CACHE_SIZE=100)
+class SyndicationFeedTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='test_author', first_name='Лев')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='first',
+            description='Тестовое описание')
+        cls.post = Post.objects.create(text='Первый пост', author=cls.author,
+                                       group=cls.group)
+
+    def setUp(self):
+        cache.clear()
+        identity.clear()
+        self.addCleanup(identity.clear)
+        self.guest_client = Client()
+
+    def test_feeds_render(self):
+        urls = {
+            reverse('posts:feed', args=['rss']): 'application/rss+xml',
+            reverse('posts:group_feed', args=['first', 'atom']):
+                'application/atom+xml',
+            reverse('posts:profile_feed', args=['test_author', 'rss']):
+                'application/rss+xml',
+        }
+        for url, content_type in urls.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertTrue(
+                    response['Content-Type'].startswith(content_type))
+                self.assertContains(response, 'Первый пост')
+                self.assertContains(response, 'Лев')
+
+    def test_unknown_feed_is_404(self):
+        urls = [
+            reverse('posts:feed', args=['json']),
+            reverse('posts:group_feed', args=['missing', 'rss']),
+            reverse('posts:profile_feed', args=['missing', 'atom']),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.guest_client.get(url).status_code, 404)
+        # для несуществующих объектов версии в кэше не заводятся
+        scopes = [feed_cache.group_version_scope('missing'),
+                  feed_cache.author_version_scope('missing')]
+        self.assertEqual(caches['state'].get_many(
+            [feed_cache._version_key(scope) for scope in scopes]), {})
+
+    def test_not_modified_until_posts_change(self):
+        """Повторный опрос с ETag получает 304, не трогая базу."""
+        url = reverse('posts:group_feed', args=['first', 'rss'])
+        response = self.guest_client.get(url)
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.post.text = 'Исправленный пост'
+        with run_on_commit_callbacks():
+            self.post.save()
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Исправленный пост')
+
+    def test_if_modified_since(self):
+        url = reverse('posts:feed', args=['rss'])
+        last_modified = self.guest_client.get(url)['Last-Modified']
+        response = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
@@ -0,0 +1,69 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.runner import run_on_commit_callbacks
+
+from .. import cache as feed_cache
+from .. import identity
+from ..models import Group
+
+
+@override_settings(IDENTITY_CACHE_SIZE=2, IDENTITY_CACHE_CHECK_INTERVAL=60)
+class IdentityCacheTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.groups = [
+            Group.objects.create(title=f'Группа {number}', slug=f'g{number}',
+                                 description='Тестовое описание')
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        identity.clear()
+
+    def test_lookup_served_from_memory(self):
+        identity.get(Group, 'slug', 'g0')
+        with self.assertNumQueries(0):
+            group = identity.get(Group, 'slug', 'g0')
+        self.assertEqual(group, self.groups[0])
+        self.assertIsNot(group, identity.get(Group, 'slug', 'g0'))
+
+    def test_edit_invalidates(self):
+        identity.get(Group, 'slug', 'g0')
+        self.groups[0].title = 'Новое название'
+        with run_on_commit_callbacks():
+            self.groups[0].save()
+        response = self.client.get(reverse('posts:group_list',
+                                           args=['g0']))
+        self.assertEqual(response.context['group'].title, 'Новое название')
+
+    def test_version_bumped_after_commit(self):
+        """Версия меняется только после коммита правки."""
+        scope = 'identity:posts.group'
+        before, = feed_cache.get_versions([scope])
+        with run_on_commit_callbacks():
+            self.groups[0].title = 'Новое название'
+            self.groups[0].save()
+            self.assertEqual(feed_cache.get_versions([scope]), [before])
+        self.assertNotEqual(feed_cache.get_versions([scope]), [before])
+
+    @override_settings(IDENTITY_CACHE_CHECK_INTERVAL=0)
+    def test_version_bumped_by_other_process(self):
+        identity.get(Group, 'slug', 'g0')
+        # другой воркер сменил общую версию, локальные записи не тронуты
+        with run_on_commit_callbacks():
+            feed_cache.invalidate(['identity:posts.group'])
+        with self.assertNumQueries(1):
+            identity.get(Group, 'slug', 'g0')
+
+    def test_bounded_and_missing(self):
+        for group in self.groups:
+            identity.get(Group, 'slug', group.slug)
+        self.assertEqual(len(identity._entries), 2)
+        response = self.client.get(reverse('posts:group_list',
+                                           args=['missing']))
+        self.assertEqual(response.status_code, 404)
@@ -52,3 +52,29 @@ class PostModelTest(TestCase):
             with self.subTest(field=field):
                 self.assertEqual(
                     post._meta.get_field(field).help_text, expected_value)
+
+
+class PostTextHtmlTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+
+    def test_html_rendered_on_save(self):
+        """text_html готовится при записи: абзацы, ссылки, экранирование."""
+        post = Post.objects.create(
+            author=self.user,
+            text='Смотри https://example.com\n\n<script>alert(1)</script>',
+        )
+        self.assertEqual(
+            post.text_html,
+            '<p>Смотри <a href="https://example.com" rel="nofollow">'
+            'https://example.com</a></p>\n\n'
+            '<p>&lt;script&gt;alert(1)&lt;/script&gt;</p>')
+
+    def test_html_updated_with_update_fields(self):
+        post = Post.objects.create(author=self.user, text='Старый')
+        post.text = 'Новый'
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, '<p>Новый</p>')
@@ -0,0 +1,93 @@
+import datetime
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import deletion
+from ..models import ArchivedPost, Group, GroupAuthorStats, GroupStats
+from ..models import MonthlyPostCount, Post
+from ..partitions import PartitionedPosts
+from ..stats import rebuild_group_stats, rebuild_month_counts
+
+User = get_user_model()
+
+
+@override_settings(PAGE_POST=4, BULK_BATCH_SIZE=2, BULK_BATCH_PAUSE=0)
+class PartitionTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='first',
+            description='Тестовое описание')
+        now = timezone.now()
+        for number in range(7):
+            post = Post.objects.create(text=f'Пост {number}',
+                                       author=cls.author, group=cls.group)
+            # посты 0–4 старше года, 5 и 6 свежие
+            age = datetime.timedelta(days=400 - number if number < 5 else 1)
+            Post.objects.filter(pk=post.pk).update(pub_date=now - age)
+        rebuild_group_stats()
+        rebuild_month_counts()
+
+    def archive(self):
+        call_command('archive_posts', '--older-than=365', stdout=StringIO())
+
+    def counters(self):
+        return (
+            sorted(GroupStats.objects.values_list(
+                'group', 'posts_count', 'last_pub_date', 'top_authors')),
+            sorted(GroupAuthorStats.objects.values_list(
+                'group', 'author', 'posts_count')),
+            sorted(MonthlyPostCount.objects.values_list(
+                'scope', 'year', 'month', 'posts_count')),
+        )
+
+    def test_archive_keeps_ids_and_counters(self):
+        before = self.counters()
+        self.archive()
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(ArchivedPost.objects.count(), 5)
+        self.assertEqual(self.counters(), before)
+        rebuild_group_stats()
+        rebuild_month_counts()
+        self.assertEqual(self.counters(), before)
+
+    def test_feeds_read_both_partitions(self):
+        expected = [f'Пост {number}' for number in range(6, -1, -1)]
+        self.archive()
+        posts = PartitionedPosts.filter(group=self.group)
+        self.assertEqual(posts.count(), 7)
+        self.assertEqual([post.text for post in posts[1:5]], expected[1:5])
+        texts = []
+        for page in (1, 2):
+            response = self.client.get(reverse('posts:group_list',
+                                               args=['first']),
+                                       {'page': page})
+            texts += [post.text for post in response.context['page_obj']]
+        self.assertEqual(texts, expected)
+
+    def test_archived_post_detail_is_read_only(self):
+        self.archive()
+        post = ArchivedPost.objects.first()
+        response = self.client.get(reverse('posts:post_detail',
+                                           args=[post.pk]))
+        self.assertEqual(response.context['post'].text, post.text)
+        self.assertEqual(response.context['posts_count'], 7)
+        self.client.force_login(self.author)
+        response = self.client.get(reverse('posts:post_edit',
+                                           args=[post.pk]))
+        self.assertRedirects(response, reverse('posts:post_detail',
+                                               args=[post.pk]))
+
+    def test_delete_user_with_archived_posts(self):
+        self.archive()
+        deletion.delete_user(self.author)
+        self.assertFalse(ArchivedPost.objects.exists())
+        self.assertFalse(MonthlyPostCount.objects.exists())
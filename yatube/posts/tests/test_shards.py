@@ -0,0 +1,182 @@
+import datetime
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import deletion, shards
+from ..sitemaps import SITEMAPS
+from ..models import ArchivedPost, Group, GroupAuthorStats, GroupStats
+from ..models import MonthlyPostCount, Post
+from ..stats import rebuild_group_stats, rebuild_month_counts
+
+User = get_user_model()
+
+SHARDS = [
+    ('test_archive_2020', '2020-01', '2021-01'),
+    ('test_archive_old', None, '2019-07'),
+]
+# месяцы постов; все старше года и уходят в архив
+MONTHS = [(2019, 3), (2019, 9), (2020, 5), (2020, 11), (2021, 4)]
+
+
+@override_settings(ARCHIVE_SHARDS=SHARDS, PAGE_POST=2, BULK_BATCH_SIZE=2,
+                   BULK_BATCH_PAUSE=0)
+class ShardTests(TestCase):
+    databases = {'default', *(alias for alias, _, _ in SHARDS)}
+
+    @classmethod
+    def setUpClass(cls):
+        # временные файлы шардов: подключаются до проверки databases
+        cls.shard_dir = tempfile.mkdtemp()
+        for alias, _, _ in SHARDS:
+            connections.databases[alias] = {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': os.path.join(cls.shard_dir, f'{alias}.sqlite3'),
+            }
+            with override_settings(ARCHIVE_SHARDS=SHARDS):
+                call_command('migrate', database=alias, verbosity=0)
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='first',
+            description='Тестовое описание')
+        for number, (year, month) in enumerate(MONTHS):
+            post = Post.objects.create(text=f'Пост {number}',
+                                       author=cls.author, group=cls.group)
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=timezone.make_aware(
+                    datetime.datetime(year, month, 15)))
+        Post.objects.create(text='Свежий пост', author=cls.author,
+                            group=cls.group)
+        rebuild_group_stats()
+        rebuild_month_counts()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias, _, _ in SHARDS:
+            connections[alias].close()
+            del connections[alias]
+            del connections.databases[alias]
+        shutil.rmtree(cls.shard_dir)
+
+    def archive(self):
+        call_command('archive_posts', '--older-than=365', stdout=StringIO())
+
+    def placement(self):
+        return {queryset.db: sorted(queryset.values_list('text', flat=True))
+                for queryset in shards.archived()}
+
+    def counters(self):
+        return (
+            sorted(GroupStats.objects.values_list(
+                'group', 'posts_count', 'last_pub_date', 'top_authors')),
+            sorted(GroupAuthorStats.objects.values_list(
+                'group', 'author', 'posts_count')),
+            sorted(MonthlyPostCount.objects.values_list(
+                'scope', 'year', 'month', 'posts_count')),
+        )
+
+    def test_plan_covers_time_newest_first(self):
+        plan = [(piece.alias, piece.since and piece.since.date(),
+                 piece.until and piece.until.date())
+                for piece in shards.plan()]
+        self.assertEqual(plan, [
+            ('default', datetime.date(2021, 1, 1), None),
+            ('test_archive_2020', datetime.date(2020, 1, 1),
+             datetime.date(2021, 1, 1)),
+            ('default', datetime.date(2019, 7, 1), datetime.date(2020, 1, 1)),
+            ('test_archive_old', None, datetime.date(2019, 7, 1)),
+        ])
+        since, until = (timezone.make_aware(datetime.datetime(*date))
+                        for date in ((2020, 3, 1), (2020, 4, 1)))
+        self.assertEqual([piece.alias for piece in shards.plan(since, until)],
+                         ['test_archive_2020'])
+
+    def test_archive_places_posts_by_period(self):
+        before = self.counters()
+        self.archive()
+        self.assertEqual(self.placement(), {
+            'default': ['Пост 1', 'Пост 4'],
+            'test_archive_2020': ['Пост 2', 'Пост 3'],
+            'test_archive_old': ['Пост 0'],
+        })
+        self.assertEqual(self.counters(), before)
+        rebuild_group_stats()
+        rebuild_month_counts()
+        self.assertEqual(self.counters(), before)
+
+    def test_feeds_merge_shards_in_order(self):
+        self.archive()
+        texts, usernames = [], set()
+        for page in (1, 2, 3):
+            response = self.client.get(reverse('posts:group_list',
+                                               args=['first']),
+                                       {'page': page})
+            texts += [post.text for post in response.context['page_obj']]
+            usernames |= {post.author.username
+                          for post in response.context['page_obj']}
+        self.assertEqual(texts, ['Свежий пост', 'Пост 4', 'Пост 3',
+                                 'Пост 2', 'Пост 1', 'Пост 0'])
+        self.assertEqual(usernames, {'test_author'})
+
+    def test_archive_by_month_reads_only_its_shard(self):
+        self.archive()
+        with CaptureQueriesContext(connections['test_archive_old']) as old:
+            response = self.client.get(reverse('posts:archive',
+                                               args=[2020, 11]))
+        self.assertEqual([post.text for post in response.context['page_obj']],
+                         ['Пост 3'])
+        self.assertEqual(len(old), 0)
+
+    def test_archived_post_detail_and_deletion(self):
+        self.archive()
+        post = ArchivedPost.objects.using('test_archive_old').get()
+        response = self.client.get(reverse('posts:post_detail',
+                                           args=[post.pk]))
+        self.assertEqual(response.context['post'].author, self.author)
+        self.assertEqual(response.context['posts_count'], 6)
+        deletion.delete_user(self.author)
+        self.assertEqual(self.placement(), {
+            'default': [], 'test_archive_2020': [], 'test_archive_old': [],
+        })
+
+    def test_rebalance_moves_posts_to_new_shards(self):
+        self.archive()
+        before = self.counters()
+        with override_settings(ARCHIVE_SHARDS=[
+                ('test_archive_2020', '2019-09', '2021-01'),
+                ('test_archive_old', None, '2019-09')]):
+            out = StringIO()
+            call_command('rebalance_archive', verbosity=0, stdout=out)
+            self.assertIn('Перенесено между базами постов: 1', out.getvalue())
+            self.assertEqual(self.placement(), {
+                'default': ['Пост 4'],
+                'test_archive_2020': ['Пост 1', 'Пост 2', 'Пост 3'],
+                'test_archive_old': ['Пост 0'],
+            })
+            rebuild_group_stats()
+            rebuild_month_counts()
+            self.assertEqual(self.counters(), before)
+
+    def test_profile_sitemap_includes_authors_from_shards(self):
+        author = User.objects.create_user(username='old_author')
+        post = Post.objects.create(text='Старый пост', author=author)
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=timezone.make_aware(datetime.datetime(2019, 1, 15)))
+        self.archive()
+        self.assertEqual(self.placement()['test_archive_old'],
+                         ['Пост 0', 'Старый пост'])
+        chunk = SITEMAPS['profiles'].chunk_of(author.pk)
+        response = self.client.get(reverse('posts:sitemap_section',
+                                           args=['profiles', chunk]))
+        self.assertContains(response, '/profile/old_author/', count=1)
@@ -0,0 +1,91 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.runner import run_on_commit_callbacks
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(SITEMAP_CACHE_TIMEOUT=60, SITEMAP_CHUNK_SIZE=2)
+class SitemapTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа', slug='first',
+            description='Тестовое описание')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {number}', author=cls.author,
+                                group=cls.group)
+            for number in range(5)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def chunk_url(self, post):
+        chunk = (post.pk - 1) // 2
+        return reverse('posts:sitemap_section', args=['posts', chunk])
+
+    def test_index_lists_chunks(self):
+        response = self.guest_client.get(reverse('posts:sitemap'))
+        self.assertContains(response, self.chunk_url(self.posts[4]))
+        self.assertContains(response, 'sitemap-groups-0.xml')
+        self.assertContains(response, 'sitemap-profiles-0.xml')
+
+    def test_index_cached_until_section_changes(self):
+        url = reverse('posts:sitemap')
+        self.guest_client.get(url)
+        with self.assertNumQueries(0):
+            self.guest_client.get(url)
+        with run_on_commit_callbacks():
+            post = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertContains(self.guest_client.get(url),
+                            self.chunk_url(post))
+
+    def test_chunk_contents(self):
+        response = self.guest_client.get(self.chunk_url(self.posts[0]))
+        self.assertContains(response, reverse(
+            'posts:post_detail', args=[self.posts[0].pk]))
+        response = self.guest_client.get(
+            reverse('posts:sitemap_section', args=['profiles', 0]))
+        self.assertContains(response, '/profile/test_author/')
+        self.assertNotContains(response, '/profile/reader/')
+
+    def test_only_changed_chunk_regenerated(self):
+        """Правка поста сбрасывает кэш его куска и не трогает соседние."""
+        first, last = self.chunk_url(self.posts[0]), self.chunk_url(
+            self.posts[4])
+        self.guest_client.get(first)
+        self.guest_client.get(last)
+        with run_on_commit_callbacks():
+            Post.objects.filter(pk=self.posts[4].pk).delete()
+        with self.assertNumQueries(0):
+            self.guest_client.get(first)
+        # последний пост удалён, и его кусок теперь за концом карты
+        response = self.guest_client.get(last)
+        self.assertEqual(response.status_code, 404)
+
+    def test_empty_chunk_inside_range(self):
+        url = self.chunk_url(self.posts[0])
+        Post.objects.filter(pk__in=[post.pk for post in self.posts
+                                    if self.chunk_url(post) == url]).delete()
+        response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, '<url>')
+        response = self.guest_client.get(
+            reverse('posts:sitemap_section', args=['posts', 99]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_unknown_section(self):
+        response = self.guest_client.get(
+            reverse('posts:sitemap_section', args=['comments', 0]))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, GroupStats, Post
+from ..stats import rebuild_group_stats
+
+User = get_user_model()
+
+
+class GroupStatsTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='test_author')
+        cls.other = User.objects.create_user(username='test_other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='first',
+            description='Тестовое описание',
+        )
+        cls.second_group = Group.objects.create(
+            title='Вторая группа',
+            slug='second',
+            description='Тестовое описание',
+        )
+
+    def stats(self, group):
+        return GroupStats.objects.get(group=group)
+
+    def test_stats_follow_post_writes(self):
+        """Агрегаты обновляются при создании, переносе и удалении поста."""
+        first = Post.objects.create(
+            text='Первый', author=self.author, group=self.group)
+        last = Post.objects.create(
+            text='Второй', author=self.other, group=self.group)
+        Post.objects.create(
+            text='Третий', author=self.other, group=self.group)
+        stats = self.stats(self.group)
+        self.assertEqual(stats.posts_count, 3)
+        self.assertEqual(stats.last_pub_date, Post.objects.first().pub_date)
+        self.assertEqual(stats.top_authors_list,
+                         [self.other.username, self.author.username])
+
+        last.group = self.second_group
+        last.save()
+        self.assertEqual(self.stats(self.group).posts_count, 2)
+        self.assertEqual(self.stats(self.second_group).posts_count, 1)
+
+        first.delete()
+        stats = self.stats(self.group)
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.top_authors_list, [self.other.username])
+
+    def test_rebuild_matches_incremental(self):
+        """Пересчёт с нуля совпадает с инкрементальными агрегатами."""
+        for text in ('Первый', 'Второй'):
+            Post.objects.create(text=text, author=self.author,
+                                group=self.group)
+        expected = list(GroupStats.objects.values_list(
+            'group', 'posts_count', 'last_pub_date', 'top_authors'))
+        GroupStats.objects.all().delete()
+        self.assertEqual(rebuild_group_stats(), 2)
+        self.assertEqual(
+            list(GroupStats.objects.values_list(
+                'group', 'posts_count', 'last_pub_date', 'top_authors')),
+            expected
+        )
+
+    def test_group_index_single_query(self):
+        """Каталог групп читается одним запросом."""
+        Post.objects.create(text='Пост', author=self.author, group=self.group)
+        with self.assertNumQueries(1):
+            response = Client().get(reverse('posts:group_index'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['groups'][0].group, self.group)
+        self.assertContains(response, self.author.username)
+
+    def test_top_authors_follow_rename(self):
+        Post.objects.create(text='Пост', author=self.other, group=self.group)
+        other = User.objects.get(pk=self.other.pk)
+        other.username = 'renamed'
+        other.save()
+        self.assertEqual(self.stats(self.group).top_authors_list,
+                         ['renamed'])
+        response = Client().get(reverse('posts:group_index'))
+        self.assertContains(response, '/profile/renamed/')
+        self.assertNotContains(response, '/profile/test_other/')
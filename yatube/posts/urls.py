@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import feeds, sitemaps, views
 
 app_name = 'posts'
 
@@ -9,6 +9,33 @@ urlpatterns = [
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('group/', views.group_index, name='group_index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('create/', views.post_create, name='post_create'),
+    path('autocomplete/<str:name>/', views.autocomplete,
+         name='autocomplete'),
+    path('feed/<str:feed_type>/', feeds.site_feed, name='feed'),
+    path('group/<slug:slug>/feed/<str:feed_type>/', feeds.group_feed,
+         name='group_feed'),
+    path('profile/<str:username>/feed/<str:feed_type>/', feeds.author_feed,
+         name='profile_feed'),
+    path('sitemap.xml', sitemaps.sitemap_index, name='sitemap'),
+    path('sitemap-<str:section>-<int:chunk>.xml', sitemaps.sitemap_section,
+         name='sitemap_section'),
+    path('archive/<int:year>/', views.archive, name='archive'),
+    path('archive/<int:year>/<int:month>/', views.archive, name='archive'),
+    path('archive/<int:year>/<int:month>/<int:day>/', views.archive,
+         name='archive'),
+    path('group/<slug:slug>/archive/<int:year>/', views.group_archive,
+         name='group_archive'),
+    path('group/<slug:slug>/archive/<int:year>/<int:month>/',
+         views.group_archive, name='group_archive'),
+    path('group/<slug:slug>/archive/<int:year>/<int:month>/<int:day>/',
+         views.group_archive, name='group_archive'),
+    path('profile/<str:username>/archive/<int:year>/',
+         views.profile_archive, name='profile_archive'),
+    path('profile/<str:username>/archive/<int:year>/<int:month>/',
+         views.profile_archive, name='profile_archive'),
+    path('profile/<str:username>/archive/<int:year>/<int:month>/<int:day>/',
+         views.profile_archive, name='profile_archive'),
 ]
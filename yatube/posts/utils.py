@@ -1,5 +1,9 @@
+import datetime
+
 from django.conf import settings
 from django.core.paginator import Paginator
+from django.http import Http404
+from django.utils import timezone
 
 
 def paginator(request, posts):
@@ -7,3 +11,25 @@ def paginator(request, posts):
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
+
+
+def date_range(year, month=None, day=None):
+    """Полуоткрытый интервал [начало, конец) для архива за период."""
+    try:
+        if day is not None:
+            start = datetime.date(year, month, day)
+            end = start + datetime.timedelta(days=1)
+        elif month is not None:
+            start = datetime.date(year, month, 1)
+            end = datetime.date(year + month // 12, month % 12 + 1, 1)
+        else:
+            start = datetime.date(year, 1, 1)
+            end = datetime.date(year + 1, 1, 1)
+    except (ValueError, OverflowError):
+        raise Http404('Некорректная дата')
+    tz = timezone.get_current_timezone()
+    return tuple(
+        timezone.make_aware(datetime.datetime.combine(date, datetime.time()),
+                            tz)
+        for date in (start, end)
+    )
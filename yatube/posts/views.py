@@ -1,16 +1,29 @@
+import datetime
+
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import get_user_model
-from django.shortcuts import get_object_or_404, render, redirect
+from django.http import Http404, JsonResponse
+from django.shortcuts import render, redirect
+from django.urls import reverse
+
+from core.throttle import throttle
 
+from . import autocomplete as prefix_index
+from . import identity, shards
+from .cache import (SITE, author_version_scope, cache_feed,
+                    group_version_scope)
 from .forms import PostForm
-from .models import Group, Post
-from .utils import paginator
+from .models import Group, GroupStats, MonthlyPostCount, Post
+from .partitions import PartitionedPosts, get_post
+from .stats import SITE_SCOPE, author_scope, group_scope
+from .utils import date_range, paginator
 
 User = get_user_model()
 
 
+@cache_feed(lambda: [SITE])
 def index(request):
-    posts = Post.objects.all()
+    posts = PartitionedPosts.cards()
     page_obj = paginator(request, posts)
     context = {
         'posts': posts,
@@ -19,9 +32,29 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+def group_index(request):
+    groups = GroupStats.objects.select_related('group')
+    context = {
+        'groups': groups,
+    }
+    return render(request, 'posts/group_index.html', context)
+
+
+def group_scopes(slug):
+    # 404 раньше, чем для несуществующей группы заведётся версия
+    group = identity.get_object_or_404(Group, slug=slug)
+    return [group_version_scope(group.slug)]
+
+
+def author_scopes(username):
+    author = identity.get_object_or_404(User, username=username)
+    return [author_version_scope(author.username)]
+
+
+@cache_feed(group_scopes)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
+    group = identity.get_object_or_404(Group, slug=slug)
+    posts = PartitionedPosts.cards(group=group)
     page_obj = paginator(request, posts)
     context = {
         'posts': posts,
@@ -31,9 +64,10 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@cache_feed(author_scopes)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
+    author = identity.get_object_or_404(User, username=username)
+    posts = PartitionedPosts.cards(author=author)
     posts_count = posts.count()
     page_obj = paginator(request, posts)
     context = {
@@ -45,9 +79,61 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+def _archive(request, lookups, scope, period, archive_url, url_args,
+             context):
+    """Общая часть архивов сайта, группы и автора."""
+    start, end = date_range(*period)
+    posts = PartitionedPosts.cards(pub_date__gte=start, pub_date__lt=end,
+                                   **lookups)
+    page_obj = paginator(request, posts)
+    month_counts = [
+        {
+            'date': datetime.date(row.year, row.month, 1),
+            'posts_count': row.posts_count,
+            'url': reverse(archive_url,
+                           args=[*url_args, row.year, row.month]),
+        }
+        for row in MonthlyPostCount.objects.filter(scope=scope)
+    ]
+    context.update({
+        'posts': posts,
+        'page_obj': page_obj,
+        'period': start,
+        'period_format': ('Y', 'E Y', 'd E Y')[len(period) - 1],
+        'month_counts': month_counts,
+    })
+    return render(request, 'posts/archive.html', context)
+
+
+def _period(year, month, day):
+    return [part for part in (year, month, day) if part is not None]
+
+
+def archive(request, year, month=None, day=None):
+    return _archive(request, {}, SITE_SCOPE,
+                    _period(year, month, day), 'posts:archive', [], {})
+
+
+def group_archive(request, slug, year, month=None, day=None):
+    group = identity.get_object_or_404(Group, slug=slug)
+    return _archive(request, {'group': group}, group_scope(group.pk),
+                    _period(year, month, day), 'posts:group_archive',
+                    [group.slug], {'group': group})
+
+
+def profile_archive(request, username, year, month=None, day=None):
+    author = identity.get_object_or_404(User, username=username)
+    return _archive(request, {'author': author}, author_scope(author.pk),
+                    _period(year, month, day), 'posts:profile_archive',
+                    [author.username], {'author': author})
+
+
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    posts_count = post.author.posts.all().count()
+    post = get_post(pk=post_id)
+    if post is None:
+        raise Http404('Пост не найден')
+    posts_count = PartitionedPosts.filter(
+        select_related=False, author_id=post.author_id).count()
     context = {
         'post': post,
         'posts_count': posts_count,
@@ -55,7 +141,17 @@ def post_detail(request, post_id):
     return render(request, 'posts/post_detail.html', context)
 
 
+def autocomplete(request, name):
+    """Подсказки по началу названия группы или имени пользователя."""
+    if name not in prefix_index.SOURCES:
+        raise Http404('Нет такого автодополнения')
+    prefix = request.GET.get('q', '').strip()
+    results = prefix_index.search(name, prefix) if prefix else []
+    return JsonResponse({'results': results})
+
+
 @login_required
+@throttle('post_write')
 def post_create(request):
     form = PostForm(request.POST or None)
     if request.method == 'POST' and form.is_valid():
@@ -67,8 +163,14 @@ def post_create(request):
 
 
 @login_required
+@throttle('post_write')
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = Post.objects.filter(id=post_id).first()
+    if post is None:
+        # архивные посты только для чтения
+        if not any(posts.exists() for posts in shards.archived(id=post_id)):
+            raise Http404('Пост не найден')
+        return redirect('posts:post_detail', post_id)
     if post.author.username != request.user.username:
         return redirect('posts:post_detail', post_id)
     form = PostForm(request.POST or None, instance=post)
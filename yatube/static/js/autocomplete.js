@@ -0,0 +1,34 @@
+// Поле поиска над <select data-autocomplete="url">: варианты приходят
+// с сервера по первым буквам (posts.autocomplete), а не все сразу.
+document.querySelectorAll('select[data-autocomplete]').forEach(function (select) {
+  var input = document.createElement('input');
+  input.type = 'search';
+  input.className = 'form-control mb-2';
+  input.placeholder = 'Начните вводить название';
+  select.parentNode.insertBefore(input, select);
+  var timer = null;
+  input.addEventListener('input', function () {
+    clearTimeout(timer);
+    timer = setTimeout(function () {
+      var query = input.value.trim();
+      if (!query) {
+        return;
+      }
+      fetch(select.dataset.autocomplete + '?q=' + encodeURIComponent(query))
+        .then(function (response) { return response.json(); })
+        .then(function (data) {
+          // пустой вариант и выбранный остаются, остальные — из подсказок
+          Array.from(select.options).forEach(function (option) {
+            if (option.value && !option.selected) {
+              option.remove();
+            }
+          });
+          data.results.forEach(function (group) {
+            if (String(group.id) !== select.value) {
+              select.add(new Option(group.title, group.id));
+            }
+          });
+        });
+    }, 150);
+  });
+});
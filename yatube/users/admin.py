@@ -1,3 +1,18 @@
-# from django.contrib import admin
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
 
-# Register your models here.
+from posts.admin import BackgroundDeletionMixin
+from posts.deletion import delete_user_in_background
+
+User = get_user_model()
+
+
+class YatubeUserAdmin(BackgroundDeletionMixin, UserAdmin):
+    """Удаляет пользователей с их постами пачками в фоне."""
+    delete_in_background = staticmethod(delete_user_in_background)
+    posts_lookup = 'author_id'
+
+
+admin.site.unregister(User)
+admin.site.register(User, YatubeUserAdmin)
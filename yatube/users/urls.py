@@ -1,62 +1,64 @@
-from django.contrib.auth.views import (LoginView, LogoutView,
-                                       PasswordChangeDoneView,
-                                       PasswordChangeView,
-                                       PasswordResetConfirmView,
-                                       PasswordResetDoneView,
-                                       PasswordResetCompleteView,
-                                       PasswordResetView)
 from django.urls import path
 
-from . import views
+from core.lazy import lazy_view
+from core.throttle import throttle
 
 app_name = 'users'
 
+# представления импортируются при первом запросе: модуль
+# django.contrib.auth.views тянет за собой формы и токены сброса пароля
+AUTH_VIEWS = 'django.contrib.auth.views.'
+
 urlpatterns = [
-    path('signup/', views.SignUp.as_view(), name='signup'),
+    path('signup/', throttle('signup')(lazy_view('users.views.SignUp')),
+         name='signup'),
     path(
         'logout/',
-        LogoutView.as_view(template_name='users/logged_out.html'),
+        lazy_view(AUTH_VIEWS + 'LogoutView',
+                  template_name='users/logged_out.html'),
         name='logout'
     ),
     path(
         'login/',
-        LoginView.as_view(template_name='users/login.html'),
+        throttle('login')(lazy_view(AUTH_VIEWS + 'LoginView',
+                                    template_name='users/login.html')),
         name='login'
     ),
     path(
         'password_reset/',
-        PasswordResetView.as_view(
-            template_name='users/password_reset_form.html'),
+        throttle('password_reset')(lazy_view(
+            AUTH_VIEWS + 'PasswordResetView',
+            template_name='users/password_reset_form.html')),
         name='password_reset_form'
     ),
     path(
         'password_reset/done/',
-        PasswordResetDoneView.as_view(
-            template_name='users/password_reset_done.html'),
+        lazy_view(AUTH_VIEWS + 'PasswordResetDoneView',
+                  template_name='users/password_reset_done.html'),
         name='password_reset_done'
     ),
     path(
         'reset/<uidb64>/<token>/',
-        PasswordResetConfirmView.as_view(
-            template_name='users/password_reset_confirm.html'),
+        lazy_view(AUTH_VIEWS + 'PasswordResetConfirmView',
+                  template_name='users/password_reset_confirm.html'),
         name='password_reset_confirm'
     ),
     path(
         'reset/done/',
-        PasswordResetCompleteView.as_view(
-            template_name='users/password_reset_complete.html'),
+        lazy_view(AUTH_VIEWS + 'PasswordResetCompleteView',
+                  template_name='users/password_reset_complete.html'),
         name='password_reset_complete'
     ),
     path(
         'password_change/',
-        PasswordChangeView.as_view(
-            template_name='users/password_change_form.html'),
+        lazy_view(AUTH_VIEWS + 'PasswordChangeView',
+                  template_name='users/password_change_form.html'),
         name='password_change_form'
     ),
     path(
         'password_change/done/',
-        PasswordChangeDoneView.as_view(
-            template_name='users/password_change_done.html'),
+        lazy_view(AUTH_VIEWS + 'PasswordChangeDoneView',
+                  template_name='users/password_change_done.html'),
         name='password_change_done'
     ),
 ]
@@ -0,0 +1,17 @@
+"""
+WSGI-точка входа с прогревом до fork.
+
+Для мастер-процесса, который форкает воркеров после загрузки
+приложения, например ``gunicorn --preload yatube.preload:application``.
+URLconf, шаблоны и метаданные моделей готовятся один раз в мастере,
+а воркеры делят эту память copy-on-write.
+"""
+
+from core.prefork import warm_up
+from posts import autocomplete
+
+from .wsgi import application  # noqa: F401
+
+# индексы автодополнения тоже строятся один раз на всех воркеров
+autocomplete.build_all()
+report = warm_up()
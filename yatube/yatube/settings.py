@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+from importlib.util import find_spec
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -28,6 +29,11 @@ DEBUG = True
 ALLOWED_HOSTS = []
 
 
+# Ускоренный старт воркеров: admin.py приложений подключаются
+# при первом обращении к /admin/, а не в каждом воркере при запуске
+LAZY_BOOT = os.environ.get('YATUBE_LAZY_BOOT') == '1'
+
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -35,7 +41,8 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',
-    'django.contrib.admin',
+    ('django.contrib.admin.apps.SimpleAdminConfig' if LAZY_BOOT
+     else 'django.contrib.admin'),
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -44,7 +51,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.nplusone.NPlusOneMiddleware',
+    'core.slow_queries.SlowQueryMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -53,8 +63,67 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# служебные страницы (панель отладки, /metrics) открыты с этих адресов;
+# за прокси на той же машине все запросы приходят с 127.0.0.1, поэтому
+# в боевом режиме список пуст и /metrics читают с METRICS_TOKEN
+INTERNAL_IPS = ['127.0.0.1'] if DEBUG else []
+
+# django-debug-toolbar — только в разработке и если пакет установлен
+USE_DEBUG_TOOLBAR = DEBUG and find_spec('debug_toolbar') is not None
+if USE_DEBUG_TOOLBAR:
+    INSTALLED_APPS.append('debug_toolbar')
+    # сразу за метриками: панели должны видеть всю остальную цепочку
+    MIDDLEWARE.insert(1, 'debug_toolbar.middleware.DebugToolbarMiddleware')
+    DEBUG_TOOLBAR_PANELS = [
+        'debug_toolbar.panels.timer.TimerPanel',
+        'debug_toolbar.panels.request.RequestPanel',
+        'debug_toolbar.panels.sql.SQLPanel',
+        'debug_toolbar.panels.templates.TemplatesPanel',
+        'debug_toolbar.panels.cache.CachePanel',
+        'core.panels.PaginatorPanel',
+        'core.panels.CacheFamilyPanel',
+        'posts.panels.FragmentPanel',
+        'core.panels.NPlusOnePanel',
+        'debug_toolbar.panels.signals.SignalsPanel',
+        'debug_toolbar.panels.logging.LoggingPanel',
+    ]
+
+# поиск N+1 (core.nplusone): 'off', 'warn' — в лог, 'raise' — ошибка;
+# сколько одинаковых запросов из одного места уже считать N+1
+NPLUSONE_MODE = os.environ.get('YATUBE_NPLUSONE', 'warn' if DEBUG else 'off')
+NPLUSONE_THRESHOLD = 3
+TEST_RUNNER = 'core.runner.NPlusOneTestRunner'
+# журнал медленных запросов (core.slow_queries): порог в секундах
+# (0 — не писать), доля попавших в журнал и файл журнала
+SLOW_QUERY_THRESHOLD = 0.1
+SLOW_QUERY_SAMPLE_RATE = 1.0
+SLOW_QUERY_LOG = os.path.join(BASE_DIR, 'logs', 'slow_queries.jsonl')
+# метрики /metrics (core.metrics): каталог с файлами воркеров,
+# как часто воркер обновляет свой файл, с, и токен для сборщика
+# (заголовок Authorization: Bearer <токен>) — кроме адресов INTERNAL_IPS
+METRICS_DIR = os.path.join(BASE_DIR, 'metrics')
+METRICS_FLUSH_INTERVAL = 1
+METRICS_TOKEN = os.environ.get('YATUBE_METRICS_TOKEN', '')
+# резервные копии (core.backup): базы SQLite в режиме WAL, чтобы копия
+# не останавливала запись; куда класть копии, страниц за шаг, пауза
+# между шагами, с, и сколько раз копия может начаться заново без WAL
+SQLITE_WAL = True
+BACKUP_DIR = os.path.join(BASE_DIR, 'backups')
+BACKUP_PAGES_PER_STEP = 1024
+BACKUP_STEP_PAUSE = 0.01
+BACKUP_MAX_RESTARTS = 10
+
 PAGE_POST = 10
 
+GROUP_TOP_AUTHORS = 3
+
+# с этого числа постов админка не делает полных проходов по таблице
+ADMIN_LARGE_TABLE_THRESHOLD = 100000
+
+# массовые операции над постами: размер пачки и пауза между пачками (сек.)
+BULK_BATCH_SIZE = 500
+BULK_BATCH_PAUSE = 0.01
+
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
@@ -88,6 +157,93 @@ DATABASES = {
     }
 }
 
+# архив постов по периодам в отдельных файлах (posts.shards):
+# (алиас, 'ГГГГ-ММ' начала или None, 'ГГГГ-ММ' конца или None), например
+# ('archive_2020', '2020-01', '2021-01'). Непокрытые периоды — в default.
+# После изменения: migrate --database <алиас> и rebalance_archive.
+ARCHIVE_SHARDS = []
+
+for alias, _, _ in ARCHIVE_SHARDS:
+    DATABASES[alias] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, f'db_{alias}.sqlite3'),
+    }
+
+DATABASE_ROUTERS = ['posts.shards.ArchiveRouter']
+
+
+# файлы в BASE_DIR/cache общие для всех воркеров, а прочитанные
+# значения каждый процесс держит в памяти (см. core.cache_backends).
+# Сверх MAX_ENTRIES файлов default удаляет случайную 1/CULL_FREQUENCY
+# часть; state — версии разделов, блокировки пересчёта и лимиты
+# частоты — теряет только просроченные записи
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache_backends.LayeredFileCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'default'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 50000,
+            'CULL_FREQUENCY': 10,
+            'L1_MAX_ENTRIES': 1000,
+        },
+    },
+    'state': {
+        'BACKEND': 'core.cache_backends.LayeredFileCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache', 'state'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+            'CULL_EXPIRED_ONLY': True,
+            'L1_MAX_ENTRIES': 1000,
+        },
+    },
+}
+
+# страницы лент для анонимных посетителей (0 — не кэшировать)
+FEED_CACHE_TIMEOUT = 0 if DEBUG else 60
+# страницы лент дальше этой отдаются без кэша
+FEED_CACHE_MAX_PAGE = 50
+# RSS и Atom: сколько записей отдавать и сколько хранить готовую ленту
+SYNDICATION_ITEMS = 20
+SYNDICATION_CACHE_TIMEOUT = 0 if DEBUG else 60 * 60
+# групп и пользователей в памяти каждого процесса (0 — не кэшировать)
+# и как часто сверять общую версию, с
+IDENTITY_CACHE_SIZE = 0 if DEBUG else 1000
+IDENTITY_CACHE_CHECK_INTERVAL = 1
+# подсказок групп и пользователей на один запрос (posts.autocomplete)
+AUTOCOMPLETE_LIMIT = 10
+# сколько хранить правки индекса подсказок для других процессов, с
+AUTOCOMPLETE_LOG_TIMEOUT = 24 * 60 * 60
+# посты старше стольких дней archive_posts переносит в ArchivedPost
+POST_ARCHIVE_AFTER_DAYS = 365
+# карта сайта: объектов в куске (не больше 50 000) и время жизни куска
+SITEMAP_CHUNK_SIZE = 5000
+SITEMAP_CACHE_TIMEOUT = 0 if DEBUG else 24 * 60 * 60
+# отрендеренные карточки постов; ключ меняется вместе с содержимым поста
+POST_CARD_CACHE_TIMEOUT = 0 if DEBUG else 24 * 60 * 60
+# как часто сливать счётчики обращений в кэш и сколько страниц помнить
+FEED_ACCESS_FLUSH_EVERY = 100
+FEED_ACCESS_KEEP = 1000
+WARM_CACHES_WORKERS = 4
+# защита от набега на кэш (core.stampede): сколько ещё отдавать
+# устаревшую копию, пока её пересчитывают, с; сколько держится
+# блокировка пересчёта, с; насколько раньше срока начинать пересчёт
+STAMPEDE_PROTECTION = True
+STAMPEDE_STALE_TIMEOUT = 5 * 60
+STAMPEDE_LOCK_TIMEOUT = 10
+STAMPEDE_BETA = 1.0
+
+# лимиты частоты запросов: 'N/период' — ведро на N жетонов,
+# наполняющееся за секунду, минуту, час или сутки (s, m, h, d)
+THROTTLE_RATES = {} if DEBUG else {
+    'post_write': '30/m',
+    'login': '10/m',
+    'password_reset': '5/h',
+    'signup': '10/h',
+}
+# сколько доверенных прокси стоит перед сайтом: адрес клиента берётся
+# из X-Forwarded-For на столько записей от конца (0 — из REMOTE_ADDR)
+THROTTLE_TRUSTED_PROXIES = 0
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -13,13 +13,27 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
+from django.conf import settings
 from django.urls import include, path
 
+from core.lazy import lazy_admin_urls
+from core.metrics import metrics
+
+if settings.LAZY_BOOT:
+    admin_urls = lazy_admin_urls('admin/')
+else:
+    from django.contrib import admin
+    admin_urls = path('admin/', admin.site.urls)
+
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
-    path('admin/', admin.site.urls),
+    admin_urls,
     path('auth/', include('users.urls', namespace='users')),
-    path('auth/', include('django.contrib.auth.urls')),
+    path('auth/', include('core.auth_urls')),
     path('about/', include('about.urls', namespace='about')),
+    path('metrics', metrics, name='metrics'),
 ]
+
+if settings.USE_DEBUG_TOOLBAR:
+    import debug_toolbar
+    urlpatterns.append(path('__debug__/', include(debug_toolbar.urls)))